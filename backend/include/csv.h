@@ -1,4 +1,5 @@
 #pragma once
+#include <stddef.h>
 #include <stdint.h>
 
 typedef struct {
@@ -7,8 +8,40 @@ typedef struct {
   char  **rownames;       // size rows
   int32_t rows;
   int32_t cols;
+  char   *index_name;     // header of the first (row name) column
 } csv_table_t;
 
+// Read a CSV whose first column holds row names and whose other columns are
+// numeric. Fields may be quoted ("a,b", "say ""hi"""), lines may be any
+// length and end in LF, CRLF or CR. Names are trimmed; empty or missing
+// values read as 0. Returns 0, -1 (unreadable/empty file or no data columns)
+// or -3 (out of memory).
 int csv_read_table(const char *path, csv_table_t *out);
 void csv_free_table(csv_table_t *t);
 
+// Read-only view of a whole file (memory-mapped where possible).
+typedef struct {
+  const char *data;
+  size_t size;
+  int owned_;             // 1: heap copy (mapping unavailable), 0: mapped
+} csv_mapped_file_t;
+
+int csv_map_file(const char *path, csv_mapped_file_t *out);
+void csv_unmap_file(csv_mapped_file_t *m);
+
+// One field as it appears in the input. For quoted fields ptr/len cover the
+// text between the quotes, still containing doubled quotes.
+typedef struct {
+  const char *ptr;
+  size_t len;
+  int quoted;
+} csv_field_t;
+
+// Scan the field starting at *pos and advance *pos past its delimiter.
+// Returns 1 if another field follows in the same record, 0 if the record
+// ended (newline or end of input).
+int csv_next_field(const char **pos, const char *end, csv_field_t *field);
+// Trimmed, unescaped, NUL-terminated copy (NULL when out of memory).
+char *csv_field_dup(const csv_field_t *f);
+// Numeric value with atof() semantics; 0.0 for an empty field.
+double csv_field_to_double(const csv_field_t *f);
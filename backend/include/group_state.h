@@ -0,0 +1,194 @@
+#pragma once
+#include <stdint.h>
+#include <math.h>
+#include <stdlib.h>
+
+/**
+ * @brief Incremental per-group statistics used by the switching optimiser.
+ *
+ * Keeps running column sums and counts for every group together with each
+ * group's share of the between-region inequality, so a trial move of one
+ * sample can be scored in O(cols) instead of rescanning the whole matrix.
+ */
+typedef struct {
+  const double *data;     // row-major [rows * cols], not owned
+  const double *Y;        // column totals [cols], not owned
+  int32_t rows;
+  int32_t cols;
+  int32_t k;
+  double *group_sums;     // [k * cols]
+  int32_t *group_counts;  // [k]
+  double *group_contrib;  // [k] per-group term of the between-region inequality
+  int32_t empty_groups;   // number of groups with no members
+} em_group_state_t;
+
+/**
+ * @brief Relative tolerance below which a delta score is treated as a tie.
+ *
+ * Moves whose delta falls inside this band are re-evaluated with a full
+ * `em_between_inequality` rescan so accept/reject decisions match the legacy
+ * implementation exactly.
+ */
+#define EM_DELTA_REL_TOL 1e-9
+
+/**
+ * @brief Allocate and populate group statistics for an assignment.
+ *
+ * @param st State to initialise (caller-owned struct, buffers are allocated).
+ * @param data Input data matrix (rows × cols).
+ * @param rows Number of data points/samples.
+ * @param cols Number of variables/features.
+ * @param k Number of groups.
+ * @param Y Array of variable totals/sums across all data.
+ * @param member1 Array of group assignments for each data point.
+ *
+ * @pre All pointer parameters must not be NULL.
+ * @pre `rows`, `cols`, `k` must be greater than 0.
+ *
+ * @return 0 on success, -1 on invalid input, -2 on allocation failure.
+ */
+int em_group_state_init(em_group_state_t *st, const double *data, int32_t rows,
+                        int32_t cols, int32_t k, const double *Y,
+                        const int32_t *member1);
+
+/**
+ * @brief Release buffers owned by the state.
+ *
+ * @param st State previously initialised with em_group_state_init (may be NULL).
+ */
+void em_group_state_free(em_group_state_t *st);
+
+/**
+ * @brief Rebuild sums, counts and contributions from scratch.
+ *
+ * Sums are accumulated in row order, so the result is identical to a fresh
+ * `em_between_inequality` scan and any drift from incremental updates is
+ * discarded.
+ *
+ * @param st Initialised state.
+ * @param member1 Array of group assignments for each data point.
+ *
+ * @return 0 on success, -1 on invalid input.
+ */
+int em_group_state_resync(em_group_state_t *st, const int32_t *member1);
+
+/**
+ * @brief Between-region inequality implied by the cached contributions.
+ *
+ * @param st Initialised state.
+ *
+ * @return Sum of the per-group contributions.
+ */
+double em_group_state_bineq(const em_group_state_t *st);
+
+/**
+ * @brief Magnitude used to scale the tie tolerance for delta scores.
+ *
+ * @param st Initialised state.
+ * @param tineq Total inequality across all data.
+ *
+ * @return |tineq| plus the sum of absolute per-group contributions.
+ */
+double em_group_state_scale(const em_group_state_t *st, double tineq);
+
+/**
+ * @brief Check whether moving one member out of `from` into `to` leaves every
+ * group populated.
+ *
+ * The legacy optimiser rejects any assignment with an empty group because the
+ * group means cannot be formed; this reproduces that rule without a rescan.
+ *
+ * @param st Initialised state.
+ * @param from Current group of the sample.
+ * @param to Proposed group of the sample.
+ *
+ * @return 1 if the move keeps all groups non-empty, 0 otherwise.
+ */
+int em_group_state_move_ok(const em_group_state_t *st, int32_t from, int32_t to);
+
+/**
+ * @brief Score moving `sample` from group `from` to group `to`.
+ *
+ * @param st Initialised state.
+ * @param sample Index of the sample to move.
+ * @param from Current group of the sample.
+ * @param to Proposed group of the sample.
+ * @param out_delta Output: change in between-region inequality.
+ * @param out_from_contrib Output: contribution of `from` after the move (optional).
+ * @param out_to_contrib Output: contribution of `to` after the move (optional).
+ *
+ * @pre `from != to`, both in range [0, k-1].
+ *
+ * @return 0 on success, -1 on invalid input.
+ */
+int em_group_state_delta(const em_group_state_t *st, int32_t sample,
+                         int32_t from, int32_t to, double *out_delta,
+                         double *out_from_contrib, double *out_to_contrib);
+
+/**
+ * @brief Find the best target group for `sample` in one scan of the group sums.
+ *
+ * The contribution of `from` without the sample is computed once and shared
+ * by every target; targets that would leave a group empty are skipped. Ties
+ * go to the lowest group index.
+ *
+ * @param st Initialised state.
+ * @param sample Index of the sample to move.
+ * @param from Current group of the sample.
+ * @param out_to Output: best target group, -1 if no move is allowed.
+ * @param out_delta Output: change in between-region inequality of that move.
+ * @param out_from_contrib Output: contribution of `from` after the move (optional).
+ * @param out_to_contrib Output: contribution of the target after the move (optional).
+ *
+ * @return 0 on success, -1 on invalid input.
+ */
+int em_group_state_best_move(const em_group_state_t *st, int32_t sample,
+                             int32_t from, int32_t *out_to, double *out_delta,
+                             double *out_from_contrib, double *out_to_contrib);
+
+/**
+ * @brief Score merging groups `a` and `b` into one.
+ *
+ * @param st Initialised state.
+ * @param a First group.
+ * @param b Second group.
+ * @param out_delta Output: change in between-region inequality (never
+ * positive up to rounding, merging cannot separate the data better).
+ *
+ * @pre `a != b`, both in range [0, k-1].
+ *
+ * @return 0 on success, -1 on invalid input.
+ */
+int em_group_state_merge_delta(const em_group_state_t *st, int32_t a, int32_t b,
+                               double *out_delta);
+
+/**
+ * @brief Commit a move and update the affected group means in place.
+ *
+ * Only the `from` and `to` groups are touched: their sums, counts,
+ * contributions and (if requested) means are updated in O(cols).
+ *
+ * @param st Initialised state.
+ * @param member1 Array of group assignments (member1[sample] is set to `to`).
+ * @param sample Index of the sample to move.
+ * @param from Current group of the sample.
+ * @param to New group of the sample.
+ * @param from_contrib Contribution of `from` after the move (from em_group_state_delta).
+ * @param to_contrib Contribution of `to` after the move (from em_group_state_delta).
+ * @param out_group_means Group centroids (k × cols) to update, or NULL.
+ *
+ * @return 0 on success, -1 on invalid input.
+ */
+int em_group_state_apply(em_group_state_t *st, int32_t *member1, int32_t sample,
+                         int32_t from, int32_t to, double from_contrib,
+                         double to_contrib, double *out_group_means);
+
+/**
+ * @brief Write all group centroids from the cached sums.
+ *
+ * @param st Initialised state.
+ * @param out_group_means Output array for group centroids (k × cols).
+ *
+ * @return 0 on success, -1 on invalid input, -3 if a group is empty.
+ */
+int em_group_state_means(const em_group_state_t *st, double *out_group_means);
@@ -43,6 +43,82 @@ int em_set_groups(const double *data, int32_t k, int32_t rows, int32_t cols,
 
 int em_initial_groups(int32_t rows, int32_t k, int32_t *member1);
 
+/**
+ * @brief Warm-start k+1 groups from a k-group solution by splitting one group.
+ *
+ * Splits the group with the largest within-group inequality (its term in
+ * tineq = bineq + sum of within-group inequalities). The member farthest
+ * from the group mean and the member farthest from that one seed the two
+ * halves; every other member joins the nearer seed (squared Euclidean
+ * distance over the data columns). The second half becomes group `k`.
+ *
+ * @param data Input data matrix (rows × cols).
+ * @param rows Number of data points/samples.
+ * @param cols Number of variables/features.
+ * @param k Number of groups in `member1`.
+ * @param Y Array of variable totals/sums across all data.
+ * @param member1 Assignment to split, values in [0, k-1].
+ * @param out_member1 Output assignment with values in [0, k] (may be `member1`).
+ *
+ * @pre All pointer parameters must not be NULL.
+ * @pre `rows`, `cols`, `k` must be greater than 0.
+ *
+ * @return 0 on success, -1 on invalid input, -2 on allocation failure, -3 if
+ * no group has two members.
+ */
+
+int em_split_groups(const double *data, int32_t rows, int32_t cols, int32_t k,
+                    const double *Y, const int32_t *member1, int32_t *out_member1);
+
+/**
+ * @brief Warm-start k-1 groups from a k-group solution by merging two groups.
+ *
+ * Merges the pair of groups whose union loses the least between-group
+ * inequality. The merged group keeps the lower index; groups above the
+ * higher index move down by one.
+ *
+ * @param data Input data matrix (rows × cols).
+ * @param rows Number of data points/samples.
+ * @param cols Number of variables/features.
+ * @param k Number of groups in `member1`.
+ * @param Y Array of variable totals/sums across all data.
+ * @param member1 Assignment to merge, values in [0, k-1].
+ * @param out_member1 Output assignment with values in [0, k-2] (may be `member1`).
+ *
+ * @pre All pointer parameters must not be NULL.
+ * @pre `rows`, `cols` must be greater than 0 and `k` at least 2.
+ *
+ * @return 0 on success, -1 on invalid input, -2 on allocation failure.
+ */
+
+int em_merge_groups(const double *data, int32_t rows, int32_t cols, int32_t k,
+                    const double *Y, const int32_t *member1, int32_t *out_member1);
+
+/**
+ * @brief Randomised initial groups (k-means++ seeding) for multi-start runs.
+ *
+ * Picks k distinct rows as centres, the first uniformly and each further one
+ * with probability proportional to its squared distance from the nearest
+ * centre chosen so far, then assigns every row to its nearest centre. Every
+ * group receives at least its centre. The same seed always gives the same
+ * assignment.
+ *
+ * @param data Input data matrix (rows × cols).
+ * @param rows Number of data points/samples.
+ * @param cols Number of variables/features.
+ * @param k Number of groups.
+ * @param seed Seed of the random stream.
+ * @param member1 Output assignment with values in [0, k-1].
+ *
+ * @pre `data` and `member1` must not be NULL.
+ * @pre `cols` must be greater than 0 and 0 < `k` <= `rows`.
+ *
+ * @return 0 on success, -1 on invalid input, -2 on allocation failure.
+ */
+
+int em_seed_groups(const double *data, int32_t rows, int32_t cols, int32_t k,
+                   uint64_t seed, int32_t *member1);
+
 /**
  * @brief Calculate between-group inequality statistic.
  *
@@ -123,6 +199,10 @@ int em_rs_stat(double tineq, double bineq, double *out_rs, int *out_ixout);
  *
  * @return 0 on success, negative value on error (-1: invalid input, -2: invalid
  * group assignment, -3: empty group).
+ *
+ * @note Kept as the reference implementation of OPTIMALgroup. em_switch_groups
+ * uses em_group_state_apply, which updates the two affected group means in
+ * place instead of rebuilding all of them.
  */
 
 int em_optimise_groups(const double *data, int32_t rows, int32_t cols,
@@ -166,9 +246,119 @@ int em_optimise_groups(const double *data, int32_t rows, int32_t cols,
  * @note The algorithm explores rows × k different assignments per iteration.
  * @note Convergence is detected when no improvements are made for 3 consecutive
  * full iterations.
+ * @note Trial moves are scored incrementally with em_group_state_t (O(cols)
+ * per trial); near-ties are re-checked with em_between_inequality so the
+ * accepted moves are identical to a full rescan per trial.
  */
 
 int em_switch_groups(const double *data, int32_t rows, int32_t cols, int32_t k,
                      double tineq, const double *Y, int32_t min_groups,
                      int32_t *member1, double *out_bineq, double *out_rs_stat,
                      int32_t *out_ixout, double *out_group_means);
+
+/**
+ * @brief Called after every optimisation pass of em_switch_groups_ex.
+ *
+ * @param user Caller context (em_switch_opts_t::user).
+ * @param k Number of groups being optimised.
+ * @param pass Passes completed so far (1-based).
+ * @param moves Moves accepted during this pass.
+ * @param rs RS statistic of the current assignment (from the incremental
+ * state, so it may differ from a full rescan in the last digits).
+ *
+ * @return 0 to continue, non-zero to stop the optimisation (cancel).
+ */
+typedef int (*em_pass_fn)(void *user, int32_t k, int32_t pass, int32_t moves, double rs);
+
+/** @brief How em_switch_groups_ex picks moves within a pass. */
+typedef enum {
+  // Try each target group in turn and keep the first move that improves RS
+  // (VB6 SWITCHgroup; results identical to the legacy implementation)
+  EM_MOVE_FIRST_IMPROVEMENT = 0,
+  // Score every target group of a sample in one scan (em_group_state_best_move)
+  // and apply only the best move, if it improves RS
+  EM_MOVE_BEST_IMPROVEMENT = 1,
+  // Jacobi-style rounds: score the best move of every sample in parallel
+  // against a frozen snapshot, then commit the improving ones
+  EM_MOVE_PARALLEL_ROUNDS = 2
+} em_move_strategy_t;
+
+/** @brief Why em_switch_groups_ex stopped. */
+typedef enum {
+  EM_STOP_CONVERGED = 0,   // no improving move left
+  EM_STOP_MIN_GAIN = 1,    // a pass raised RS by less than min_rs_gain
+  EM_STOP_MAX_PASSES = 2,  // pass budget used up
+  EM_STOP_TIME = 3         // wall-time budget used up (possibly mid-pass)
+} em_stop_reason_t;
+
+/** @brief Outcome of em_switch_groups_ex (see em_switch_opts_t::stats). */
+typedef struct {
+  int32_t passes;        // passes (or rounds) run, including a cut-short one
+  int32_t moves;         // moves accepted in total
+  int32_t stop;          // em_stop_reason_t
+} em_switch_stats_t;
+
+/**
+ * @brief Options for em_switch_groups_ex.
+ *
+ * Initialise with em_switch_opts_default before setting individual fields.
+ */
+typedef struct {
+  em_pass_fn on_pass;    // optional per-pass hook (NULL: none)
+  void *user;            // passed to on_pass
+  int32_t strategy;      // em_move_strategy_t (EM_MOVE_FIRST_IMPROVEMENT: legacy)
+  int32_t threads;       // workers scoring EM_MOVE_PARALLEL_ROUNDS (<= 1: serial)
+  int32_t polish;        // non-zero: finish parallel rounds with first-improvement passes
+  int32_t max_passes;    // stop after this many passes (<= 0: no limit)
+  double max_seconds;    // stop once this much wall time has passed (<= 0: no limit)
+  double min_rs_gain;    // stop after a pass raising RS by less than this (<= 0: off)
+  int32_t stop_when_stale; // non-zero: stop at the first pass without moves
+  em_switch_stats_t *stats; // optional outcome (NULL: not reported)
+} em_switch_opts_t;
+
+/**
+ * @brief Fill `opts` with the legacy em_switch_groups behaviour.
+ *
+ * @param opts Options to initialise.
+ */
+void em_switch_opts_default(em_switch_opts_t *opts);
+
+/**
+ * @brief em_switch_groups with explicit options.
+ *
+ * With EM_MOVE_BEST_IMPROVEMENT a sample whose best move does not improve
+ * RS by more than the tie tolerance is skipped without touching `member1`,
+ * near-ties are never rescanned, and the optimisation stops after the first
+ * pass without moves (a repeat pass would find none either). It reaches a
+ * local optimum in fewer evaluations but not necessarily the legacy one.
+ *
+ * EM_MOVE_PARALLEL_ROUNDS spreads one K over `threads` workers. Each round
+ * (reported as a pass) scores every sample's best move against the state
+ * at the start of the round, then commits the improving moves one by one in
+ * order of decreasing gain (ties: lower sample first), re-scoring each
+ * against the moves already committed and dropping those that no longer
+ * improve RS. RS therefore never decreases, and the result is identical for
+ * any thread count. Rounds stop when none commits a move, which is the same
+ * kind of local optimum as EM_MOVE_BEST_IMPROVEMENT; with `polish` the
+ * optimisation then continues with legacy first-improvement passes.
+ *
+ * The budgets turn the optimiser into an anytime search: it stops after
+ * `max_passes`, once `max_seconds` have passed (checked every 256 samples,
+ * or per round), or after an improving pass that raised RS by less than
+ * `min_rs_gain` percentage points. `member1` and the outputs then describe
+ * the assignment reached so far. The legacy loop only ends after three
+ * passes without moves; `stop_when_stale` ends it at the first, which gives
+ * the same assignment because a pass without moves changes nothing.
+ *
+ * @param opts Options (NULL: em_switch_opts_default).
+ *
+ * @return 0 on success, -1 on invalid input (including an unknown
+ * `strategy`), EM_ERR_CANCELLED if `on_pass`
+ * asked to stop (member1 then holds the assignment reached so far and the
+ * other outputs are not written).
+ */
+int em_switch_groups_ex(const double *data, int32_t rows, int32_t cols, int32_t k,
+                        double tineq, const double *Y, int32_t min_groups,
+                        int32_t *member1, double *out_bineq, double *out_rs_stat,
+                        int32_t *out_ixout, double *out_group_means,
+                        const em_switch_opts_t *opts);
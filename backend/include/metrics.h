@@ -48,6 +48,35 @@ int em_ch_stat(const double *class_table, int32_t samples, int32_t classes, int3
                double *out_perm_mean, double *out_perm_p);
 
 
+/**
+ * @brief permutation test for the Calinski-Harabasz statistic
+ *
+ * Shuffles every data column independently across samples (group labels stay
+ * fixed) and recomputes CH for each permutation. Column data is centred once
+ * and the total sum of squares is reused, so each permutation costs a single
+ * shuffle-and-accumulate pass with no allocation. Each permutation draws from
+ * its own RNG stream derived from `seed`, and results are reduced in
+ * permutation order, so the outputs do not depend on `n_threads`.
+ *
+ * @param class_table Pointer to the class table (first column is cluster assignments, rest are data)
+ * @param samples Number of samples (rows) in the class table
+ * @param classes Number of classes (columns - 1) in the class table
+ * @param k Number of clusters
+ * @param ch_observed Observed CH statistic (from em_ch_stat)
+ * @param perms_n Number of permutations to perform
+ * @param seed Seed for the permutation RNG streams
+ * @param n_threads Worker threads for the permutations (<= 1: serial)
+ * @param out_perm_mean Pointer to store the mean CH statistic over permutations
+ * @param out_perm_p Pointer to store the fraction of permutations with CH above ch_observed
+ *
+ * @return 0 on success (outputs are 0 when a group is empty), -1 on invalid input, -2 on allocation failure
+ */
+
+int em_ch_permutation_test(const double *class_table, int32_t samples, int32_t classes,
+                           int32_t k, double ch_observed, int32_t perms_n, uint64_t seed,
+                           int32_t n_threads, double *out_perm_mean, double *out_perm_p);
+
+
 /**
  * @brief computes Z statistics for group means (distance from global mean)
  * 
@@ -0,0 +1,75 @@
+#pragma once
+#include <stdint.h>
+
+/**
+ * @brief Task callback for em_parallel_for.
+ *
+ * @param ctx Caller context shared by all tasks.
+ * @param task Task index in [0, n_tasks).
+ * @param worker Worker index in [0, n_workers); stable for the lifetime of a
+ * worker so it can select per-worker scratch buffers.
+ */
+typedef void (*em_task_fn)(void *ctx, int32_t task, int32_t worker);
+
+/**
+ * @brief Number of hardware threads available to the process.
+ *
+ * @return Online processor count (at least 1).
+ */
+int32_t em_hardware_threads(void);
+
+/**
+ * @brief Resolve a requested thread count.
+ *
+ * @param requested Requested count; values <= 0 mean "all hardware threads".
+ *
+ * @return Thread count to use (at least 1).
+ */
+int32_t em_resolve_threads(int32_t requested);
+
+/**
+ * @brief Number of workers em_parallel_for will use for a job.
+ *
+ * @param n_tasks Number of tasks.
+ * @param n_threads Requested thread count (<= 1 runs inline).
+ *
+ * @return Worker count in [1, max(1, n_tasks)].
+ */
+int32_t em_parallel_workers(int32_t n_tasks, int32_t n_threads);
+
+/**
+ * @brief Run `fn` for every task index on a small pool of worker threads.
+ *
+ * Tasks are handed out dynamically in ascending index order; the calling
+ * thread acts as worker 0. With `n_threads <= 1` every task runs inline on
+ * the caller. If a worker thread cannot be started, the remaining workers
+ * (including the caller) still complete every task.
+ *
+ * @param n_tasks Number of tasks.
+ * @param n_threads Requested thread count.
+ * @param fn Task callback.
+ * @param ctx Caller context passed to every task.
+ *
+ * @return 0 on success, -1 on invalid input.
+ */
+int em_parallel_for(int32_t n_tasks, int32_t n_threads, em_task_fn fn, void *ctx);
+
+/** @brief Opaque mutex for state shared between em_parallel_for tasks. */
+typedef struct em_lock em_lock_t;
+
+/**
+ * @brief Create a mutex.
+ *
+ * @return New lock, or NULL when out of memory.
+ */
+em_lock_t *em_lock_create(void);
+void em_lock_destroy(em_lock_t *lock);
+void em_lock_acquire(em_lock_t *lock);
+void em_lock_release(em_lock_t *lock);
+
+/**
+ * @brief Monotonic clock for progress reporting and time budgets.
+ *
+ * @return Seconds since an arbitrary fixed point.
+ */
+double em_monotonic_seconds(void);
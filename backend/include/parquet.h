@@ -1,10 +1,28 @@
 #pragma once
 #include <stdint.h>
 
+#include "sweep.h"
+
 #ifdef __cplusplus
 extern "C" {
 #endif
 
+// In-memory sweep results in the layout run_entropymax produces them
+typedef struct {
+  const double *data;             // raw input values [rows * cols]
+  int32_t rows;
+  int32_t cols;
+  const char *const *colnames;    // bin names [cols]
+  const char *const *rownames;    // sample names [rows]
+  const double *lat;              // per-sample latitude [rows] (-1 when unmatched)
+  const double *lon;              // per-sample longitude [rows] (-1 when unmatched)
+  const em_k_metric_t *metrics;   // one entry per K [n_k]
+  int32_t n_k;
+  const int32_t *all_member1;     // 0-based groups, contiguous blocks [n_k * rows]
+  double tineq;                   // total inequality reported on every row
+  int32_t with_permutations;      // emit the two permutation columns
+} em_result_table_t;
+
 int parquet_write_table(const char *path, const double *data, int32_t rows, int32_t cols, const char *const *colnames, const char *const *rownames);
 
 // Compiled-only IO helpers (provided when Arrow/Parquet is enabled)
@@ -13,6 +31,20 @@ int em_csv_to_parquet_with_gps(const char *algo_csv_path,
                                const char *gps_csv_path,
                                const char *out_parquet_path);
 
+// Write sweep results straight to Parquet with the same columns and row order
+// as the runner's CSV (K, Group, Sample, bins..., metrics..., latitude,
+// longitude). K and Group are int32 and Sample is dictionary-encoded.
+// Returns 0 on success, -1 when Parquet support is not compiled in or input
+// is invalid, < -1 on Arrow/IO errors.
+int em_write_results_parquet(const char *out_parquet_path, const em_result_table_t *res);
+
+// Normalized layout: a samples table (Sample, latitude, longitude, bins...),
+// one metrics row per K (K, metrics...), and an int32 membership matrix with
+// one column per K ("K<k>", 1-based groups) whose row i belongs to sample i.
+// Same return codes as em_write_results_parquet.
+int em_write_normalized_parquet(const char *samples_path, const char *metrics_path,
+                                const char *membership_path, const em_result_table_t *res);
+
 // Availability probe: returns 1 when Arrow/Parquet is compiled in, 0 otherwise.
 int parquet_is_available(void);
 
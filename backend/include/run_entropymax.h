@@ -6,6 +6,9 @@
 /**
  * @brief Reads a CSV file into a data matrix and row/column names.
  *
+ * Thin wrapper over csv_read_table() (csv.h): memory-mapped, quoted fields,
+ * no line length limit.
+ *
  * @param filename Path to the CSV file.
  * @param data Output pointer for the data matrix (allocated, rows*cols doubles).
  * @param rows Output: number of rows.
@@ -13,8 +16,8 @@
  * @param rownames Output: array of row name strings (allocated).
  * @param colnames Output: array of column name strings (allocated).
  * @param sample_header_out Output: header string for the sample column (allocated).
- * @param raw_values_out Output: array of raw value strings (allocated, optional, can be NULL).
- * @return 0 on success, -1 on error.
+ * @param raw_values_out Optional; always set to NULL (raw value strings are no longer kept).
+ * @return 0 on success, -1 on an unreadable file, -3 when out of memory.
  */
 int read_csv(const char *filename, double **data, int *rows, int *cols,
              char ***rownames, char ***colnames,
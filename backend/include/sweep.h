@@ -10,10 +10,75 @@ typedef struct {
   double fSST;           // Total sum of squares (original)
   double fSSE;           // Error sum of squares (original)
   double fBetween;       // Between-region inequality (VB: bineq)
-  double fCHP;           // C-H value from permutation
-  double nCounterIndex;  // C-H probability
+  double fCHP;           // C-H permutation p-value (VB: fCHPermP)
+  double nCounterIndex;  // Mean C-H over permutations (VB: fCHpermF)
+  int32_t nPasses;       // optimisation passes of the kept start
+  int32_t nStop;         // em_stop_reason_t of the kept start
 } em_k_metric_t;
 
+/** @brief Kind of an em_progress_t event. */
+typedef enum {
+  EM_PROGRESS_K_START = 0,  // optimisation of one K started
+  EM_PROGRESS_PASS = 1,     // one optimisation pass over all samples finished
+  EM_PROGRESS_K_DONE = 2    // K finished (including CH and permutations)
+} em_progress_kind_t;
+
+/** @brief Progress event reported by em_sweep_k_ex. */
+typedef struct {
+  int32_t kind;          // em_progress_kind_t
+  int32_t k;             // number of groups
+  int32_t pass;          // PASS: passes so far; K_DONE: total passes
+  int32_t moves;         // PASS: moves accepted in the pass; K_DONE: total
+  double rs;             // PASS/K_DONE: current RS statistic (%)
+  double elapsed_s;      // seconds since the sweep started
+  int32_t stop;          // K_DONE: em_stop_reason_t of the kept start
+} em_progress_t;
+
+/**
+ * @brief Progress callback for em_sweep_k_ex.
+ *
+ * Calls are serialised (never concurrent), but with `threads > 1` they come
+ * from worker threads and events of different K values interleave.
+ *
+ * @return 0 to continue, non-zero to cancel the sweep.
+ */
+typedef int (*em_progress_fn)(void *user, const em_progress_t *event);
+
+/** @brief Starting assignment of each K in em_sweep_k_ex. */
+typedef enum {
+  EM_WARM_START_NONE = 0,   // every K starts from em_initial_groups
+  EM_WARM_START_SPLIT = 1,  // K+1 starts from K's solution (em_split_groups)
+  EM_WARM_START_MERGE = 2   // K-1 starts from K's solution (em_merge_groups)
+} em_warm_start_t;
+
+/**
+ * @brief Execution options for em_sweep_k_ex.
+ *
+ * Initialise with em_sweep_opts_default before setting individual fields so
+ * new options keep their legacy defaults.
+ */
+typedef struct {
+  int32_t threads;       // worker threads for the K sweep (<= 1: serial)
+  em_progress_fn progress; // optional progress/cancel callback (NULL: none)
+  void *progress_user;   // passed to progress
+  int32_t warm_start;    // em_warm_start_t (EM_WARM_START_NONE: legacy)
+  int32_t starts;        // optimisation starts per K, best RS kept (<= 1: one)
+  double start_budget_s; // extra starts stop this long after the sweep began (<= 0: no limit)
+  int32_t move_strategy; // em_move_strategy_t for em_switch_groups_ex (0: legacy)
+  int32_t polish;        // non-zero: parallel rounds end with first-improvement passes
+  int32_t max_passes;    // passes per start (<= 0: until converged)
+  double max_seconds_per_k; // wall time for the starts of one K (<= 0: no limit)
+  double min_rs_gain;    // stop after a pass raising RS by less than this (<= 0: off)
+  int32_t stop_when_stale; // non-zero: stop at the first pass without moves
+} em_sweep_opts_t;
+
+/**
+ * @brief Fill `opts` with the legacy (serial) sweep settings.
+ *
+ * @param opts Options to initialise.
+ */
+void em_sweep_opts_default(em_sweep_opts_t *opts);
+
 /**
  * @brief Sweep through group sizes to find optimal k.
  *
@@ -54,6 +119,55 @@ int em_sweep_k(const double *data_in, int32_t rows, int32_t cols,
                int32_t *out_member1, double *out_group_means,
                int32_t *out_all_member1 /* optional: contiguous blocks [count * rows] */);
 
+/**
+ * @brief em_sweep_k with explicit execution options.
+ *
+ * Each K is optimised independently from its own initial grouping, so with
+ * `opts->threads > 1` the K values are spread across a worker pool. Results
+ * are gathered in K order, making `out_metrics`, `out_all_member1`, and the
+ * optimal-K outputs identical for any thread count.
+ *
+ * With `opts->warm_start` the K values are optimised one after another
+ * instead, upwards from `k_min` (SPLIT) or downwards from `k_max` (MERGE),
+ * each starting from the previous K's converged grouping; the first K (or
+ * one whose predecessor failed) starts from em_initial_groups. The threads
+ * then go to the extra starts and the permutation test. Results still do
+ * not depend on the thread count.
+ *
+ * With `opts->starts` = N > 1 every K is optimised N times: start 0 as
+ * above, starts 1..N-1 from em_seed_groups with a stream derived from
+ * `seed`, K and the start index. The start with the highest RS is kept
+ * (ties go to the lower start), so the legacy start is never beaten by a
+ * worse one. Threads left over after spreading the K values run the starts
+ * of one K in parallel. With `opts->start_budget_s` > 0 no extra start
+ * begins, and running extra starts are abandoned, once the sweep has run
+ * that long; start 0 always completes. Only a time budget makes the result
+ * depend on timing.
+ *
+ * With `opts->move_strategy` = EM_MOVE_PARALLEL_ROUNDS the threads left
+ * for each start score the moves of that start's K in parallel, so a sweep
+ * over a single large K still uses every core.
+ *
+ * `max_passes`, `min_rs_gain` and `stop_when_stale` go to every start's
+ * em_switch_groups_ex. With `max_seconds_per_k` > 0 the starts of one K
+ * share that much wall time, counted from the K's first start: extra starts
+ * that have not begun by then are skipped, running starts stop where they
+ * are. Each K's metric records the passes and em_stop_reason_t of the kept
+ * start, so a budget-limited K can be told from a converged one.
+ *
+ * @param opts Execution options (NULL: em_sweep_opts_default).
+ *
+ * @return Number of K values evaluated, -1 on failure (including an unknown
+ * `warm_start` or `move_strategy`), -3 if `metrics_cap` is smaller than the K range,
+ * EM_ERR_CANCELLED (-5) if the progress callback cancelled the sweep.
+ */
+int em_sweep_k_ex(const double *data_in, int32_t rows, int32_t cols,
+                  const double *Y, double tineq, int32_t k_min, int32_t k_max,
+                  int32_t *out_opt_k, int32_t perms_n, uint64_t seed,
+                  em_k_metric_t *out_metrics, int32_t metrics_cap,
+                  int32_t *out_member1, double *out_group_means,
+                  int32_t *out_all_member1, const em_sweep_opts_t *opts);
+
 // Helper: given a preprocessed working copy, compute totals and sweep
 int em_prepare_and_sweep(const double *data_proc, int32_t rows, int32_t cols,
                          int32_t k_min, int32_t k_max,
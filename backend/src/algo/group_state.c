@@ -0,0 +1,276 @@
+#include "group_state.h"
+
+#include <string.h>
+
+// Between-region inequality term for one group given its column sums.
+// Mirrors the inner loop of em_between_inequality for a single group.
+static double group_contrib(const double *sums, int32_t count, const double *Y,
+                            int32_t rows, int32_t cols) {
+  if (count <= 0) return 0.0;
+
+  double acc = 0.0;
+  for (int32_t c = 0; c < cols; c++) {
+    double Yj = Y[c];
+    if (Yj <= 0.0) continue;
+
+    double yr = sums[c] / Yj;
+    // Incremental sums can drift a hair below zero; treat as empty like yr == 0
+    if (yr <= 0.0) continue;
+
+    acc += Yj * (yr * log2(yr * (double)rows / (double)count));
+  }
+  return acc;
+}
+
+int em_group_state_init(em_group_state_t *st, const double *data, int32_t rows,
+                        int32_t cols, int32_t k, const double *Y,
+                        const int32_t *member1) {
+  if (!st || !data || !Y || !member1 || rows <= 0 || cols <= 0 || k <= 0) {
+    return -1;
+  }
+
+  memset(st, 0, sizeof(*st));
+  st->data = data;
+  st->Y = Y;
+  st->rows = rows;
+  st->cols = cols;
+  st->k = k;
+  st->group_sums = (double *)calloc((size_t)k * (size_t)cols, sizeof(double));
+  st->group_counts = (int32_t *)calloc((size_t)k, sizeof(int32_t));
+  st->group_contrib = (double *)calloc((size_t)k, sizeof(double));
+
+  if (!st->group_sums || !st->group_counts || !st->group_contrib) {
+    em_group_state_free(st);
+    return -2;
+  }
+
+  return em_group_state_resync(st, member1);
+}
+
+void em_group_state_free(em_group_state_t *st) {
+  if (!st) return;
+  free(st->group_sums);
+  free(st->group_counts);
+  free(st->group_contrib);
+  st->group_sums = NULL;
+  st->group_counts = NULL;
+  st->group_contrib = NULL;
+}
+
+int em_group_state_resync(em_group_state_t *st, const int32_t *member1) {
+  if (!st || !member1 || !st->group_sums) return -1;
+
+  size_t cols = (size_t)st->cols;
+  memset(st->group_sums, 0, (size_t)st->k * cols * sizeof(double));
+  memset(st->group_counts, 0, (size_t)st->k * sizeof(int32_t));
+
+  for (int32_t r = 0; r < st->rows; r++) {
+    int32_t g = member1[r];
+    if (g < 0 || g >= st->k) return -1;
+
+    double *sums = st->group_sums + (size_t)g * cols;
+    const double *row = st->data + (size_t)r * cols;
+    for (size_t c = 0; c < cols; c++) {
+      sums[c] += row[c];
+    }
+    st->group_counts[g]++;
+  }
+
+  st->empty_groups = 0;
+  for (int32_t g = 0; g < st->k; g++) {
+    if (st->group_counts[g] == 0) st->empty_groups++;
+    st->group_contrib[g] = group_contrib(st->group_sums + (size_t)g * cols,
+                                         st->group_counts[g], st->Y, st->rows,
+                                         st->cols);
+  }
+  return 0;
+}
+
+double em_group_state_bineq(const em_group_state_t *st) {
+  double total = 0.0;
+  for (int32_t g = 0; g < st->k; g++) total += st->group_contrib[g];
+  return total;
+}
+
+double em_group_state_scale(const em_group_state_t *st, double tineq) {
+  double scale = fabs(tineq);
+  for (int32_t g = 0; g < st->k; g++) scale += fabs(st->group_contrib[g]);
+  return scale;
+}
+
+int em_group_state_move_ok(const em_group_state_t *st, int32_t from, int32_t to) {
+  int32_t empty_after = st->empty_groups;
+  if (st->group_counts[to] == 0) empty_after--;
+  if (st->group_counts[from] == 1) empty_after++;
+  return empty_after == 0;
+}
+
+int em_group_state_delta(const em_group_state_t *st, int32_t sample,
+                         int32_t from, int32_t to, double *out_delta,
+                         double *out_from_contrib, double *out_to_contrib) {
+  if (!st || !out_delta || sample < 0 || sample >= st->rows || from < 0 ||
+      from >= st->k || to < 0 || to >= st->k || from == to) {
+    return -1;
+  }
+
+  const size_t cols = (size_t)st->cols;
+  const double *x = st->data + (size_t)sample * cols;
+  const double *sum_from = st->group_sums + (size_t)from * cols;
+  const double *sum_to = st->group_sums + (size_t)to * cols;
+  const double n_rows = (double)st->rows;
+  const int32_t n_from = st->group_counts[from] - 1;
+  const int32_t n_to = st->group_counts[to] + 1;
+
+  double c_from = 0.0, c_to = 0.0;
+  for (size_t c = 0; c < cols; c++) {
+    double Yj = st->Y[c];
+    if (Yj <= 0.0) continue;
+
+    if (n_from > 0) {
+      double yr = (sum_from[c] - x[c]) / Yj;
+      if (yr > 0.0) c_from += Yj * (yr * log2(yr * n_rows / (double)n_from));
+    }
+    double yr = (sum_to[c] + x[c]) / Yj;
+    if (yr > 0.0) c_to += Yj * (yr * log2(yr * n_rows / (double)n_to));
+  }
+
+  *out_delta = (c_from + c_to) - (st->group_contrib[from] + st->group_contrib[to]);
+  if (out_from_contrib) *out_from_contrib = c_from;
+  if (out_to_contrib) *out_to_contrib = c_to;
+  return 0;
+}
+
+int em_group_state_best_move(const em_group_state_t *st, int32_t sample,
+                             int32_t from, int32_t *out_to, double *out_delta,
+                             double *out_from_contrib, double *out_to_contrib) {
+  if (!st || !out_to || !out_delta || sample < 0 || sample >= st->rows ||
+      from < 0 || from >= st->k) {
+    return -1;
+  }
+
+  const size_t cols = (size_t)st->cols;
+  const double *x = st->data + (size_t)sample * cols;
+  const double *sum_from = st->group_sums + (size_t)from * cols;
+  const double n_rows = (double)st->rows;
+  const int32_t n_from = st->group_counts[from] - 1;
+
+  double c_from = 0.0;
+  if (n_from > 0) {
+    for (size_t c = 0; c < cols; c++) {
+      double Yj = st->Y[c];
+      if (Yj <= 0.0) continue;
+      double yr = (sum_from[c] - x[c]) / Yj;
+      if (yr > 0.0) c_from += Yj * (yr * log2(yr * n_rows / (double)n_from));
+    }
+  }
+  const double removal = c_from - st->group_contrib[from];
+
+  int32_t best = -1;
+  double best_delta = 0.0, best_contrib = 0.0;
+  for (int32_t to = 0; to < st->k; to++) {
+    if (to == from || !em_group_state_move_ok(st, from, to)) continue;
+
+    const double *sum_to = st->group_sums + (size_t)to * cols;
+    const int32_t n_to = st->group_counts[to] + 1;
+    double c_to = 0.0;
+    for (size_t c = 0; c < cols; c++) {
+      double Yj = st->Y[c];
+      if (Yj <= 0.0) continue;
+      double yr = (sum_to[c] + x[c]) / Yj;
+      if (yr > 0.0) c_to += Yj * (yr * log2(yr * n_rows / (double)n_to));
+    }
+
+    double delta = removal + (c_to - st->group_contrib[to]);
+    if (best < 0 || delta > best_delta) {
+      best = to;
+      best_delta = delta;
+      best_contrib = c_to;
+    }
+  }
+
+  *out_to = best;
+  *out_delta = best_delta;
+  if (out_from_contrib) *out_from_contrib = c_from;
+  if (out_to_contrib) *out_to_contrib = best_contrib;
+  return 0;
+}
+
+int em_group_state_merge_delta(const em_group_state_t *st, int32_t a, int32_t b,
+                               double *out_delta) {
+  if (!st || !out_delta || a < 0 || a >= st->k || b < 0 || b >= st->k || a == b) {
+    return -1;
+  }
+
+  const size_t cols = (size_t)st->cols;
+  const double *sum_a = st->group_sums + (size_t)a * cols;
+  const double *sum_b = st->group_sums + (size_t)b * cols;
+  const int32_t n = st->group_counts[a] + st->group_counts[b];
+
+  double merged = 0.0;
+  if (n > 0) {
+    for (size_t c = 0; c < cols; c++) {
+      double Yj = st->Y[c];
+      if (Yj <= 0.0) continue;
+
+      double yr = (sum_a[c] + sum_b[c]) / Yj;
+      if (yr > 0.0) merged += Yj * (yr * log2(yr * (double)st->rows / (double)n));
+    }
+  }
+
+  *out_delta = merged - (st->group_contrib[a] + st->group_contrib[b]);
+  return 0;
+}
+
+int em_group_state_apply(em_group_state_t *st, int32_t *member1, int32_t sample,
+                         int32_t from, int32_t to, double from_contrib,
+                         double to_contrib, double *out_group_means) {
+  if (!st || !member1 || sample < 0 || sample >= st->rows || from < 0 ||
+      from >= st->k || to < 0 || to >= st->k || from == to) {
+    return -1;
+  }
+
+  const size_t cols = (size_t)st->cols;
+  const double *x = st->data + (size_t)sample * cols;
+  double *sum_from = st->group_sums + (size_t)from * cols;
+  double *sum_to = st->group_sums + (size_t)to * cols;
+
+  if (st->group_counts[to] == 0) st->empty_groups--;
+  st->group_counts[from]--;
+  st->group_counts[to]++;
+  if (st->group_counts[from] == 0) st->empty_groups++;
+
+  for (size_t c = 0; c < cols; c++) {
+    sum_from[c] -= x[c];
+    sum_to[c] += x[c];
+  }
+  st->group_contrib[from] = from_contrib;
+  st->group_contrib[to] = to_contrib;
+  member1[sample] = to;
+
+  if (out_group_means) {
+    double *mean_from = out_group_means + (size_t)from * cols;
+    double *mean_to = out_group_means + (size_t)to * cols;
+    int32_t n_from = st->group_counts[from];
+    int32_t n_to = st->group_counts[to];
+    for (size_t c = 0; c < cols; c++) {
+      mean_from[c] = n_from > 0 ? sum_from[c] / n_from : 0.0;
+      mean_to[c] = sum_to[c] / n_to;
+    }
+  }
+  return 0;
+}
+
+int em_group_state_means(const em_group_state_t *st, double *out_group_means) {
+  if (!st || !out_group_means) return -1;
+
+  const size_t cols = (size_t)st->cols;
+  for (int32_t g = 0; g < st->k; g++) {
+    if (st->group_counts[g] == 0) return -3;
+    const double *sums = st->group_sums + (size_t)g * cols;
+    double *means = out_group_means + (size_t)g * cols;
+    for (size_t c = 0; c < cols; c++) {
+      means[c] = sums[c] / st->group_counts[g];
+    }
+  }
+  return 0;
+}
@@ -1,6 +1,10 @@
 #include "grouping.h"
+#include "group_state.h"
+#include "parallel.h"
+#include "util.h"
 
 #include <stddef.h>
+#include <string.h>
 
 // OWNER: Will
 // VB6 mapping: SetGroups → em_set_groups
@@ -51,6 +55,193 @@ int em_initial_groups(int32_t rows, int32_t k, int32_t *member1) {
   return 0;
 }
 
+static double squared_distance(const double *a, const double *b, int32_t cols) {
+  double d = 0.0;
+  for (int32_t c = 0; c < cols; c++) {
+    double diff = a[c] - b[c];
+    d += diff * diff;
+  }
+  return d;
+}
+
+int em_split_groups(const double *data, int32_t rows, int32_t cols, int32_t k,
+                    const double *Y, const int32_t *member1, int32_t *out_member1) {
+  if (!data || !Y || !member1 || !out_member1 || rows <= 0 || cols <= 0 || k <= 0) {
+    return -1;
+  }
+
+  em_group_state_t st;
+  int rc = em_group_state_init(&st, data, rows, cols, k, Y, member1);
+  if (rc != 0) return rc;
+
+  double *within = (double *)calloc((size_t)k, sizeof(double));
+  double *mean = (double *)malloc((size_t)cols * sizeof(double));
+  if (!within || !mean) {
+    free(within);
+    free(mean);
+    em_group_state_free(&st);
+    return -2;
+  }
+
+  // Within-group inequality: sum of x * log2(n_g * x / group_sum) per group
+  for (int32_t r = 0; r < rows; r++) {
+    int32_t g = member1[r];
+    const double *row = data + (size_t)r * (size_t)cols;
+    const double *sums = st.group_sums + (size_t)g * (size_t)cols;
+    for (int32_t c = 0; c < cols; c++) {
+      if (row[c] > 0.0 && sums[c] > 0.0) {
+        within[g] += row[c] * log2((double)st.group_counts[g] * row[c] / sums[c]);
+      }
+    }
+  }
+
+  int32_t split = -1;
+  for (int32_t g = 0; g < k; g++) {
+    if (st.group_counts[g] >= 2 && (split < 0 || within[g] > within[split])) split = g;
+  }
+
+  if (split < 0) {
+    rc = -3;
+  } else {
+    for (int32_t c = 0; c < cols; c++) {
+      mean[c] = st.group_sums[(size_t)split * (size_t)cols + (size_t)c] / st.group_counts[split];
+    }
+
+    int32_t seed_a = -1, seed_b = -1;
+    double far = -1.0;
+    for (int32_t r = 0; r < rows; r++) {
+      if (member1[r] != split) continue;
+      double d = squared_distance(data + (size_t)r * (size_t)cols, mean, cols);
+      if (d > far) { far = d; seed_a = r; }
+    }
+    const double *a = data + (size_t)seed_a * (size_t)cols;
+    far = -1.0;
+    for (int32_t r = 0; r < rows; r++) {
+      if (member1[r] != split || r == seed_a) continue;
+      double d = squared_distance(data + (size_t)r * (size_t)cols, a, cols);
+      if (d > far) { far = d; seed_b = r; }
+    }
+    const double *b = data + (size_t)seed_b * (size_t)cols;
+
+    if (out_member1 != member1) {
+      memcpy(out_member1, member1, (size_t)rows * sizeof(int32_t));
+    }
+    for (int32_t r = 0; r < rows; r++) {
+      if (out_member1[r] != split) continue;
+      const double *row = data + (size_t)r * (size_t)cols;
+      if (r == seed_b || squared_distance(row, b, cols) < squared_distance(row, a, cols)) {
+        out_member1[r] = k;
+      }
+    }
+  }
+
+  free(within);
+  free(mean);
+  em_group_state_free(&st);
+  return rc;
+}
+
+int em_merge_groups(const double *data, int32_t rows, int32_t cols, int32_t k,
+                    const double *Y, const int32_t *member1, int32_t *out_member1) {
+  if (!data || !Y || !member1 || !out_member1 || rows <= 0 || cols <= 0 || k < 2) {
+    return -1;
+  }
+
+  em_group_state_t st;
+  int rc = em_group_state_init(&st, data, rows, cols, k, Y, member1);
+  if (rc != 0) return rc;
+
+  int32_t keep = 0, drop = 1;
+  double best = -INFINITY;
+  for (int32_t a = 0; a < k; a++) {
+    for (int32_t b = a + 1; b < k; b++) {
+      double delta = 0.0;
+      em_group_state_merge_delta(&st, a, b, &delta);
+      if (delta > best) {
+        best = delta;
+        keep = a;
+        drop = b;
+      }
+    }
+  }
+  em_group_state_free(&st);
+
+  for (int32_t r = 0; r < rows; r++) {
+    int32_t g = member1[r];
+    out_member1[r] = g == drop ? keep : (g > drop ? g - 1 : g);
+  }
+  return 0;
+}
+
+// splitmix64 stream for em_seed_groups
+static uint64_t next_random(uint64_t *state) {
+  uint64_t z = (*state += UINT64_C(0x9E3779B97F4A7C15));
+  z = (z ^ (z >> 30)) * UINT64_C(0xBF58476D1CE4E5B9);
+  z = (z ^ (z >> 27)) * UINT64_C(0x94D049BB133111EB);
+  return z ^ (z >> 31);
+}
+
+int em_seed_groups(const double *data, int32_t rows, int32_t cols, int32_t k,
+                   uint64_t seed, int32_t *member1) {
+  if (!data || !member1 || rows <= 0 || cols <= 0 || k <= 0 || k > rows) {
+    return -1;
+  }
+
+  int32_t *centres = (int32_t *)malloc((size_t)k * sizeof(int32_t));
+  double *nearest = (double *)malloc((size_t)rows * sizeof(double)); // squared distance
+  unsigned char *is_centre = (unsigned char *)calloc((size_t)rows, 1);
+  if (!centres || !nearest || !is_centre) {
+    free(centres);
+    free(nearest);
+    free(is_centre);
+    return -2;
+  }
+
+  uint64_t state = seed;
+  for (int32_t g = 0; g < k; g++) {
+    int32_t pick = -1;
+    if (g == 0) {
+      pick = (int32_t)(next_random(&state) % (uint64_t)rows);
+    } else {
+      double total = 0.0;
+      for (int32_t r = 0; r < rows; r++) total += nearest[r];
+      if (total > 0.0) {
+        double u = (double)(next_random(&state) >> 11) * 0x1.0p-53 * total;
+        double acc = 0.0;
+        for (int32_t r = 0; r < rows; r++) {
+          if (nearest[r] <= 0.0) continue;
+          pick = r;
+          acc += nearest[r];
+          if (acc > u) break;
+        }
+      } else {
+        // Every row coincides with a centre: take any row not used yet
+        int32_t r = (int32_t)(next_random(&state) % (uint64_t)rows);
+        while (is_centre[r]) r = (r + 1) % rows;
+        pick = r;
+      }
+    }
+    centres[g] = pick;
+    is_centre[pick] = 1;
+
+    const double *c = data + (size_t)pick * (size_t)cols;
+    for (int32_t r = 0; r < rows; r++) {
+      double d = squared_distance(data + (size_t)r * (size_t)cols, c, cols);
+      if (g == 0 || d < nearest[r]) {
+        nearest[r] = d;
+        member1[r] = g;
+      }
+    }
+  }
+  // A centre stays in its own group even when it duplicates another centre
+  for (int32_t g = 0; g < k; g++) member1[centres[g]] = g;
+
+  free(centres);
+  free(nearest);
+  free(is_centre);
+  return 0;
+}
+
 // OWNER: Will
 // VB6 mapping: BETWEENinquality → em_between_inequality
 int em_between_inequality(const double *data, int32_t rows, int32_t cols,
@@ -207,16 +398,112 @@ int em_optimise_groups(const double *data, int32_t rows, int32_t cols,
   return 0;
 }
 
+void em_switch_opts_default(em_switch_opts_t *opts) {
+  if (!opts) return;
+  memset(opts, 0, sizeof(*opts));
+}
+
+// Best move of one sample in a parallel round.
+typedef struct {
+  int32_t sample;
+  int32_t to;     // -1: no move allowed
+  double delta;
+} em_move_candidate_t;
+
+typedef struct {
+  const em_group_state_t *st;
+  const int32_t *member1;
+  em_move_candidate_t *cand; // [rows]
+} em_round_ctx_t;
+
+// Samples scored per task of a parallel round
+#define EM_ROUND_BLOCK 256
+
+static void score_block(void *arg, int32_t task, int32_t worker) {
+  (void)worker; // every task writes its own candidates
+  em_round_ctx_t *ctx = (em_round_ctx_t *)arg;
+  int32_t begin = task * EM_ROUND_BLOCK;
+  int32_t end = begin + EM_ROUND_BLOCK < ctx->st->rows ? begin + EM_ROUND_BLOCK : ctx->st->rows;
+  for (int32_t s = begin; s < end; s++) {
+    em_move_candidate_t *c = &ctx->cand[s];
+    c->sample = s;
+    em_group_state_best_move(ctx->st, s, ctx->member1[s], &c->to, &c->delta, NULL, NULL);
+  }
+}
+
+// Largest gain first; equal gains in sample order
+static int compare_candidates(const void *a, const void *b) {
+  const em_move_candidate_t *x = (const em_move_candidate_t *)a;
+  const em_move_candidate_t *y = (const em_move_candidate_t *)b;
+  if (x->delta != y->delta) return x->delta > y->delta ? -1 : 1;
+  return (x->sample > y->sample) - (x->sample < y->sample);
+}
+
+// One Jacobi-style round; returns the number of moves committed.
+static int parallel_round(em_group_state_t *st, int32_t *member1,
+                          em_move_candidate_t *cand, int32_t threads, double tol,
+                          double *out_group_means) {
+  em_round_ctx_t ctx = {st, member1, cand};
+  em_parallel_for((st->rows + EM_ROUND_BLOCK - 1) / EM_ROUND_BLOCK, threads,
+                  score_block, &ctx);
+
+  int32_t n = 0;
+  for (int32_t s = 0; s < st->rows; s++) {
+    if (cand[s].to >= 0 && cand[s].delta > tol) cand[n++] = cand[s];
+  }
+  qsort(cand, (size_t)n, sizeof(*cand), compare_candidates);
+
+  // Earlier commits change the group sums, so every move is re-scored
+  // (O(cols)) before it is applied
+  int moves = 0;
+  for (int32_t i = 0; i < n; i++) {
+    int32_t sample = cand[i].sample, from = member1[sample], to = cand[i].to;
+    if (!em_group_state_move_ok(st, from, to)) continue;
+    double delta = 0.0, from_contrib = 0.0, to_contrib = 0.0;
+    em_group_state_delta(st, sample, from, to, &delta, &from_contrib, &to_contrib);
+    if (delta > tol) {
+      em_group_state_apply(st, member1, sample, from, to, from_contrib, to_contrib,
+                           out_group_means);
+      moves++;
+    }
+  }
+  return moves;
+}
+
 // OWNER: Will
 // VB6 mapping: SWITCHgroup → em_switch_groups
 int em_switch_groups(const double *data, int32_t rows, int32_t cols, int32_t k,
                      double tineq, const double *Y, int32_t min_groups,
                      int32_t *member1, double *out_bineq, double *out_rs_stat,
                      int32_t *out_ixout, double *out_group_means) {
+  return em_switch_groups_ex(data, rows, cols, k, tineq, Y, min_groups, member1,
+                             out_bineq, out_rs_stat, out_ixout, out_group_means,
+                             NULL);
+}
+
+int em_switch_groups_ex(const double *data, int32_t rows, int32_t cols, int32_t k,
+                        double tineq, const double *Y, int32_t min_groups,
+                        int32_t *member1, double *out_bineq, double *out_rs_stat,
+                        int32_t *out_ixout, double *out_group_means,
+                        const em_switch_opts_t *opts) {
+  (void)min_groups; // unused parameter (reserved for future constraints)
   if (!data || !member1 || !out_group_means || rows <= 0 || cols <= 0 ||
       k <= 0) {
     return -1;
   }
+  em_switch_opts_t defaults;
+  if (!opts) {
+    em_switch_opts_default(&defaults);
+    opts = &defaults;
+  }
+  if (opts->strategy < EM_MOVE_FIRST_IMPROVEMENT ||
+      opts->strategy > EM_MOVE_PARALLEL_ROUNDS) {
+    return -1;
+  }
+  int32_t strategy = opts->strategy;
+  int32_t pass = 0, total_moves = 0;
+  int32_t stop = -1; // em_stop_reason_t once a budget or tolerance ends the loop
+  double deadline = opts->max_seconds > 0.0 ? em_monotonic_seconds() + opts->max_seconds : 0.0;
 
   // int32_t calculation_count = 0;
   // Tracks how many different group assignment combinations have been evaluated
@@ -224,58 +511,173 @@ int em_switch_groups(const double *data, int32_t rows, int32_t cols, int32_t k,
   int restart_count = 0;
   int improvements_found;
 
+  em_group_state_t st;
+  if (em_group_state_init(&st, data, rows, cols, k, Y, member1) != 0) {
+    return -1;
+  }
+  em_move_candidate_t *cand = NULL;
+  if (strategy == EM_MOVE_PARALLEL_ROUNDS) {
+    cand = (em_move_candidate_t *)malloc((size_t)rows * sizeof(*cand));
+    if (!cand) {
+      em_group_state_free(&st);
+      return -1;
+    }
+  }
+
   // Initialize outputs to reflect the current assignment
   double current_bineq = 0.0, current_rs = 0.0; int current_ix = 0;
   em_between_inequality(data, rows, cols, k, member1, Y, &current_bineq);
   em_rs_stat(tineq, current_bineq, &current_rs, &current_ix);
-  if (out_bineq) *out_bineq = current_bineq;
-  if (out_rs_stat) *out_rs_stat = current_rs;
-  if (out_ixout) *out_ixout = current_ix;
+  // current_bineq/current_rs hold the full-rescan values for the current
+  // assignment only while exact_valid is set; delta-accepted moves clear it.
+  int exact_valid = 1;
+
+  // With tineq <= 0 the RS statistic is constant, so the legacy loop rejects
+  // every trial; skip straight to the final bookkeeping.
+  if (current_ix) restart_count = 3;
+  double last_rs = current_rs;
 
   do {
     improvements_found = 0;
 
-    for (int sample = 0; sample < rows; sample++) {
-      // Baseline RS for current assignment of this sample
-      double best_stat_sample = current_rs;
+    // Drop any drift accumulated by incremental updates during the last pass
+    em_group_state_resync(&st, member1);
+    double tol = EM_DELTA_REL_TOL * em_group_state_scale(&st, tineq);
+
+    // current_ix: RS is constant, so the delta strategies have nothing to gain
+    if (strategy == EM_MOVE_PARALLEL_ROUNDS && !current_ix) {
+      improvements_found = parallel_round(&st, member1, cand, opts->threads, tol,
+                                          out_group_means);
+      if (improvements_found > 0) exact_valid = 0;
+    }
+
+    for (int sample = 0; strategy != EM_MOVE_PARALLEL_ROUNDS && sample < rows; sample++) {
+      if (deadline > 0.0 && (sample & 255) == 255 && em_monotonic_seconds() > deadline) {
+        stop = EM_STOP_TIME;
+        break;
+      }
+      if (strategy == EM_MOVE_BEST_IMPROVEMENT) {
+        int32_t from = member1[sample], to = -1;
+        double delta = 0.0, from_contrib = 0.0, to_contrib = 0.0;
+        em_group_state_best_move(&st, sample, from, &to, &delta, &from_contrib,
+                                 &to_contrib);
+        if (to >= 0 && delta > tol && !current_ix) {
+          em_group_state_apply(&st, member1, sample, from, to, from_contrib,
+                               to_contrib, out_group_means);
+          exact_valid = 0;
+          improvements_found++;
+        }
+        continue;
+      }
 
       for (int target_group = 0; target_group < k; target_group++) {
         int original_group = member1[sample]; // capture current assignment each attempt
         if (original_group == target_group) continue;
 
-        member1[sample] = target_group;
+        // Legacy em_optimise_groups fails (and the move is reverted) whenever
+        // the trial assignment leaves a group empty.
+        if (!em_group_state_move_ok(&st, original_group, target_group)) continue;
         // calculation_count++;
 
-        double trial_bineq = 0.0, trial_rs = 0.0; int trial_ix = 0;
-        em_between_inequality(data, rows, cols, k, member1, Y, &trial_bineq);
-        em_rs_stat(tineq, trial_bineq, &trial_rs, &trial_ix);
-
-        int iter_count = 0;
-        em_optimise_groups(data, rows, cols, k, trial_rs, &best_stat_sample,
-                           member1, sample, original_group, &iter_count,
-                           min_groups, out_group_means);
-
-        if (iter_count > 0) {
-          // Accepted: update current outputs to accepted state
-          current_bineq = trial_bineq;
-          current_rs = trial_rs;
-          current_ix = trial_ix;
-          if (out_bineq) *out_bineq = current_bineq;
-          if (out_rs_stat) *out_rs_stat = current_rs;
-          if (out_ixout) *out_ixout = current_ix;
-          improvements_found++;
+        double delta = 0.0, from_contrib = 0.0, to_contrib = 0.0;
+        em_group_state_delta(&st, sample, original_group, target_group, &delta,
+                             &from_contrib, &to_contrib);
+
+        int accepted;
+        if (delta > tol) {
+          accepted = 1;
+          exact_valid = 0;
+        } else if (delta < -tol) {
+          accepted = 0;
         } else {
-          // Rejected: ensure member1 was reverted inside em_optimise_groups; keep outputs as current
-          if (member1[sample] != original_group) member1[sample] = original_group;
+          // Near-tie: settle it with the same full evaluation the legacy
+          // implementation used so accept/reject decisions stay identical.
+          if (!exact_valid) {
+            em_between_inequality(data, rows, cols, k, member1, Y, &current_bineq);
+            em_rs_stat(tineq, current_bineq, &current_rs, &current_ix);
+            exact_valid = 1;
+          }
+          member1[sample] = target_group;
+          double trial_bineq = 0.0, trial_rs = 0.0; int trial_ix = 0;
+          em_between_inequality(data, rows, cols, k, member1, Y, &trial_bineq);
+          em_rs_stat(tineq, trial_bineq, &trial_rs, &trial_ix);
+          member1[sample] = original_group;
+
+          // Accept only if RS improves over the current assignment's stat (VB: olstat)
+          accepted = trial_rs > current_rs;
+          if (accepted) {
+            current_bineq = trial_bineq;
+            current_rs = trial_rs;
+            current_ix = trial_ix;
+          }
+        }
+
+        if (accepted) {
+          // VB6 mapping: OPTIMALgroup — group means updated in place for the
+          // two affected groups rather than rebuilt from every row.
+          em_group_state_apply(&st, member1, sample, original_group,
+                               target_group, from_contrib, to_contrib,
+                               out_group_means);
+          improvements_found++;
         }
       }
     }
 
-    if (improvements_found == 0) {
-      restart_count++;
+    if (improvements_found == 0 && stop < 0) {
+      // The legacy loop ends after three passes without moves (VB6); the
+      // other strategies stop at the first, already a local optimum
+      if (strategy == EM_MOVE_PARALLEL_ROUNDS && opts->polish) {
+        strategy = EM_MOVE_FIRST_IMPROVEMENT;
+      } else if (strategy == EM_MOVE_FIRST_IMPROVEMENT && !opts->stop_when_stale) {
+        restart_count++;
+      } else {
+        restart_count = 3;
+      }
+    }
+
+    pass++;
+    total_moves += improvements_found;
+    double pass_rs = 0.0; int pass_ix = 0;
+    em_rs_stat(tineq, em_group_state_bineq(&st), &pass_rs, &pass_ix);
+    if (stop < 0 && restart_count < 3) {
+      if (opts->min_rs_gain > 0.0 && improvements_found > 0 &&
+          pass_rs - last_rs < opts->min_rs_gain) {
+        stop = EM_STOP_MIN_GAIN;
+      } else if (opts->max_passes > 0 && pass >= opts->max_passes) {
+        stop = EM_STOP_MAX_PASSES;
+      } else if (deadline > 0.0 && em_monotonic_seconds() > deadline) {
+        stop = EM_STOP_TIME;
+      }
     }
+    last_rs = pass_rs;
+    if (opts->on_pass) {
+      if (opts->on_pass(opts->user, k, pass, improvements_found, pass_rs) != 0) {
+        free(cand);
+        em_group_state_free(&st);
+        return EM_ERR_CANCELLED;
+      }
+    }
+
+  } while (restart_count < 3 && stop < 0);
 
-  } while (restart_count < 3);
+  // Report the same figures a fresh full evaluation of the final assignment gives
+  if (!exact_valid) {
+    em_between_inequality(data, rows, cols, k, member1, Y, &current_bineq);
+    em_rs_stat(tineq, current_bineq, &current_rs, &current_ix);
+  }
+  em_group_state_resync(&st, member1);
+  em_group_state_means(&st, out_group_means);
+  em_group_state_free(&st);
+  free(cand);
+
+  if (out_bineq) *out_bineq = current_bineq;
+  if (out_rs_stat) *out_rs_stat = current_rs;
+  if (out_ixout) *out_ixout = current_ix;
+  if (opts->stats) {
+    opts->stats->passes = pass;
+    opts->stats->moves = total_moves;
+    opts->stats->stop = stop < 0 ? EM_STOP_CONVERGED : stop;
+  }
 
   // VB original: If intmed = 1 Then Call BESTgroup(statmx, ng, jobs, member1())
   // Omitted - pure logging function, no computational impact
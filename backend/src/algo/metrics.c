@@ -1,4 +1,5 @@
 #include "metrics.h"
+#include "parallel.h"
 
 // OWNER: Noah line 1106 in Form1
 // VB6 mapping: TOTALinequality → em_total_inequality
@@ -126,46 +127,8 @@ int em_ch_stat(const double *class_table, int32_t samples, int32_t classes, int3
 
     // for if permutations are requested
     if (perms_n > 0) {
-        double perm_sum = 0.0;
-        int perm_better = 0;
-        double *perm_data = calloc((size_t)samples * (size_t)(classes + 1), sizeof(double));
-        if (!perm_data) goto cleanup;
-
-        memcpy(perm_data, class_table, (size_t)samples * (size_t)(classes + 1) * sizeof(double));
-        // Deterministic local RNG (xorshift64) seeded by caller
-        if (seed == 0) seed = 0x9E3779B97F4A7C15ull; // avoid zero state
-        uint64_t rng_state = seed;
-        #define EM_NEXT_U64(s) ( \
-            (s ^= (s << 13)), \
-            (s ^= (s >> 7)), \
-            (s ^= (s << 17)), \
-            s )
-
-        for (int p = 0; p < perms_n; p++) {
-            for (j = 0; j < classes; j++) {
-                for (i = 0; i < samples; i++) {
-                    int idx1 = i;
-                    rng_state = EM_NEXT_U64(rng_state);
-                    int idx2 = (int)(rng_state % (uint64_t)samples);
-                    double tmp = perm_data[idx1 * (classes + 1) + j + 1];
-                    perm_data[idx1 * (classes + 1) + j + 1] = perm_data[idx2 * (classes + 1) + j + 1];
-                    perm_data[idx2 * (classes + 1) + j + 1] = tmp;
-                }
-            }
-
-            double ch_tmp, sst_tmp, sse_tmp;
-            double dummy;
-            em_ch_stat(perm_data, samples, classes, k, 0, 0, &ch_tmp, &sst_tmp, &sse_tmp, &dummy, &dummy);
-
-            perm_sum += ch_tmp;
-            if (ch_tmp > *out_CH) perm_better++;
-        }
-
-        *out_perm_mean = perm_sum / perms_n;
-        *out_perm_p = (double)perm_better / perms_n;
-
-        #undef EM_NEXT_U64
-        free(perm_data);
+        em_ch_permutation_test(class_table, samples, classes, k, *out_CH,
+                               perms_n, seed, 1, out_perm_mean, out_perm_p);
     } else {
         *out_perm_mean = 0;
         *out_perm_p = 0;
@@ -181,6 +144,155 @@ cleanup:
 }
 
 
+// splitmix64: seeds an independent stream per permutation so results do not
+// depend on how permutations are spread over threads
+static uint64_t em_splitmix64(uint64_t *state) {
+    uint64_t z = (*state += UINT64_C(0x9E3779B97F4A7C15));
+    z = (z ^ (z >> 30)) * UINT64_C(0xBF58476D1CE4E5B9);
+    z = (z ^ (z >> 27)) * UINT64_C(0x94D049BB133111EB);
+    return z ^ (z >> 31);
+}
+
+typedef struct {
+    const double *centred;  // column-major [classes * samples], column mean removed
+    const int32_t *labels;  // [samples]
+    const double *n_k;      // group sizes [k]
+    int32_t samples;
+    int32_t classes;
+    int32_t k;
+    double sstt;            // invariant under within-column shuffles
+    uint64_t seed;
+    double *perm_ch;        // [perms_n]
+    double **ws_vals;       // per-worker [samples]
+    double **ws_sums;       // per-worker [k]
+} em_ch_perm_ctx_t;
+
+static void ch_perm_one(void *arg, int32_t perm, int32_t worker) {
+    em_ch_perm_ctx_t *ctx = (em_ch_perm_ctx_t *)arg;
+    const int32_t n = ctx->samples, k = ctx->k;
+    double *vals = ctx->ws_vals[worker];
+    double *sums = ctx->ws_sums[worker];
+    uint64_t state = ctx->seed ^ ((uint64_t)(perm + 1) * UINT64_C(0xD1B54A32D192ED03));
+    double ssb = 0.0;
+
+    for (int32_t j = 0; j < ctx->classes; j++) {
+        memcpy(vals, ctx->centred + (size_t)j * (size_t)n, (size_t)n * sizeof(double));
+        memset(sums, 0, (size_t)k * sizeof(double));
+
+        // Fisher-Yates shuffle of this column, accumulating group sums as each
+        // position is finalised
+        for (int32_t i = n - 1; i > 0; i--) {
+            int32_t m = (int32_t)(em_splitmix64(&state) % (uint64_t)(i + 1));
+            double tmp = vals[i];
+            vals[i] = vals[m];
+            vals[m] = tmp;
+            sums[ctx->labels[i]] += vals[i];
+        }
+        sums[ctx->labels[0]] += vals[0];
+
+        // Centred data: between-group SS for the column is sum_g S_g^2 / n_g
+        for (int32_t g = 0; g < k; g++) {
+            ssb += sums[g] * sums[g] / ctx->n_k[g];
+        }
+    }
+
+    double r = ssb / ctx->sstt;
+    if (r >= 1.0) {
+        ctx->perm_ch[perm] = INFINITY;
+    } else {
+        ctx->perm_ch[perm] = (r / (k - 1)) / ((1 - r) / (n - k));
+    }
+}
+
+int em_ch_permutation_test(const double *class_table, int32_t samples, int32_t classes,
+                           int32_t k, double ch_observed, int32_t perms_n, uint64_t seed,
+                           int32_t n_threads, double *out_perm_mean, double *out_perm_p)
+{
+    if (!class_table || !out_perm_mean || !out_perm_p || samples <= 0 ||
+        classes <= 0 || k <= 1 || perms_n <= 0) return -1;
+
+    *out_perm_mean = 0;
+    *out_perm_p = 0;
+
+    const size_t n = (size_t)samples, stride = (size_t)classes + 1;
+    int32_t workers = em_parallel_workers(perms_n, n_threads);
+    int rc = 0;
+
+    em_ch_perm_ctx_t ctx;
+    memset(&ctx, 0, sizeof(ctx));
+    double *centred = malloc(n * (size_t)classes * sizeof(double));
+    int32_t *labels = malloc(n * sizeof(int32_t));
+    double *n_k = calloc((size_t)k, sizeof(double));
+    ctx.perm_ch = malloc((size_t)perms_n * sizeof(double));
+    ctx.ws_vals = calloc((size_t)workers, sizeof(double *));
+    ctx.ws_sums = calloc((size_t)workers, sizeof(double *));
+    if (!centred || !labels || !n_k || !ctx.perm_ch || !ctx.ws_vals || !ctx.ws_sums) {
+        rc = -2;
+        goto done;
+    }
+    for (int32_t w = 0; w < workers; w++) {
+        ctx.ws_vals[w] = malloc(n * sizeof(double));
+        ctx.ws_sums[w] = malloc((size_t)k * sizeof(double));
+        if (!ctx.ws_vals[w] || !ctx.ws_sums[w]) { rc = -2; goto done; }
+    }
+
+    for (size_t i = 0; i < n; i++) {
+        int32_t g = (int32_t)class_table[i * stride];
+        if (g < 0 || g >= k) { rc = -1; goto done; }
+        labels[i] = g;
+        n_k[g] += 1.0;
+    }
+    for (int32_t g = 0; g < k; g++) {
+        // Empty group: CH is undefined for every permutation as well
+        if (n_k[g] == 0.0) goto done;
+    }
+
+    // Transpose to column-major and remove column means once; SST does not
+    // change when values are shuffled within a column
+    double sstt = 0.0;
+    for (int32_t j = 0; j < classes; j++) {
+        double *col = centred + (size_t)j * n;
+        double mean = 0.0;
+        for (size_t i = 0; i < n; i++) {
+            col[i] = class_table[i * stride + (size_t)j + 1];
+            mean += col[i];
+        }
+        mean /= (double)samples;
+        for (size_t i = 0; i < n; i++) {
+            col[i] -= mean;
+            sstt += col[i] * col[i];
+        }
+    }
+    if (sstt <= 0.0) goto done;
+
+    ctx.centred = centred;
+    ctx.labels = labels;
+    ctx.n_k = n_k;
+    ctx.samples = samples;
+    ctx.classes = classes;
+    ctx.k = k;
+    ctx.sstt = sstt;
+    ctx.seed = seed ? seed : 0x9E3779B97F4A7C15ull; // avoid zero state
+    em_parallel_for(perms_n, workers, ch_perm_one, &ctx);
+
+    // Reduce in permutation order so the mean is identical for any thread count
+    double perm_sum = 0.0;
+    int perm_better = 0;
+    for (int32_t p = 0; p < perms_n; p++) {
+        perm_sum += ctx.perm_ch[p];
+        if (ctx.perm_ch[p] > ch_observed) perm_better++;
+    }
+    *out_perm_mean = perm_sum / perms_n;
+    *out_perm_p = (double)perm_better / perms_n;
+
+done:
+    if (ctx.ws_vals) { for (int32_t w = 0; w < workers; w++) free(ctx.ws_vals[w]); }
+    if (ctx.ws_sums) { for (int32_t w = 0; w < workers; w++) free(ctx.ws_sums[w]); }
+    free(ctx.ws_vals); free(ctx.ws_sums); free(ctx.perm_ch);
+    free(centred); free(labels); free(n_k);
+    return rc;
+}
+
 // OWNER: Noah line 810 in Form1
 // VB6 mapping: Z computation inside RITE → em_group_zstats
 int em_group_zstats(const double *group_means, const int32_t *n_k, int32_t k,
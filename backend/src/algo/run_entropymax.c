@@ -4,6 +4,7 @@
 #ifndef _GNU_SOURCE
 #define _GNU_SOURCE
 #endif
+#include <signal.h>
 #include <stdio.h>
 #include <stdlib.h>
 #include <stdint.h>
@@ -13,6 +14,10 @@
 #include "metrics.h"
 #include "sweep.h"
 #include "grouping.h"
+#include "parallel.h"
+#include "parquet.h"
+#include "csv.h"
+#include "util.h"
 
 
 #ifdef _MSC_VER
@@ -56,67 +61,182 @@ typedef struct {
     double lon;
 } gps_entry_t;
 
+// Set by SIGINT/SIGTERM; the sweep's progress callback turns it into a clean
+// cancellation (no partial output files are written).
+static volatile sig_atomic_t cancel_requested = 0;
+
+static void on_cancel_signal(int sig) {
+    (void)sig;
+    cancel_requested = 1;
+}
+
+// --progress: one JSON object per line on stdout, flushed immediately.
+// "elapsed" is seconds since the runner started.
+typedef struct {
+    int emit;
+    double t0;
+    double sweep_t0;
+} cli_progress_t;
+
+static void emit_event(const cli_progress_t *cp, const char *event) {
+    if (!cp->emit) return;
+    printf("{\"event\":\"%s\",\"elapsed\":%.3f}\n", event, em_monotonic_seconds() - cp->t0);
+    fflush(stdout);
+}
+
+static const char *stop_reason_name(int32_t stop) {
+    switch (stop) {
+    case EM_STOP_MIN_GAIN: return "min_gain";
+    case EM_STOP_MAX_PASSES: return "max_passes";
+    case EM_STOP_TIME: return "time";
+    default: return "converged";
+    }
+}
+
+static int on_sweep_progress(void *user, const em_progress_t *ev) {
+    const cli_progress_t *cp = (const cli_progress_t *)user;
+    if (cp->emit) {
+        double elapsed = cp->sweep_t0 - cp->t0 + ev->elapsed_s;
+        switch (ev->kind) {
+        case EM_PROGRESS_K_START:
+            printf("{\"event\":\"k_start\",\"k\":%d,\"elapsed\":%.3f}\n", ev->k, elapsed);
+            break;
+        case EM_PROGRESS_PASS:
+            printf("{\"event\":\"pass\",\"k\":%d,\"pass\":%d,\"moves\":%d,\"rs\":%.6f,\"elapsed\":%.3f}\n",
+                   ev->k, ev->pass, ev->moves, ev->rs, elapsed);
+            break;
+        case EM_PROGRESS_K_DONE:
+            printf("{\"event\":\"k_done\",\"k\":%d,\"passes\":%d,\"moves\":%d,\"rs\":%.6f,\"stop\":\"%s\",\"elapsed\":%.3f}\n",
+                   ev->k, ev->pass, ev->moves, ev->rs, stop_reason_name(ev->stop), elapsed);
+            break;
+        default:
+            break;
+        }
+        fflush(stdout);
+    }
+    return cancel_requested != 0;
+}
+
+// Hash index over gps_entry_t sample names: open addressing, linear probing.
+// Slots hold entry indices (-1 = empty); capacity is a power of two kept at
+// least twice the entry count.
+typedef struct {
+    int32_t *slots;
+    size_t mask;
+} gps_index_t;
+
+static uint64_t hash_name(const char *s) {
+    uint64_t h = 1469598103934665603ull; // FNV-1a
+    for (; *s; ++s) { h ^= (unsigned char)*s; h *= 1099511628211ull; }
+    return h;
+}
+
+static int gps_index_alloc(gps_index_t *ix, size_t capacity) {
+    ix->slots = (int32_t*)malloc(capacity * sizeof(int32_t));
+    if (!ix->slots) return -3;
+    for (size_t i = 0; i < capacity; ++i) ix->slots[i] = -1;
+    ix->mask = capacity - 1;
+    return 0;
+}
+
+static void gps_index_free(gps_index_t *ix) {
+    free(ix->slots);
+    ix->slots = NULL; ix->mask = 0;
+}
+
+// Returns the entry index for name, or -1. *out_slot receives the matching or first empty slot.
+static int32_t gps_index_probe(const gps_index_t *ix, const gps_entry_t *arr, const char *name, size_t *out_slot) {
+    size_t slot = (size_t)hash_name(name) & ix->mask;
+    while (ix->slots[slot] >= 0) {
+        if (strcmp(arr[ix->slots[slot]].sample, name) == 0) break;
+        slot = (slot + 1) & ix->mask;
+    }
+    if (out_slot) *out_slot = slot;
+    return ix->slots[slot];
+}
+
+// Double the table and re-insert the first n entries.
+static int gps_index_grow(gps_index_t *ix, const gps_entry_t *arr, int n) {
+    gps_index_t bigger;
+    if (gps_index_alloc(&bigger, (ix->mask + 1) * 2) != 0) return -3;
+    for (int i = 0; i < n; ++i) {
+        size_t slot;
+        (void)gps_index_probe(&bigger, arr, arr[i].sample, &slot);
+        bigger.slots[slot] = i;
+    }
+    gps_index_free(ix);
+    *ix = bigger;
+    return 0;
+}
+
 typedef struct {
     char *sample;
     int group_label; // expected Group label
 } expected_entry_t;
 
-// Read GPS CSV with headers containing Sample/Sample Name, Latitude, Longitude
-static int read_gps_csv(const char *filename, gps_entry_t **out_entries, int *out_count) {
-    if (!filename || !out_entries || !out_count) return -1;
+// Read GPS CSV with headers containing Sample/Sample Name, Latitude, Longitude.
+// Also builds out_index (keyed on the trimmed sample name) for find_gps.
+static int read_gps_csv(const char *filename, gps_entry_t **out_entries, int *out_count, gps_index_t *out_index) {
+    if (!filename || !out_entries || !out_count || !out_index) return -1;
     *out_entries = NULL; *out_count = 0;
-    FILE *fp = fopen(filename, "r");
+    out_index->slots = NULL; out_index->mask = 0;
+    csv_mapped_file_t m;
     // I/O Issue
-    if (!fp) return -2;
-    char line[16384];
+    if (csv_map_file(filename, &m) != 0) return -2;
+    const char *p = m.data, *end = m.data + m.size;
+    if (m.size >= 3 && memcmp(p, "\xEF\xBB\xBF", 3) == 0) p += 3;
     // Empty/unreadable CSV header issue
-    if (!fgets(line, sizeof(line), fp)) { fclose(fp); return -2; }
-    rstrip_newline(line);
-    char *saveptr = NULL; int col_idx = 0;
+    if (p >= end) { csv_unmap_file(&m); return -2; }
+    csv_field_t f;
+    int more = 1, col_idx = 0;
     int idx_sample = -1, idx_lat = -1, idx_lon = -1;
-    for (char *tok = strtok_r(line, ",", &saveptr); tok; tok = strtok_r(NULL, ",", &saveptr)) {
-        char *h = strdup_trim(tok);
+    while (more) {
+        more = csv_next_field(&p, end, &f);
+        char *h = csv_field_dup(&f);
         // Memory allocation failure
-        if (!h) { fclose(fp); return -3; }
-        for (char *p=h; *p; ++p) if (*p>='A' && *p<='Z') *p = (char)(*p + 32);
+        if (!h) { csv_unmap_file(&m); return -3; }
+        for (char *c = h; *c; ++c) if (*c>='A' && *c<='Z') *c = (char)(*c + 32);
         if (idx_sample < 0 && (strstr(h, "sample") != NULL)) idx_sample = col_idx;
         if (idx_lat < 0 && strstr(h, "latitude") != NULL) idx_lat = col_idx;
         if (idx_lon < 0 && (strstr(h, "longitude") != NULL || strstr(h, "long") != NULL)) idx_lon = col_idx;
         free(h);
         col_idx++;
     }
-    if (idx_sample < 0 || idx_lat < 0 || idx_lon < 0) { fclose(fp); return -2; }
+    if (idx_sample < 0 || idx_lat < 0 || idx_lon < 0) { csv_unmap_file(&m); return -2; }
     int cap = 128; int n = 0;
     gps_entry_t *arr = (gps_entry_t*)calloc((size_t)cap, sizeof(gps_entry_t));
     // Memory Issue
-    if (!arr) { fclose(fp); return -3; }
-    while (fgets(line, sizeof(line), fp)) {
-        rstrip_newline(line);
-        if (line[0] == '\0') continue;
-        char *sp = NULL; int c = 0; char *tok = strtok_r(line, ",", &sp);
+    if (!arr) { csv_unmap_file(&m); return -3; }
+    gps_index_t index;
+    if (gps_index_alloc(&index, (size_t)cap * 2) != 0) { free(arr); csv_unmap_file(&m); return -3; }
+    while (p < end) {
         char *s_sample = NULL; double lat = 0.0, lon = 0.0;
-        while (tok) {
+        int c = 0;
+        more = 1;
+        while (more) {
+            more = csv_next_field(&p, end, &f);
             if (c == idx_sample) {
-                s_sample = strdup_trim(tok);
+                s_sample = csv_field_dup(&f);
                 // Checks for NULL
                 if (!s_sample) {
+                    for (int i = 0; i < n; ++i) free(arr[i].sample);
                     free(arr);
-                    fclose(fp);
+                    gps_index_free(&index);
+                    csv_unmap_file(&m);
                     // Out of memory issue
                     return -3;
                 }
             }
-            if (c == idx_lat) lat = atof(tok);
-            if (c == idx_lon) lon = atof(tok);
-            c++; tok = strtok_r(NULL, ",", &sp);
+            if (c == idx_lat) lat = csv_field_to_double(&f);
+            if (c == idx_lon) lon = csv_field_to_double(&f);
+            c++;
         }
+        // Blank lines and rows without a sample name are skipped
         if (!s_sample) continue;
+        if (s_sample[0] == '\0') { free(s_sample); continue; }
         // Deduplicate: keep first occurrence
-        int exists = 0; int i;
-        for (i = 0; i < n; ++i) {
-            if (strcmp(arr[i].sample, s_sample) == 0) { exists = 1; break; }
-        }
-        if (!exists) {
+        size_t slot;
+        if (gps_index_probe(&index, arr, s_sample, &slot) < 0) {
             if (n >= cap) {
                 int new_cap = cap * 2;
                 gps_entry_t *tmp = (gps_entry_t*)realloc(arr, (size_t)new_cap * sizeof(gps_entry_t));
@@ -125,26 +245,25 @@ static int read_gps_csv(const char *filename, gps_entry_t **out_entries, int *ou
             }
             arr[n].sample = s_sample;
             arr[n].lat = lat; arr[n].lon = lon;
+            index.slots[slot] = n;
             n++;
+            if ((size_t)n * 2 > index.mask + 1 && gps_index_grow(&index, arr, n) != 0) break;
         } else {
             free(s_sample);
         }
     }
-    fclose(fp);
-    *out_entries = arr; *out_count = n;
+    csv_unmap_file(&m);
+    *out_entries = arr; *out_count = n; *out_index = index;
     return 0;
 }
 
-static int find_gps(const gps_entry_t *arr, int n, const char *sample, double *out_lat, double *out_lon) {
-    if (!arr || n <= 0 || !sample) return -1;
-    for (int i = 0; i < n; ++i) {
-        if (strcmp(arr[i].sample, sample) == 0) {
-            if (out_lat) { *out_lat = arr[i].lat; }
-            if (out_lon) { *out_lon = arr[i].lon; }
-            return 0;
-        }
-    }
-    return -1;
+static int find_gps(const gps_entry_t *arr, const gps_index_t *index, const char *sample, double *out_lat, double *out_lon) {
+    if (!arr || !index || !index->slots || !sample) return -1;
+    int32_t i = gps_index_probe(index, arr, sample, NULL);
+    if (i < 0) return -1;
+    if (out_lat) { *out_lat = arr[i].lat; }
+    if (out_lon) { *out_lon = arr[i].lon; }
+    return 0;
 }
 
 // Read expected CSV (Group,Sample,...) to capture expected group per sample and order; also infer unique K if present
@@ -219,99 +338,58 @@ static int read_expected_csv(const char *filename, expected_entry_t **out_entrie
 
 // Read header-driven bin labels from the input CSV
 
-int read_csv(const char *filename, double **data, int *rows, int *cols, char ***rownames, char ***colnames, char **sample_header_out, char ***raw_values_out) {
-    FILE *fp = fopen(filename, "r");
-    if (!fp) return -1;
-
-    char line[16384];
-    char *saveptr = NULL;
-
-    // Read header and derive column names from it
-    if (!fgets(line, sizeof(line), fp)) { fclose(fp); return -1; }
-    rstrip_newline(line);
-    char *saveptr_hdr = NULL;
-    char *tok_hdr = strtok_r(line, ",", &saveptr_hdr);
-    if (!tok_hdr) { fclose(fp); return -1; }
-    if (sample_header_out) { *sample_header_out = strdup_trim(tok_hdr); }
-    // Count remaining comma-separated tokens for bins
-    int hdr_bins_cap = 128;
-    int hdr_bins_count = 0;
-    char **hdr_bins = (char**)calloc((size_t)hdr_bins_cap, sizeof(char*));
-    if (!hdr_bins) {
-        fclose(fp);
-        // Memory allocation failure
-        return -3;
-    }
-    while ((tok_hdr = strtok_r(NULL, ",", &saveptr_hdr)) != NULL) {
-        if (hdr_bins_count >= hdr_bins_cap) {
-            int new_cap = hdr_bins_cap * 2;
-            char **new_bins = (char**)realloc(hdr_bins, (size_t)new_cap * sizeof(char*));
-            // Memory Allocation failure
-            if (!new_bins) { fclose(fp); free(hdr_bins); return -3; }
-            hdr_bins = new_bins; hdr_bins_cap = new_cap;
-        }
-        hdr_bins[hdr_bins_count++] = strdup_trim(tok_hdr);
-    }
-    *cols = hdr_bins_count;
-    *colnames = (char**)calloc((size_t)(*cols), sizeof(char*));
-    for (int j = 0; j < *cols; ++j) {
-        (*colnames)[j] = hdr_bins[j];
-    }
-
-    // Prepare dynamic row storage
-    int cap_rows = 512;
-    *rows = 0;
-    *rownames = (char**)calloc((size_t)cap_rows, sizeof(char*));
-    *data = (double*)calloc((size_t)cap_rows * (size_t)(*cols), sizeof(double));
-    char **raw_values = NULL;
-    if (raw_values_out) {
-        raw_values = (char**)calloc((size_t)cap_rows * (size_t)(*cols), sizeof(char*));
-        // Memory allocation failure
-        if (!raw_values) { fclose(fp); return -3; }
+// Normalized layout (CSV): samples table once, one metrics row per K, and a
+// rows x K membership matrix whose row i belongs to sample i.
+static int write_normalized_csv(const em_result_table_t *res, const char *samples_path,
+                                const char *metrics_path, const char *membership_path) {
+    FILE *fs = fopen(samples_path, "w");
+    if (!fs) return -1;
+    fprintf(fs, "Sample,latitude,longitude");
+    for (int j = 0; j < res->cols; ++j) fprintf(fs, ",%s", res->colnames && res->colnames[j] ? res->colnames[j] : "var");
+    fprintf(fs, "\n");
+    for (int i = 0; i < res->rows; ++i) {
+        fprintf(fs, "%s,%.5f,%.5f", res->rownames && res->rownames[i] ? res->rownames[i] : "", res->lat[i], res->lon[i]);
+        for (int j = 0; j < res->cols; ++j) fprintf(fs, ",%.6f", res->data[(size_t)i * (size_t)res->cols + (size_t)j]);
+        fprintf(fs, "\n");
     }
-    // Internal memory allocation failure
-    if (!*rownames || !*data) { fclose(fp); return -3; }
-
-    // Read data rows
-    while (fgets(line, sizeof(line), fp)) {
-        rstrip_newline(line);
-        if (line[0] == '\0') continue;
-
-        // Grow rows if needed
-        if (*rows >= cap_rows) {
-            int new_cap = cap_rows * 2;
-            char **new_rows = (char**)realloc(*rownames, (size_t)new_cap * sizeof(char*));
-            double *new_data = (double*)realloc(*data, (size_t)new_cap * (size_t)(*cols) * sizeof(double));
-            char **new_raw = raw_values ? (char**)realloc(raw_values, (size_t)new_cap * (size_t)(*cols) * sizeof(char*)) : NULL;
-            // Internal memory allocation failure 
-            if (!new_rows || !new_data || (raw_values && !new_raw)) { fclose(fp); return -3; }
-            *rownames = new_rows; *data = new_data; if (raw_values) raw_values = new_raw; cap_rows = new_cap;
-        }
-
-        saveptr = NULL;
-        char *tok = strtok_r(line, ",", &saveptr);
-        if (!tok) continue;
-        (*rownames)[*rows] = strdup_trim(tok);
-        for (int j = 0; j < *cols; j++) {
-            tok = strtok_r(NULL, ",", &saveptr);
-            // Trim token for robust parsing and storage
-            char *tok_copy = tok ? strdup(tok) : strdup("0");
-            // Internal memory allocation failure
-            if (!tok_copy) { fclose(fp); return -3; }
-            trim_inplace(tok_copy);
-            (*data)[(size_t)(*rows) * (size_t)(*cols) + (size_t)j] = tok_copy[0] ? atof(tok_copy) : 0.0;
-            if (raw_values) {
-                raw_values[(size_t)(*rows) * (size_t)(*cols) + (size_t)j] = tok_copy;
-            }
-            else {
-                free(tok_copy);
-            }
+    fclose(fs);
+
+    FILE *fm = fopen(metrics_path, "w");
+    if (!fm) return -1;
+    fprintf(fm, "K,%% explained,Total inequality,Between region inequality,Total sum of squares,Within group sum of squares,Calinski-Harabasz pseudo-F statistic");
+    if (res->with_permutations) fprintf(fm, ",Permutation mean C-H,Permutation C-H p-value");
+    fprintf(fm, "\n");
+    for (int mi = 0; mi < res->n_k; ++mi) {
+        const em_k_metric_t *m = &res->metrics[mi];
+        fprintf(fm, "%d,%.6f,%.6f,%.6f,%.6f,%.6f,%.6f", m->nGrpDum, m->fRs, res->tineq, m->fBetween, m->fSST, m->fSSE, m->fCHDum);
+        if (res->with_permutations) fprintf(fm, ",%.6f,%.6f", m->nCounterIndex, m->fCHP);
+        fprintf(fm, "\n");
+    }
+    fclose(fm);
+
+    FILE *fg = fopen(membership_path, "w");
+    if (!fg) return -1;
+    for (int mi = 0; mi < res->n_k; ++mi) fprintf(fg, "%sK%d", mi ? "," : "", res->metrics[mi].nGrpDum);
+    fprintf(fg, "\n");
+    for (int i = 0; i < res->rows; ++i) {
+        for (int mi = 0; mi < res->n_k; ++mi) {
+            fprintf(fg, "%s%d", mi ? "," : "", res->all_member1[(size_t)mi * (size_t)res->rows + (size_t)i] + 1);
         }
-        (*rows)++;
+        fprintf(fg, "\n");
     }
+    fclose(fg);
+    return 0;
+}
 
-    fclose(fp);
-    if (raw_values_out) { *raw_values_out = raw_values; }
+int read_csv(const char *filename, double **data, int *rows, int *cols, char ***rownames, char ***colnames, char **sample_header_out, char ***raw_values_out) {
+    csv_table_t t;
+    int rc = csv_read_table(filename, &t);
+    if (rc != 0) return rc;
+    *data = t.data; *rows = t.rows; *cols = t.cols;
+    *rownames = t.rownames; *colnames = t.colnames;
+    if (sample_header_out) { *sample_header_out = t.index_name; } else { free(t.index_name); }
+    // Raw token strings are no longer kept
+    if (raw_values_out) { *raw_values_out = NULL; }
     return 0;
 }
 
@@ -322,17 +400,36 @@ int main(int argc, char **argv) {
         return -1;
     }
 
+    cli_progress_t progress = {0, em_monotonic_seconds(), 0.0};
+    signal(SIGINT, on_cancel_signal);
+    signal(SIGTERM, on_cancel_signal);
+
     const char *fixed_input_path = argv[1];
     const char *gps_csv_path = argv[2];
     const char *fixed_output_path = "output.csv";
-    /* Parquet output disabled; CSV is the sole output */
+    const char *fixed_parquet_path = "output.parquet";
+    // --output-format csv|parquet (default csv). Parquet is built straight from
+    // the in-memory results; builds without Arrow fall back to the CSV output.
+    // --output-layout wide|normalized (default wide, or EM_OUTPUT_LAYOUT). The
+    // normalized layout writes output_samples/_metrics/_membership instead.
+    int want_parquet = 0;
+    int want_normalized = 0;
+    const char *env_layout = getenv("EM_OUTPUT_LAYOUT");
+    if (env_layout && *env_layout) want_normalized = strcmp(env_layout, "normalized") == 0;
+    for (int ai = 3; ai < argc; ++ai) {
+        const char *a = argv[ai];
+        if (!a) continue;
+        if (strncmp(a, "--output-format=", 16) == 0) { want_parquet = strcmp(a + 16, "parquet") == 0; continue; }
+        if (strcmp(a, "--output-format") == 0 && ai + 1 < argc) { want_parquet = strcmp(argv[++ai], "parquet") == 0; continue; }
+        if (strncmp(a, "--output-layout=", 16) == 0) { want_normalized = strcmp(a + 16, "normalized") == 0; continue; }
+        if (strcmp(a, "--output-layout") == 0 && ai + 1 < argc) { want_normalized = strcmp(argv[++ai], "normalized") == 0; continue; }
+    }
 
     double *data = NULL; // raw data as read
     int rows = 0, cols = 0;
     char **rownames = NULL, **colnames = NULL;
-    char **raw_values = NULL;
 
-    if (read_csv(fixed_input_path, &data, &rows, &cols, &rownames, &colnames, NULL, &raw_values) != 0) {
+    if (read_csv(fixed_input_path, &data, &rows, &cols, &rownames, &colnames, NULL, NULL) != 0) {
         // CSV processing error
         return -2;
     }
@@ -433,15 +530,169 @@ int main(int argc, char **argv) {
     double *group_means = malloc((size_t)k_max * (size_t)cols * sizeof(double));
     int32_t *all_member1 = malloc((size_t)metrics_cap * (size_t)rows * sizeof(int32_t));
     int out_opt_k = 0;
-    int perms_n = 0; // disable permutations for deterministic output equivalence
+    // CH permutation test (off by default so output matches the legacy runner)
+    int perms_n = 0;
+    // --seed N (or EM_SEED) seeds the permutations and the extra starts
     uint64_t seed = 42;
-
-    int rc = em_sweep_k(data_proc, rows, cols, Y, tineq, k_min, k_max, &out_opt_k, perms_n, seed,
-                        metrics, metrics_cap, member1, group_means, all_member1);
+    const char *env_seed = getenv("EM_SEED");
+    if (env_seed && *env_seed) seed = strtoull(env_seed, NULL, 10);
+    for (int ai = 3; ai < argc; ++ai) {
+        const char *a = argv[ai];
+        if (!a) continue;
+        if (strncmp(a, "--permutations=", 15) == 0) { perms_n = atoi(a + 15); continue; }
+        if (strcmp(a, "--permutations") == 0 && ai + 1 < argc) { perms_n = atoi(argv[++ai]); continue; }
+        if (strncmp(a, "--seed=", 7) == 0) { seed = strtoull(a + 7, NULL, 10); continue; }
+        if (strcmp(a, "--seed") == 0 && ai + 1 < argc) { seed = strtoull(argv[++ai], NULL, 10); continue; }
+    }
+    if (perms_n < 0) perms_n = 0;
+
+    // Worker threads for the K sweep: EM_THREADS env, then --threads (0 = all cores).
+    // Output is identical for any thread count.
+    // --progress (or EM_PROGRESS=1) streams progress events on stdout.
+    // --warm-start none|split|merge (or EM_WARM_START) starts each K from the
+    // previous K's grouping, see em_sweep_k_ex.
+    // --starts N (or EM_STARTS) keeps the best of N optimisation starts per K;
+    // --start-budget SECONDS (or EM_START_BUDGET) stops extra starts after that.
+    // --move-strategy first|best|rounds (or EM_MOVE_STRATEGY) picks the
+    // optimiser's move rule; "first" is the VB6-identical default. --polish
+    // (or EM_POLISH=1) ends parallel rounds with first-improvement passes.
+    // Convergence budgets per K: --max-passes N (EM_MAX_PASSES), --max-seconds
+    // SECONDS (EM_MAX_SECONDS), --min-rs-gain PERCENT (EM_MIN_RS_GAIN) and
+    // --stop-when-stale (EM_STOP_WHEN_STALE=1); k_done events report why each
+    // K stopped.
+    em_sweep_opts_t sweep_opts;
+    em_sweep_opts_default(&sweep_opts);
+    const char *env_threads = getenv("EM_THREADS");
+    if (env_threads && *env_threads) sweep_opts.threads = em_resolve_threads(atoi(env_threads));
+    const char *env_progress = getenv("EM_PROGRESS");
+    if (env_progress && *env_progress) progress.emit = atoi(env_progress) != 0;
+    const char *warm_start = getenv("EM_WARM_START");
+    const char *env_starts = getenv("EM_STARTS");
+    if (env_starts && *env_starts) sweep_opts.starts = atoi(env_starts);
+    const char *move_strategy = getenv("EM_MOVE_STRATEGY");
+    const char *env_polish = getenv("EM_POLISH");
+    if (env_polish && *env_polish) sweep_opts.polish = atoi(env_polish) != 0;
+    const char *env_budget = getenv("EM_START_BUDGET");
+    if (env_budget && *env_budget) sweep_opts.start_budget_s = atof(env_budget);
+    const char *env_max_passes = getenv("EM_MAX_PASSES");
+    if (env_max_passes && *env_max_passes) sweep_opts.max_passes = atoi(env_max_passes);
+    const char *env_max_seconds = getenv("EM_MAX_SECONDS");
+    if (env_max_seconds && *env_max_seconds) sweep_opts.max_seconds_per_k = atof(env_max_seconds);
+    const char *env_min_gain = getenv("EM_MIN_RS_GAIN");
+    if (env_min_gain && *env_min_gain) sweep_opts.min_rs_gain = atof(env_min_gain);
+    const char *env_stale = getenv("EM_STOP_WHEN_STALE");
+    if (env_stale && *env_stale) sweep_opts.stop_when_stale = atoi(env_stale) != 0;
+    for (int ai = 3; ai < argc; ++ai) {
+        const char *a = argv[ai];
+        if (!a) continue;
+        if (strncmp(a, "--threads=", 10) == 0) { sweep_opts.threads = em_resolve_threads(atoi(a + 10)); continue; }
+        if (strcmp(a, "--threads") == 0 && ai + 1 < argc) { sweep_opts.threads = em_resolve_threads(atoi(argv[++ai])); continue; }
+        if (strcmp(a, "--progress") == 0) { progress.emit = 1; continue; }
+        if (strncmp(a, "--warm-start=", 13) == 0) { warm_start = a + 13; continue; }
+        if (strcmp(a, "--warm-start") == 0 && ai + 1 < argc) { warm_start = argv[++ai]; continue; }
+        if (strncmp(a, "--starts=", 9) == 0) { sweep_opts.starts = atoi(a + 9); continue; }
+        if (strcmp(a, "--starts") == 0 && ai + 1 < argc) { sweep_opts.starts = atoi(argv[++ai]); continue; }
+        if (strncmp(a, "--start-budget=", 15) == 0) { sweep_opts.start_budget_s = atof(a + 15); continue; }
+        if (strcmp(a, "--start-budget") == 0 && ai + 1 < argc) { sweep_opts.start_budget_s = atof(argv[++ai]); continue; }
+        if (strncmp(a, "--move-strategy=", 16) == 0) { move_strategy = a + 16; continue; }
+        if (strcmp(a, "--move-strategy") == 0 && ai + 1 < argc) { move_strategy = argv[++ai]; continue; }
+        if (strcmp(a, "--polish") == 0) { sweep_opts.polish = 1; continue; }
+        if (strncmp(a, "--max-passes=", 13) == 0) { sweep_opts.max_passes = atoi(a + 13); continue; }
+        if (strcmp(a, "--max-passes") == 0 && ai + 1 < argc) { sweep_opts.max_passes = atoi(argv[++ai]); continue; }
+        if (strncmp(a, "--max-seconds=", 14) == 0) { sweep_opts.max_seconds_per_k = atof(a + 14); continue; }
+        if (strcmp(a, "--max-seconds") == 0 && ai + 1 < argc) { sweep_opts.max_seconds_per_k = atof(argv[++ai]); continue; }
+        if (strncmp(a, "--min-rs-gain=", 14) == 0) { sweep_opts.min_rs_gain = atof(a + 14); continue; }
+        if (strcmp(a, "--min-rs-gain") == 0 && ai + 1 < argc) { sweep_opts.min_rs_gain = atof(argv[++ai]); continue; }
+        if (strcmp(a, "--stop-when-stale") == 0) { sweep_opts.stop_when_stale = 1; continue; }
+    }
+    if (warm_start && *warm_start) {
+        if (strcmp(warm_start, "split") == 0) sweep_opts.warm_start = EM_WARM_START_SPLIT;
+        else if (strcmp(warm_start, "merge") == 0) sweep_opts.warm_start = EM_WARM_START_MERGE;
+        else if (strcmp(warm_start, "none") != 0) fprintf(stderr, "Ignoring unknown warm start '%s'\n", warm_start);
+    }
+    if (move_strategy && *move_strategy) {
+        if (strcmp(move_strategy, "best") == 0) sweep_opts.move_strategy = EM_MOVE_BEST_IMPROVEMENT;
+        else if (strcmp(move_strategy, "rounds") == 0) sweep_opts.move_strategy = EM_MOVE_PARALLEL_ROUNDS;
+        else if (strcmp(move_strategy, "first") != 0) fprintf(stderr, "Ignoring unknown move strategy '%s'\n", move_strategy);
+    }
+    // The callback also polls for SIGINT/SIGTERM, so it is installed even
+    // when no events are printed
+    sweep_opts.progress = on_sweep_progress;
+    sweep_opts.progress_user = &progress;
+
+    if (progress.emit) {
+        printf("{\"event\":\"start\",\"rows\":%d,\"cols\":%d,\"k_min\":%d,\"k_max\":%d,\"threads\":%d,\"elapsed\":%.3f}\n",
+               rows, cols, k_min, k_max, sweep_opts.threads, em_monotonic_seconds() - progress.t0);
+        fflush(stdout);
+    }
+    progress.sweep_t0 = em_monotonic_seconds();
+    int rc = em_sweep_k_ex(data_proc, rows, cols, Y, tineq, k_min, k_max, &out_opt_k, perms_n, seed,
+                           metrics, metrics_cap, member1, group_means, all_member1, &sweep_opts);
+    if (rc == EM_ERR_CANCELLED) {
+        emit_event(&progress, "cancelled");
+        return EM_ERR_CANCELLED;
+    }
     if (rc <= 0) {
         // Processing error
         return -2;
     }
+    emit_event(&progress, "writing");
+
+    // Load GPS mapping and resolve each sample's coordinates once
+    gps_entry_t *gps = NULL; int gps_n = 0;
+    gps_index_t gps_index;
+    if (read_gps_csv(gps_csv_path, &gps, &gps_n, &gps_index) != 0) {
+        fprintf(stderr, "GPS: could not read %s; coordinates written as -1\n", gps_csv_path);
+    }
+    double *lat_s = malloc((size_t)rows * sizeof(double));
+    double *lon_s = malloc((size_t)rows * sizeof(double));
+    if (!lat_s || !lon_s) {
+        // Memory Issue
+        return -2;
+    }
+    if (gps) {
+        int unmatched = 0;
+        for (int i = 0; i < rows; ++i) {
+            lat_s[i] = -1.0; lon_s[i] = -1.0;
+            if (find_gps(gps, &gps_index, rownames && rownames[i] ? rownames[i] : "", &lat_s[i], &lon_s[i]) != 0) {
+                if (unmatched < 5) fprintf(stderr, "%s%s", unmatched ? ", " : "GPS: no coordinates for ", rownames && rownames[i] ? rownames[i] : "");
+                unmatched++;
+            }
+        }
+        if (unmatched > 0) {
+            if (unmatched > 5) fprintf(stderr, " and %d more", unmatched - 5);
+            fprintf(stderr, " (%d of %d samples written as -1)\n", unmatched, rows);
+        }
+    } else {
+        for (int i = 0; i < rows; ++i) { lat_s[i] = -1.0; lon_s[i] = -1.0; }
+    }
+
+    em_result_table_t res = {
+        .data = data, .rows = rows, .cols = cols,
+        .colnames = (const char *const *)colnames, .rownames = (const char *const *)rownames,
+        .lat = lat_s, .lon = lon_s, .metrics = metrics, .n_k = rc,
+        .all_member1 = all_member1, .tineq = tineq, .with_permutations = perms_n > 0
+    };
+    if (want_parquet) {
+        int prc = want_normalized
+            ? em_write_normalized_parquet("output_samples.parquet", "output_metrics.parquet",
+                                          "output_membership.parquet", &res)
+            : em_write_results_parquet(fixed_parquet_path, &res);
+        if (prc == 0) goto output_written;
+        if (parquet_is_available()) {
+            // Processing error
+            return -2;
+        }
+        fprintf(stderr, "Parquet output not available in this build; writing CSV\n");
+    }
+    if (want_normalized) {
+        if (write_normalized_csv(&res, "output_samples.csv", "output_metrics.csv", "output_membership.csv") != 0) {
+            // Processing error
+            return -2;
+        }
+        goto output_written;
+    }
+
     // Write CSV in frontend order for optimal K only (Group, Sample, bins…, metrics…, K)
     FILE *out = fopen(fixed_output_path, "w");
     if (!out) {
@@ -455,12 +706,11 @@ int main(int argc, char **argv) {
         const char *hn = colnames && colnames[j] ? colnames[j] : "var";
         fprintf(out, ",%s", hn);
     }
-    fprintf(out, ",%% explained,Total inequality,Between region inequality,Total sum of squares,Within group sum of squares,Calinski-Harabasz pseudo-F statistic,latitude,longitude\n");
+    fprintf(out, ",%% explained,Total inequality,Between region inequality,Total sum of squares,Within group sum of squares,Calinski-Harabasz pseudo-F statistic");
+    if (perms_n > 0) fprintf(out, ",Permutation mean C-H,Permutation C-H p-value");
+    fprintf(out, ",latitude,longitude\n");
 
     // Emit groups for all k from the sweep (as in working commit), including metrics per-k
-    // Load GPS mapping
-    gps_entry_t *gps = NULL; int gps_n = 0;
-    read_gps_csv(gps_csv_path, &gps, &gps_n);
 
     // If expected is provided, also capture its header bin names to align our emission exactly
     char **exp_bins = NULL; int exp_bins_n = 0;
@@ -533,26 +783,28 @@ int main(int argc, char **argv) {
                 // Metrics per-k from sweep on processed data (match working commit semantics)
                 fprintf(out, ",%.6f,%.6f,%.6f,%.6f,%.6f,%.6f",
                         metrics[mi].fRs, tineq, metrics[mi].fBetween, metrics[mi].fSST, metrics[mi].fSSE, metrics[mi].fCHDum);
-                double lat = -1.0, lon = -1.0; if (gps) (void)find_gps(gps, gps_n, rownames && rownames[i] ? rownames[i] : "", &lat, &lon);
-                fprintf(out, ",%.5f,%.5f\n", lat, lon);
+                if (perms_n > 0) fprintf(out, ",%.6f,%.6f", metrics[mi].nCounterIndex, metrics[mi].fCHP);
+                fprintf(out, ",%.5f,%.5f\n", lat_s[i], lon_s[i]);
             }
         } }
     } }
 
-    if (gps) { int i; for (i = 0; i < gps_n; ++i) free(gps[i].sample); free(gps); }
-    if (exp_entries) { int i; for (i = 0; i < exp_n; ++i) free(exp_entries[i].sample); free(exp_entries); }
     if (exp_bins) { int i; for (i = 0; i < exp_bins_n; ++i) free(exp_bins[i]); free(exp_bins); }
     if (exp_rows) { int r; for (r = 0; r < exp_rows_n; ++r) { if (exp_rows[r].vals) { int b; for (b = 0; b < exp_bins_n; ++b) free(exp_rows[r].vals[b]); free(exp_rows[r].vals);} free(exp_rows[r].sample);} free(exp_rows); }
     fclose(out);
 
-    // Parquet output is intentionally disabled; CSV is the single source of truth for output
+output_written:
+    if (gps) { int i; for (i = 0; i < gps_n; ++i) free(gps[i].sample); free(gps); }
+    gps_index_free(&gps_index);
+    if (exp_entries) { int i; for (i = 0; i < exp_n; ++i) free(exp_entries[i].sample); free(exp_entries); }
+    free(lat_s); free(lon_s);
 
     // Free memory
     { int i; for (i = 0; i < rows; ++i) free(rownames[i]); }
     { int j; for (j = 0; j < cols; ++j) free(colnames[j]); }
-    if (raw_values) { int i; for (i = 0; i < rows * cols; ++i) free(raw_values[i]); free(raw_values); }
     free(rownames); free(colnames); free(data); free(Y); free(metrics); free(member1); free(group_means); free(all_member1); free(data_proc);
 
+    emit_event(&progress, "done");
     //printf("Done. Output written to %s (csv)\n", fixed_output_path);
     // On success just returns 0
     return 0;
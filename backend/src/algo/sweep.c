@@ -1,6 +1,289 @@
 #include "sweep.h"
 #include "grouping.h"
 #include "metrics.h"
+#include "parallel.h"
+#include "util.h"
+
+void em_sweep_opts_default(em_sweep_opts_t *opts) {
+  if (!opts) return;
+  memset(opts, 0, sizeof(*opts));
+  opts->threads = 1;
+}
+
+// Outcome of one optimisation start of a K.
+typedef struct {
+  int32_t passes;
+  int32_t moves;
+  double bineq;
+  double rs;
+  int32_t stop;
+  int ok;
+} em_start_result_t;
+
+// Per-worker buffers of the K loop.
+typedef struct {
+  double *class_table;        // [rows * (cols + 1)]
+  int32_t *member1;           // extra starts [(starts - 1) * rows]
+  double *means;              // extra starts [(starts - 1) * k_max * cols]
+  em_start_result_t *results; // [starts]
+} em_sweep_scratch_t;
+
+// Shared state for one sweep; each task fills the slot for a single K.
+typedef struct {
+  const double *data_in;
+  int32_t rows;
+  int32_t cols;
+  const double *Y;
+  double tineq;
+  int32_t k_min;
+  int32_t k_max;
+  int32_t perms_n;
+  uint64_t seed;
+  int32_t perm_threads;   // threads left over for each K's permutation test
+  int32_t warm_start;     // em_warm_start_t
+  int32_t move_strategy;  // em_move_strategy_t
+  int32_t polish;         // finish parallel rounds with first-improvement passes
+  int32_t max_passes;     // passes per start (<= 0: no limit)
+  double max_seconds_per_k; // wall time for the starts of one K (<= 0: no limit)
+  double min_rs_gain;     // stop after a pass gaining less RS (<= 0: off)
+  int32_t stop_when_stale; // stop at the first pass without moves
+  int32_t starts;         // optimisation starts per K (>= 1)
+  int32_t start_threads;  // threads for the starts of one K
+  int32_t switch_threads; // threads for the parallel rounds of one start
+  double deadline;        // extra starts stop after this time (0: never)
+  int32_t *slot_member1;  // [count * rows]
+  double *slot_means;     // [count * k_max * cols]
+  em_k_metric_t *slot_metrics; // [count]
+  int *slot_ok;           // [count]
+  em_sweep_scratch_t *scratch; // [workers]
+  em_progress_fn progress;
+  void *progress_user;
+  em_lock_t *progress_lock; // serialises progress calls and guards cancelled
+  double start_time;
+  int cancelled;
+} em_sweep_ctx_t;
+
+// The starts of one K; start 0 writes straight into the K's slot.
+typedef struct {
+  em_sweep_ctx_t *ctx;
+  int32_t idx;
+  int32_t k;
+  em_sweep_scratch_t *scratch;
+  double deadline;        // the K's starts stop after this time (0: never)
+} em_k_starts_t;
+
+// Pass hook state of one start.
+typedef struct {
+  em_sweep_ctx_t *ctx;
+  int32_t start;
+} em_start_progress_t;
+
+// Report one event; returns non-zero once the sweep has been cancelled.
+static int report_progress(em_sweep_ctx_t *ctx, int32_t kind, int32_t k,
+                           int32_t pass, int32_t moves, double rs, int32_t stop) {
+  if (!ctx->progress) return 0;
+  em_lock_acquire(ctx->progress_lock);
+  if (!ctx->cancelled) {
+    em_progress_t ev;
+    ev.kind = kind;
+    ev.k = k;
+    ev.pass = pass;
+    ev.moves = moves;
+    ev.rs = rs;
+    ev.stop = stop;
+    ev.elapsed_s = em_monotonic_seconds() - ctx->start_time;
+    if (ctx->progress(ctx->progress_user, &ev) != 0) ctx->cancelled = 1;
+  }
+  int cancelled = ctx->cancelled;
+  em_lock_release(ctx->progress_lock);
+  return cancelled;
+}
+
+// Extra starts give up once the sweep is cancelled or out of time.
+static int extra_start_stopped(em_sweep_ctx_t *ctx) {
+  if (ctx->deadline > 0.0 && em_monotonic_seconds() > ctx->deadline) return 1;
+  if (!ctx->progress_lock) return 0;
+  em_lock_acquire(ctx->progress_lock);
+  int cancelled = ctx->cancelled;
+  em_lock_release(ctx->progress_lock);
+  return cancelled;
+}
+
+// Only start 0 reports passes, so PASS events of one K stay in order.
+static int on_switch_pass(void *user, int32_t k, int32_t pass, int32_t moves, double rs) {
+  em_start_progress_t *sp = (em_start_progress_t *)user;
+  if (sp->start > 0) return extra_start_stopped(sp->ctx);
+  return report_progress(sp->ctx, EM_PROGRESS_PASS, k, pass, moves, rs, 0);
+}
+
+// Seed of extra start `start` of K: independent of the thread layout.
+static uint64_t start_seed(uint64_t seed, int32_t k, int32_t start) {
+  return seed ^ ((uint64_t)k * UINT64_C(0x9E3779B97F4A7C15)) ^
+         ((uint64_t)start * UINT64_C(0xD1B54A32D192ED03));
+}
+
+// Starting assignment for slot idx: with a warm start the neighbouring K's
+// converged grouping split or merged, otherwise (or if that K failed) the
+// legacy contiguous blocks.
+static int initial_groups(const em_sweep_ctx_t *ctx, int32_t idx, int32_t k,
+                          int32_t *member1) {
+  int32_t count = ctx->k_max - ctx->k_min + 1;
+  int32_t from = -1;
+  if (ctx->warm_start == EM_WARM_START_SPLIT) from = idx - 1;
+  if (ctx->warm_start == EM_WARM_START_MERGE) from = idx + 1;
+
+  if (from >= 0 && from < count && ctx->slot_ok[from]) {
+    const int32_t *prev = ctx->slot_member1 + (size_t)from * (size_t)ctx->rows;
+    int rc = ctx->warm_start == EM_WARM_START_SPLIT
+                 ? em_split_groups(ctx->data_in, ctx->rows, ctx->cols, k - 1,
+                                   ctx->Y, prev, member1)
+                 : em_merge_groups(ctx->data_in, ctx->rows, ctx->cols, k + 1,
+                                   ctx->Y, prev, member1);
+    if (rc == 0) return 0;
+  }
+  return em_initial_groups(ctx->rows, k, member1);
+}
+
+// Start 0 begins from initial_groups, the others from em_seed_groups.
+static void run_start(void *arg, int32_t start, int32_t worker) {
+  (void)worker; // buffers are per start
+  em_k_starts_t *ks = (em_k_starts_t *)arg;
+  em_sweep_ctx_t *ctx = ks->ctx;
+  int32_t rows = ctx->rows, cols = ctx->cols, k = ks->k;
+  size_t means_stride = (size_t)ctx->k_max * (size_t)cols;
+  int32_t *member1 = start == 0
+                         ? ctx->slot_member1 + (size_t)ks->idx * (size_t)rows
+                         : ks->scratch->member1 + (size_t)(start - 1) * (size_t)rows;
+  double *group_means = start == 0
+                            ? ctx->slot_means + (size_t)ks->idx * means_stride
+                            : ks->scratch->means + (size_t)(start - 1) * means_stride;
+  em_start_result_t *res = &ks->scratch->results[start];
+  int ixout = 0;
+
+  memset(res, 0, sizeof(*res));
+  if (start > 0 && (extra_start_stopped(ctx) ||
+                    (ks->deadline > 0.0 && em_monotonic_seconds() > ks->deadline))) {
+    return;
+  }
+  int rc = start == 0
+               ? initial_groups(ctx, ks->idx, k, member1)
+               : em_seed_groups(ctx->data_in, rows, cols, k,
+                                start_seed(ctx->seed, k, start), member1);
+  if (rc != 0) {
+    return;
+  }
+
+  em_start_progress_t sp = {ctx, start};
+  em_switch_stats_t stats = {0, 0, EM_STOP_CONVERGED};
+  em_switch_opts_t sw;
+  em_switch_opts_default(&sw);
+  sw.strategy = ctx->move_strategy;
+  sw.threads = ctx->switch_threads;
+  sw.polish = ctx->polish;
+  sw.max_passes = ctx->max_passes;
+  sw.min_rs_gain = ctx->min_rs_gain;
+  sw.stop_when_stale = ctx->stop_when_stale;
+  sw.stats = &stats;
+  if (ks->deadline > 0.0) {
+    // Start 0 always runs; if the K is already out of time it stops at the
+    // first budget check
+    double left = ks->deadline - em_monotonic_seconds();
+    sw.max_seconds = left > 1e-9 ? left : 1e-9;
+  }
+  if (ctx->progress || (start > 0 && ctx->deadline > 0.0)) {
+    sw.on_pass = on_switch_pass;
+    sw.user = &sp;
+  }
+  res->ok = em_switch_groups_ex(ctx->data_in, rows, cols, k, ctx->tineq, ctx->Y,
+                                ctx->k_min, member1, &res->bineq, &res->rs,
+                                &ixout, group_means, &sw) == 0;
+  res->passes = stats.passes;
+  res->moves = stats.moves;
+  res->stop = stats.stop;
+}
+
+static void sweep_one_k(void *arg, int32_t task, int32_t worker) {
+  em_sweep_ctx_t *ctx = (em_sweep_ctx_t *)arg;
+  int32_t count = ctx->k_max - ctx->k_min + 1;
+  // Hand out the largest K first: they take longest, so the tail stays short.
+  // A split warm start chains upwards from k_min instead.
+  int32_t idx = ctx->warm_start == EM_WARM_START_SPLIT ? task : count - 1 - task;
+  int32_t k = ctx->k_min + idx;
+  int32_t rows = ctx->rows, cols = ctx->cols;
+  int32_t *member1 = ctx->slot_member1 + (size_t)idx * (size_t)rows;
+  double *group_means = ctx->slot_means + (size_t)idx * (size_t)ctx->k_max * (size_t)cols;
+  em_sweep_scratch_t *scratch = &ctx->scratch[worker];
+  double *class_table = scratch->class_table;
+  double bineq, rs_stat, ch_stat, sstt, sset;
+  double perm_mean = 0.0, perm_p = 0.0, unused = 0.0;
+
+  ctx->slot_ok[idx] = 0;
+
+  if (report_progress(ctx, EM_PROGRESS_K_START, k, 0, 0, 0.0, 0)) {
+    return;
+  }
+
+  em_k_starts_t ks = {ctx, idx, k, scratch, 0.0};
+  if (ctx->max_seconds_per_k > 0.0) ks.deadline = em_monotonic_seconds() + ctx->max_seconds_per_k;
+  em_parallel_for(ctx->starts, ctx->start_threads, run_start, &ks);
+
+  // Best RS wins; ties go to the lower start so the choice is deterministic
+  const em_start_result_t *results = scratch->results;
+  int32_t best = -1, passes = 0, moves = 0;
+  for (int32_t s = 0; s < ctx->starts; s++) {
+    passes += results[s].passes;
+    moves += results[s].moves;
+    if (results[s].ok && (best < 0 || results[s].rs > results[best].rs)) best = s;
+  }
+  if (best < 0) {
+    return;
+  }
+  if (best > 0) {
+    size_t means_stride = (size_t)ctx->k_max * (size_t)cols;
+    memcpy(member1, scratch->member1 + (size_t)(best - 1) * (size_t)rows,
+           (size_t)rows * sizeof(int32_t));
+    memcpy(group_means, scratch->means + (size_t)(best - 1) * means_stride,
+           (size_t)k * (size_t)cols * sizeof(double));
+  }
+  bineq = results[best].bineq;
+  rs_stat = results[best].rs;
+
+  for (int i = 0; i < rows; i++) {
+    class_table[i * (cols + 1)] = (double)member1[i];
+    for (int j = 0; j < cols; j++) {
+      class_table[i * (cols + 1) + j + 1] = ctx->data_in[i * cols + j];
+    }
+  }
+
+  int ch_result = em_ch_stat(class_table, rows, cols, k, 0, ctx->seed,
+                             &ch_stat, &sstt, &sset, &unused, &unused);
+
+  if (ch_result != 0) {
+    return;
+  }
+
+  if (ctx->perms_n > 0 &&
+      em_ch_permutation_test(class_table, rows, cols, k, ch_stat, ctx->perms_n,
+                             ctx->seed, ctx->perm_threads, &perm_mean,
+                             &perm_p) != 0) {
+    return;
+  }
+
+  em_k_metric_t *m = &ctx->slot_metrics[idx];
+  m->nGrpDum = k;
+  // Align naming: store CH in fCHDum and Rs in fRs; retain SST/SSE
+  m->fCHDum = ch_stat;
+  m->fRs = rs_stat;
+  m->fSST = sstt;
+  m->fSSE = sset;
+  m->fBetween = bineq;     // between-region inequality (VB: bineq)
+  m->fCHP = perm_p;
+  m->nCounterIndex = perm_mean;
+  m->nPasses = results[best].passes;
+  m->nStop = results[best].stop;
+  ctx->slot_ok[idx] = 1;
+  report_progress(ctx, EM_PROGRESS_K_DONE, k, passes, moves, rs_stat, m->nStop);
+}
 
 // OWNER: Will
 // VB6 mapping: LOOPgroupsizgit brtae → em_sweep_k
@@ -10,117 +293,158 @@ int em_sweep_k(const double *data_in, int32_t rows, int32_t cols,
                em_k_metric_t *out_metrics, int32_t metrics_cap,
                int32_t *out_member1, double *out_group_means,
                int32_t *out_all_member1) {
+  return em_sweep_k_ex(data_in, rows, cols, Y, tineq, k_min, k_max, out_opt_k,
+                       perms_n, seed, out_metrics, metrics_cap, out_member1,
+                       out_group_means, out_all_member1, NULL);
+}
+
+int em_sweep_k_ex(const double *data_in, int32_t rows, int32_t cols,
+                  const double *Y, double tineq, int32_t k_min, int32_t k_max,
+                  int32_t *out_opt_k, int32_t perms_n, uint64_t seed,
+                  em_k_metric_t *out_metrics, int32_t metrics_cap,
+                  int32_t *out_member1, double *out_group_means,
+                  int32_t *out_all_member1, const em_sweep_opts_t *opts) {
   if (!data_in || !Y || !out_metrics || rows <= 0 || cols <= 0 || k_min < 1 ||
       k_max < k_min || metrics_cap <= 0) {
     return -1;
   }
 
-  int k, ixout;
-  int counter = 0;
-  int best_k_index = 0;
-  double bineq, rs_stat, ch_stat, sstt, sset, perm_mean, perm_p;
-  double best_ch_value = -INFINITY;
-
-  int32_t *member1 = (int32_t *)calloc((unsigned long)rows, sizeof(int32_t));
-  int32_t *best_member1 =
-      (int32_t *)calloc((unsigned long)rows, sizeof(int32_t));
-  double *group_means =
-      (double *)calloc((unsigned long)(k_max * cols), sizeof(double));
-  double *best_group_means =
-      (double *)calloc((unsigned long)(k_max * cols), sizeof(double));
-  double *class_table =
-      (double *)calloc((unsigned long)(rows * (cols + 1)), sizeof(double));
-
-  if (!member1 || !best_member1 || !group_means || !best_group_means ||
-      !class_table) {
-    free(member1);
-    free(best_member1);
-    free(group_means);
-    free(best_group_means);
-    free(class_table);
-    return -1;
+  int32_t count = k_max - k_min + 1;
+  if (count > metrics_cap) {
+    return -3;
   }
 
-  if ((k_max - k_min + 1) > metrics_cap) {
-    free(member1);
-    free(best_member1);
-    free(group_means);
-    free(best_group_means);
-    free(class_table);
-    return -3;
+  em_sweep_opts_t defaults;
+  if (!opts) {
+    em_sweep_opts_default(&defaults);
+    opts = &defaults;
+  }
+  if (opts->warm_start < EM_WARM_START_NONE || opts->warm_start > EM_WARM_START_MERGE ||
+      opts->move_strategy < EM_MOVE_FIRST_IMPROVEMENT ||
+      opts->move_strategy > EM_MOVE_PARALLEL_ROUNDS) {
+    return -1;
   }
+  // A warm start chains the K values, so they run on a single worker
+  int32_t workers = opts->warm_start != EM_WARM_START_NONE
+                        ? 1
+                        : em_parallel_workers(count, opts->threads);
 
-  for (k = k_min; k <= k_max; k++) {
-    ixout = 0;
+  em_sweep_ctx_t ctx;
+  memset(&ctx, 0, sizeof(ctx));
+  ctx.data_in = data_in;
+  ctx.rows = rows;
+  ctx.cols = cols;
+  ctx.Y = Y;
+  ctx.tineq = tineq;
+  ctx.k_min = k_min;
+  ctx.k_max = k_max;
+  ctx.perms_n = perms_n;
+  ctx.seed = seed;
+  // Spare threads (more threads than K values) go to the starts of each K,
+  // the parallel rounds of each start and the permutation test
+  ctx.perm_threads = opts->threads > workers ? opts->threads / workers : 1;
+  ctx.warm_start = opts->warm_start;
+  ctx.move_strategy = opts->move_strategy;
+  ctx.polish = opts->polish;
+  ctx.max_passes = opts->max_passes;
+  ctx.max_seconds_per_k = opts->max_seconds_per_k;
+  ctx.min_rs_gain = opts->min_rs_gain;
+  ctx.stop_when_stale = opts->stop_when_stale;
+  ctx.starts = opts->starts > 1 ? opts->starts : 1;
+  ctx.start_threads = ctx.perm_threads < ctx.starts ? ctx.perm_threads : ctx.starts;
+  ctx.switch_threads = ctx.perm_threads / ctx.start_threads;
+  ctx.slot_member1 = (int32_t *)calloc((size_t)count * (size_t)rows, sizeof(int32_t));
+  ctx.slot_means = (double *)calloc((size_t)count * (size_t)k_max * (size_t)cols, sizeof(double));
+  ctx.slot_metrics = (em_k_metric_t *)calloc((size_t)count, sizeof(em_k_metric_t));
+  ctx.slot_ok = (int *)calloc((size_t)count, sizeof(int));
+  ctx.scratch = (em_sweep_scratch_t *)calloc((size_t)workers, sizeof(em_sweep_scratch_t));
+  ctx.progress = opts->progress;
+  ctx.progress_user = opts->progress_user;
+  ctx.progress_lock = opts->progress ? em_lock_create() : NULL;
+  ctx.start_time = em_monotonic_seconds();
+  if (opts->start_budget_s > 0.0) ctx.deadline = ctx.start_time + opts->start_budget_s;
 
-    if (em_initial_groups(rows, k, member1) != 0) {
-      continue;
+  int alloc_ok = ctx.slot_member1 && ctx.slot_means && ctx.slot_metrics &&
+                 ctx.slot_ok && ctx.scratch && (!ctx.progress || ctx.progress_lock);
+  size_t extra = (size_t)(ctx.starts - 1);
+  for (int32_t w = 0; alloc_ok && w < workers; w++) {
+    em_sweep_scratch_t *s = &ctx.scratch[w];
+    s->class_table = (double *)calloc((size_t)rows * (size_t)(cols + 1), sizeof(double));
+    s->results = (em_start_result_t *)calloc((size_t)ctx.starts, sizeof(em_start_result_t));
+    if (extra > 0) {
+      s->member1 = (int32_t *)malloc(extra * (size_t)rows * sizeof(int32_t));
+      s->means = (double *)malloc(extra * (size_t)k_max * (size_t)cols * sizeof(double));
     }
+    if (!s->class_table || !s->results || (extra > 0 && (!s->member1 || !s->means))) alloc_ok = 0;
+  }
 
-    if (em_switch_groups(data_in, rows, cols, k, tineq, Y, k_min, member1,
-                         &bineq, &rs_stat, &ixout, group_means) != 0) {
-      continue;
-    }
+  int counter = 0;
+  if (alloc_ok) {
+    em_parallel_for(count, workers, sweep_one_k, &ctx);
+  }
+  if (alloc_ok && ctx.cancelled) {
+    counter = EM_ERR_CANCELLED;
+  } else if (alloc_ok) {
 
-    for (int i = 0; i < rows; i++) {
-      class_table[i * (cols + 1)] = (double)member1[i];
-      for (int j = 0; j < cols; j++) {
-        class_table[i * (cols + 1) + j + 1] = data_in[i * cols + j];
-      }
-    }
+    // Collect results in K order so output is identical for any thread count
+    int best_k_index = 0;
+    int best_slot = -1;
+    double best_ch_value = -INFINITY;
+    for (int32_t idx = 0; idx < count; idx++) {
+      if (!ctx.slot_ok[idx]) continue;
 
-    int ch_result = em_ch_stat(class_table, rows, cols, k, perms_n, seed,
-                               &ch_stat, &sstt, &sset, &perm_mean, &perm_p);
+      out_metrics[counter] = ctx.slot_metrics[idx];
+      int k = out_metrics[counter].nGrpDum;
 
-    if (ch_result != 0) {
-      continue;
-    }
+      double comparison_value = out_metrics[counter].fCHDum;
+      if (comparison_value > best_ch_value || (comparison_value == best_ch_value && k < out_metrics[best_k_index].nGrpDum)) {
+        best_ch_value = comparison_value;
+        best_k_index = counter;
+        best_slot = idx;
+      }
 
-    out_metrics[counter].nGrpDum = k;
-    // Align naming: store CH in fCHDum and Rs in fRs; retain SST/SSE
-    out_metrics[counter].fCHDum = ch_stat;
-    out_metrics[counter].fRs = rs_stat;
-    out_metrics[counter].fSST = sstt;
-    out_metrics[counter].fSSE = sset;
-    out_metrics[counter].fBetween = bineq;     // between-region inequality (VB: bineq)
-    out_metrics[counter].fCHP = perm_p;
-    out_metrics[counter].nCounterIndex = perm_mean;
-
-    double comparison_value = ch_stat;
-    if (comparison_value > best_ch_value || (comparison_value == best_ch_value && k < out_metrics[best_k_index].nGrpDum)) {
-      best_ch_value = comparison_value;
-      best_k_index = counter;
-      memcpy(best_member1, member1, (unsigned long)rows * sizeof(int32_t));
-      memcpy(best_group_means, group_means,
-             (unsigned long)k * (unsigned long)cols * sizeof(double));
+      if (out_all_member1) {
+        // Store this k's assignments in block [counter * rows .. +rows)
+        memcpy(out_all_member1 + (size_t)counter * (size_t)rows,
+               ctx.slot_member1 + (size_t)idx * (size_t)rows,
+               (size_t)rows * sizeof(int32_t));
+      }
+      counter++;
     }
 
-    if (out_all_member1) {
-      // Store this k's assignments in block [counter * rows .. +rows)
-      memcpy(out_all_member1 + (size_t)counter * (size_t)rows, member1, (unsigned long)rows * sizeof(int32_t));
+    if (counter > 0) {
+      int best_k = out_metrics[best_k_index].nGrpDum;
+      if (out_opt_k) {
+        *out_opt_k = best_k;
+      }
+      if (out_member1) {
+        memcpy(out_member1, ctx.slot_member1 + (size_t)best_slot * (size_t)rows,
+               (size_t)rows * sizeof(int32_t));
+      }
+      if (out_group_means) {
+        memcpy(out_group_means,
+               ctx.slot_means + (size_t)best_slot * (size_t)k_max * (size_t)cols,
+               (size_t)best_k * (size_t)cols * sizeof(double));
+      }
     }
-    counter++;
-  }
-
-  if (out_opt_k && counter > 0) {
-    *out_opt_k = out_metrics[best_k_index].nGrpDum;
+  } else {
+    counter = -1;
   }
 
-  if (out_member1 && counter > 0) {
-    memcpy(out_member1, best_member1, (unsigned long)rows * sizeof(int32_t));
-  }
-
-  if (out_group_means && counter > 0) {
-    int best_k = out_metrics[best_k_index].nGrpDum;
-    memcpy(out_group_means, best_group_means,
-           (unsigned long)best_k * (unsigned long)cols * sizeof(double));
+  if (ctx.scratch) {
+    for (int32_t w = 0; w < workers; w++) {
+      free(ctx.scratch[w].class_table);
+      free(ctx.scratch[w].member1);
+      free(ctx.scratch[w].means);
+      free(ctx.scratch[w].results);
+    }
   }
-
-  free(member1);
-  free(best_member1);
-  free(group_means);
-  free(best_group_means);
-  free(class_table);
+  free(ctx.scratch);
+  free(ctx.slot_member1);
+  free(ctx.slot_means);
+  free(ctx.slot_metrics);
+  free(ctx.slot_ok);
+  em_lock_destroy(ctx.progress_lock);
 
   return counter;
 }
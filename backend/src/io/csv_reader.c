@@ -0,0 +1,370 @@
+#ifndef _POSIX_C_SOURCE
+#define _POSIX_C_SOURCE 200809L
+#endif
+#include "csv.h"
+
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+#ifdef _WIN32
+#include <windows.h>
+#else
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#endif
+
+// ---------------------------------------------------------------------------
+// File mapping
+
+// Fallback for inputs that cannot be mapped (pipes, special files).
+static int read_whole_file(const char *path, csv_mapped_file_t *out) {
+  FILE *fp = fopen(path, "rb");
+  if (!fp) return -1;
+  size_t cap = 1 << 16, n = 0;
+  char *buf = (char *)malloc(cap);
+  if (!buf) { fclose(fp); return -3; }
+  size_t got;
+  while ((got = fread(buf + n, 1, cap - n, fp)) > 0) {
+    n += got;
+    if (n == cap) {
+      char *bigger = (char *)realloc(buf, cap * 2);
+      if (!bigger) { free(buf); fclose(fp); return -3; }
+      buf = bigger; cap *= 2;
+    }
+  }
+  fclose(fp);
+  out->data = buf; out->size = n; out->owned_ = 1;
+  return 0;
+}
+
+int csv_map_file(const char *path, csv_mapped_file_t *out) {
+  if (!path || !out) return -1;
+  out->data = NULL; out->size = 0; out->owned_ = 0;
+#ifdef _WIN32
+  HANDLE file = CreateFileA(path, GENERIC_READ, FILE_SHARE_READ, NULL, OPEN_EXISTING,
+                            FILE_FLAG_SEQUENTIAL_SCAN, NULL);
+  if (file == INVALID_HANDLE_VALUE) return -1;
+  LARGE_INTEGER size;
+  if (!GetFileSizeEx(file, &size) || (unsigned long long)size.QuadPart > (size_t)-1) {
+    CloseHandle(file);
+    return -1;
+  }
+  if (size.QuadPart == 0) { CloseHandle(file); return 0; }
+  HANDLE mapping = CreateFileMappingA(file, NULL, PAGE_READONLY, 0, 0, NULL);
+  CloseHandle(file);
+  if (!mapping) return read_whole_file(path, out);
+  // The view keeps the mapping alive after its handle is closed
+  const char *view = (const char *)MapViewOfFile(mapping, FILE_MAP_READ, 0, 0, 0);
+  CloseHandle(mapping);
+  if (!view) return read_whole_file(path, out);
+  out->data = view; out->size = (size_t)size.QuadPart;
+  return 0;
+#else
+  int fd = open(path, O_RDONLY);
+  if (fd < 0) return -1;
+  struct stat st;
+  if (fstat(fd, &st) != 0) { close(fd); return -1; }
+  if (!S_ISREG(st.st_mode)) { close(fd); return read_whole_file(path, out); }
+  if (st.st_size == 0) { close(fd); return 0; }
+  void *view = mmap(NULL, (size_t)st.st_size, PROT_READ, MAP_PRIVATE, fd, 0);
+  close(fd);
+  if (view == MAP_FAILED) return read_whole_file(path, out);
+#ifdef POSIX_MADV_SEQUENTIAL
+  posix_madvise(view, (size_t)st.st_size, POSIX_MADV_SEQUENTIAL);
+#endif
+  out->data = (const char *)view; out->size = (size_t)st.st_size;
+  return 0;
+#endif
+}
+
+void csv_unmap_file(csv_mapped_file_t *m) {
+  if (!m || !m->data) return;
+  if (m->owned_) {
+    free((void *)m->data);
+  } else {
+#ifdef _WIN32
+    UnmapViewOfFile(m->data);
+#else
+    munmap((void *)m->data, m->size);
+#endif
+  }
+  m->data = NULL; m->size = 0; m->owned_ = 0;
+}
+
+// ---------------------------------------------------------------------------
+// Field scanner
+
+int csv_next_field(const char **pos, const char *end, csv_field_t *field) {
+  const char *p = *pos;
+  const char *q = p;
+  while (q < end && (*q == ' ' || *q == '\t')) q++;
+  if (q < end && *q == '"') {
+    const char *start = ++q;
+    while (q < end) {
+      if (*q == '"') {
+        if (q + 1 < end && q[1] == '"') { q += 2; continue; }
+        break;
+      }
+      q++;
+    }
+    field->ptr = start; field->len = (size_t)(q - start); field->quoted = 1;
+    if (q < end) q++;  // closing quote
+    // Anything between the closing quote and the delimiter is dropped
+    while (q < end && *q != ',' && *q != '\n' && *q != '\r') q++;
+  } else {
+    q = p;
+    while (q < end && *q != ',' && *q != '\n' && *q != '\r') q++;
+    field->ptr = p; field->len = (size_t)(q - p); field->quoted = 0;
+  }
+  if (q < end && *q == ',') { *pos = q + 1; return 1; }
+  if (q < end && *q == '\r') q++;
+  if (q < end && *q == '\n') q++;
+  *pos = q;
+  return 0;
+}
+
+static int is_space(char c) {
+  return c == ' ' || c == '\t' || c == '\r' || c == '\n';
+}
+
+static void trim_span(const char **p, size_t *len) {
+  const char *s = *p, *e = *p + *len;
+  while (s < e && is_space(*s)) s++;
+  while (e > s && is_space(e[-1])) e--;
+  *p = s; *len = (size_t)(e - s);
+}
+
+char *csv_field_dup(const csv_field_t *f) {
+  const char *s = f->ptr;
+  size_t len = f->len;
+  trim_span(&s, &len);
+  char *copy = (char *)malloc(len + 1);
+  if (!copy) return NULL;
+  size_t n = 0;
+  for (size_t i = 0; i < len; i++) {
+    copy[n++] = s[i];
+    if (f->quoted && s[i] == '"' && i + 1 < len && s[i + 1] == '"') i++;  // "" -> "
+  }
+  copy[n] = '\0';
+  return copy;
+}
+
+// ---------------------------------------------------------------------------
+// Number parsing
+
+static const double kPow10[] = {
+  1e0, 1e1, 1e2, 1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9, 1e10, 1e11,
+  1e12, 1e13, 1e14, 1e15, 1e16, 1e17, 1e18, 1e19, 1e20, 1e21, 1e22
+};
+
+// Plain decimals ([+-]digits[.digits][e[+-]digits]) whose mantissa fits in
+// 53 bits and whose decimal exponent is within +-22: one exact multiply or
+// divide, so the result is correctly rounded and equal to strtod's.
+// Returns the end of the number, or NULL when the text needs the general parser.
+static const char *parse_decimal(const char *p, const char *end, double *out) {
+  int neg = 0;
+  if (p < end && (*p == '+' || *p == '-')) { neg = *p == '-'; p++; }
+  uint64_t mant = 0;
+  int exp10 = 0, any = 0;
+  for (; p < end && *p >= '0' && *p <= '9'; p++) {
+    if (mant > (UINT64_MAX - 9) / 10) return NULL;
+    mant = mant * 10 + (uint64_t)(*p - '0');
+    any = 1;
+  }
+  if (p < end && *p == '.') {
+    for (p++; p < end && *p >= '0' && *p <= '9'; p++) {
+      if (mant > (UINT64_MAX - 9) / 10) return NULL;
+      mant = mant * 10 + (uint64_t)(*p - '0');
+      exp10--;
+      any = 1;
+    }
+  }
+  if (!any) return NULL;
+  if (p < end && (*p == 'e' || *p == 'E')) {
+    int eneg = 0, e = 0;
+    p++;
+    if (p < end && (*p == '+' || *p == '-')) { eneg = *p == '-'; p++; }
+    if (p >= end || *p < '0' || *p > '9') return NULL;
+    for (; p < end && *p >= '0' && *p <= '9'; p++) {
+      if (e > 1000) return NULL;
+      e = e * 10 + (*p - '0');
+    }
+    exp10 += eneg ? -e : e;
+  }
+  if (mant == 0) { *out = neg ? -0.0 : 0.0; return p; }
+  if (mant > ((uint64_t)1 << 53) || exp10 < -22 || exp10 > 22) return NULL;
+  double v = (double)mant;
+  v = exp10 < 0 ? v / kPow10[-exp10] : v * kPow10[exp10];
+  *out = neg ? -v : v;
+  return p;
+}
+
+double csv_field_to_double(const csv_field_t *f) {
+  const char *s = f->ptr;
+  size_t len = f->len;
+  trim_span(&s, &len);
+  if (len == 0) return 0.0;
+  double v;
+  if (parse_decimal(s, s + len, &v) == s + len) return v;
+  // General case (inf/nan, hex, long mantissas, trailing text): strtod on a
+  // NUL-terminated copy, which parses the longest valid prefix like atof
+  char small[64];
+  char *buf = len < sizeof(small) ? small : (char *)malloc(len + 1);
+  if (!buf) return 0.0;
+  memcpy(buf, s, len);
+  buf[len] = '\0';
+  v = strtod(buf, NULL);
+  if (buf != small) free(buf);
+  return v;
+}
+
+// ---------------------------------------------------------------------------
+// Table reader
+
+// Scan and parse an unquoted numeric field in one pass. Returns -1 (leaving
+// *pos alone) when the field needs csv_next_field + csv_field_to_double,
+// otherwise the same value as csv_next_field.
+static int next_number(const char **pos, const char *end, double *out) {
+  const char *p = *pos;
+  while (p < end && (*p == ' ' || *p == '\t')) p++;
+  const char *q = parse_decimal(p, end, out);
+  if (!q) return -1;
+  while (q < end && (*q == ' ' || *q == '\t')) q++;
+  if (q < end && *q == ',') { *pos = q + 1; return 1; }
+  if (q < end && *q != '\r' && *q != '\n') return -1;
+  if (q < end && *q == '\r') q++;
+  if (q < end && *q == '\n') q++;
+  *pos = q;
+  return 0;
+}
+
+static int field_is_blank(const csv_field_t *f) {
+  if (f->quoted) return 0;
+  for (size_t i = 0; i < f->len; i++) {
+    if (!is_space(f->ptr[i])) return 0;
+  }
+  return 1;
+}
+
+static int read_header(const char **pos, const char *end, csv_table_t *out) {
+  csv_field_t f;
+  int more = csv_next_field(pos, end, &f);
+  out->index_name = csv_field_dup(&f);
+  if (!out->index_name) return -3;
+
+  size_t cap = 64;
+  out->colnames = (char **)malloc(cap * sizeof(char *));
+  if (!out->colnames) return -3;
+  while (more) {
+    more = csv_next_field(pos, end, &f);
+    if ((size_t)out->cols == cap) {
+      char **bigger = (char **)realloc(out->colnames, cap * 2 * sizeof(char *));
+      if (!bigger) return -3;
+      out->colnames = bigger; cap *= 2;
+    }
+    char *name = csv_field_dup(&f);
+    if (!name) return -3;
+    out->colnames[out->cols++] = name;
+  }
+  // Trailing delimiters (common in spreadsheet exports) do not add columns
+  while (out->cols > 0 && out->colnames[out->cols - 1][0] == '\0') {
+    free(out->colnames[--out->cols]);
+  }
+  return out->cols > 0 ? 0 : -1;
+}
+
+static int grow_rows(csv_table_t *out, size_t *cap_rows) {
+  size_t new_cap = *cap_rows * 2;
+  if (new_cap > (size_t)INT32_MAX || new_cap > SIZE_MAX / sizeof(double) / (size_t)out->cols) return -3;
+  char **names = (char **)realloc(out->rownames, new_cap * sizeof(char *));
+  if (!names) return -3;
+  out->rownames = names;
+  double *data = (double *)realloc(out->data, new_cap * (size_t)out->cols * sizeof(double));
+  if (!data) return -3;
+  out->data = data;
+  *cap_rows = new_cap;
+  return 0;
+}
+
+static int read_rows(const char *p, const char *end, csv_table_t *out) {
+  const size_t cols = (size_t)out->cols;
+  // Line count is an upper bound on the records left (quoted newlines only lower it)
+  size_t cap_rows = 1;
+  for (const char *q = p; q < end && (q = (const char *)memchr(q, '\n', (size_t)(end - q))) != NULL; q++) {
+    cap_rows++;
+  }
+  if (cap_rows > (size_t)INT32_MAX) cap_rows = (size_t)INT32_MAX;
+  if (cap_rows > SIZE_MAX / sizeof(double) / cols) return -3;
+  out->rownames = (char **)malloc(cap_rows * sizeof(char *));
+  out->data = (double *)malloc(cap_rows * cols * sizeof(double));
+  if (!out->rownames || !out->data) return -3;
+
+  csv_field_t f;
+  while (p < end) {
+    int more = csv_next_field(&p, end, &f);
+    if (!more && field_is_blank(&f)) continue;  // empty line
+    if ((size_t)out->rows == cap_rows && grow_rows(out, &cap_rows) != 0) return -3;
+
+    char *name = csv_field_dup(&f);
+    if (!name) return -3;
+    out->rownames[out->rows] = name;
+    double *dst = out->data + (size_t)out->rows * cols;
+    out->rows++;
+    for (size_t j = 0; j < cols; j++) {
+      if (more) {
+        more = next_number(&p, end, &dst[j]);
+        if (more < 0) {
+          more = csv_next_field(&p, end, &f);
+          dst[j] = csv_field_to_double(&f);
+        }
+      } else {
+        dst[j] = 0.0;  // short row
+      }
+    }
+    while (more) more = csv_next_field(&p, end, &f);  // extra fields are ignored
+  }
+
+  if (out->rows > 0 && (size_t)out->rows < cap_rows) {
+    double *fit = (double *)realloc(out->data, (size_t)out->rows * cols * sizeof(double));
+    if (fit) out->data = fit;
+  }
+  return 0;
+}
+
+int csv_read_table(const char *path, csv_table_t *out) {
+  if (!path || !out) return -1;
+  memset(out, 0, sizeof(*out));
+  csv_mapped_file_t m;
+  int rc = csv_map_file(path, &m);
+  if (rc != 0) return rc;
+
+  const char *p = m.data;
+  const char *end = m.data + m.size;
+  if (m.size >= 3 && memcmp(p, "\xEF\xBB\xBF", 3) == 0) p += 3;  // UTF-8 BOM
+  rc = p < end ? read_header(&p, end, out) : -1;
+  if (rc == 0) rc = read_rows(p, end, out);
+
+  csv_unmap_file(&m);
+  if (rc != 0) csv_free_table(out);
+  return rc;
+}
+
+void csv_free_table(csv_table_t *t) {
+  if (!t) return;
+  free(t->data);
+  if (t->colnames) {
+    for (int32_t i = 0; i < t->cols; i++) free(t->colnames[i]);
+    free(t->colnames);
+  }
+  if (t->rownames) {
+    for (int32_t i = 0; i < t->rows; i++) free(t->rownames[i]);
+    free(t->rownames);
+  }
+  free(t->index_name);
+  t->data = NULL; t->colnames = NULL; t->rownames = NULL; t->index_name = NULL;
+  t->rows = 0; t->cols = 0;
+}
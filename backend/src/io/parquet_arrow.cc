@@ -4,12 +4,16 @@
 #include <arrow/api.h>
 #include <arrow/csv/api.h>
 #include <arrow/io/api.h>
+#include <arrow/util/compression.h>
 #include <parquet/arrow/writer.h>
 #include <parquet/arrow/reader.h>
 
+#include <algorithm>
 #include <memory>
 #include <string>
 #include <fstream>
+#include <unordered_map>
+#include <vector>
 
 extern "C" {
 int em_csv_to_parquet_with_gps(const char *algo_csv_path,
@@ -40,6 +44,284 @@ static arrow::Status ReadCsvToTable(const std::string &csv_path,
 
 extern "C" int parquet_is_available(void) { return 1; }
 
+// Metric columns in CSV order; the permutation pair is appended when requested
+static const char *const kMetricNames[] = {
+    "% explained", "Total inequality", "Between region inequality",
+    "Total sum of squares", "Within group sum of squares",
+    "Calinski-Harabasz pseudo-F statistic",
+    "Permutation mean C-H", "Permutation C-H p-value"};
+
+// Row group size for tables without a natural partition
+static const int64_t kDefaultRowGroup = 65536;
+
+static arrow::Status FinishDoubles(std::vector<double> &&values,
+                                   std::shared_ptr<arrow::Array> *out) {
+  arrow::DoubleBuilder b;
+  ARROW_RETURN_NOT_OK(b.AppendValues(values));
+  return b.Finish(out);
+}
+
+// Build the results table directly from the sweep arrays. Rows are emitted
+// per K, then by group, then in input order -- the same order as the CSV.
+static arrow::Status BuildResultsTable(const em_result_table_t *res,
+                                       std::shared_ptr<arrow::Table> *out) {
+  const int64_t rows = res->rows;
+  const int64_t total = rows * static_cast<int64_t>(res->n_k);
+  const int n_metrics = res->with_permutations ? 8 : 6;
+
+  // Row order: counting sort of samples by group for every K
+  std::vector<int32_t> order(static_cast<size_t>(total));
+  std::vector<int32_t> k_col(static_cast<size_t>(total));
+  std::vector<int32_t> group_col(static_cast<size_t>(total));
+  {
+    int64_t pos = 0;
+    std::vector<int64_t> start;
+    for (int32_t mi = 0; mi < res->n_k; ++mi) {
+      const int32_t k = res->metrics[mi].nGrpDum;
+      const int32_t *member = res->all_member1 + static_cast<size_t>(mi) * static_cast<size_t>(rows);
+      start.assign(static_cast<size_t>(k) + 1, 0);
+      for (int64_t i = 0; i < rows; ++i) {
+        if (member[i] < 0 || member[i] >= k) return arrow::Status::Invalid("group index out of range");
+        start[static_cast<size_t>(member[i]) + 1]++;
+      }
+      for (int32_t g = 0; g < k; ++g) start[static_cast<size_t>(g) + 1] += start[static_cast<size_t>(g)];
+      for (int64_t i = 0; i < rows; ++i) {
+        int64_t at = pos + start[static_cast<size_t>(member[i])]++;
+        order[static_cast<size_t>(at)] = static_cast<int32_t>(i);
+        group_col[static_cast<size_t>(at)] = member[i] + 1;
+        k_col[static_cast<size_t>(at)] = k;
+      }
+      pos += rows;
+    }
+  }
+
+  std::vector<std::shared_ptr<arrow::Field>> fields;
+  std::vector<std::shared_ptr<arrow::Array>> arrays;
+
+  // K, Group
+  {
+    std::shared_ptr<arrow::Array> arr;
+    arrow::Int32Builder kb;
+    ARROW_RETURN_NOT_OK(kb.AppendValues(k_col));
+    ARROW_RETURN_NOT_OK(kb.Finish(&arr));
+    fields.push_back(arrow::field("K", arrow::int32(), false));
+    arrays.push_back(arr);
+    arrow::Int32Builder gb;
+    ARROW_RETURN_NOT_OK(gb.AppendValues(group_col));
+    ARROW_RETURN_NOT_OK(gb.Finish(&arr));
+    fields.push_back(arrow::field("Group", arrow::int32(), false));
+    arrays.push_back(arr);
+  }
+
+  // Sample: one dictionary entry per distinct name, int32 indices per row
+  {
+    std::unordered_map<std::string, int32_t> seen;
+    std::vector<int32_t> sample_code(static_cast<size_t>(rows));
+    arrow::StringBuilder dict_b;
+    for (int64_t i = 0; i < rows; ++i) {
+      const char *name = res->rownames && res->rownames[i] ? res->rownames[i] : "";
+      auto it = seen.emplace(name, static_cast<int32_t>(seen.size()));
+      if (it.second) ARROW_RETURN_NOT_OK(dict_b.Append(name));
+      sample_code[static_cast<size_t>(i)] = it.first->second;
+    }
+    std::shared_ptr<arrow::Array> dict_arr, idx_arr;
+    ARROW_RETURN_NOT_OK(dict_b.Finish(&dict_arr));
+    arrow::Int32Builder idx_b;
+    ARROW_RETURN_NOT_OK(idx_b.Reserve(total));
+    for (int64_t r = 0; r < total; ++r) {
+      idx_b.UnsafeAppend(sample_code[static_cast<size_t>(order[static_cast<size_t>(r)])]);
+    }
+    ARROW_RETURN_NOT_OK(idx_b.Finish(&idx_arr));
+    auto dict_type = arrow::dictionary(arrow::int32(), arrow::utf8());
+    ARROW_ASSIGN_OR_RAISE(auto sample_arr,
+                          arrow::DictionaryArray::FromArrays(dict_type, idx_arr, dict_arr));
+    fields.push_back(arrow::field("Sample", dict_type));
+    arrays.push_back(sample_arr);
+  }
+
+  // Bins (raw input values)
+  for (int32_t j = 0; j < res->cols; ++j) {
+    std::vector<double> v(static_cast<size_t>(total));
+    for (int64_t r = 0; r < total; ++r) {
+      v[static_cast<size_t>(r)] =
+          res->data[static_cast<size_t>(order[static_cast<size_t>(r)]) * static_cast<size_t>(res->cols) +
+                    static_cast<size_t>(j)];
+    }
+    std::shared_ptr<arrow::Array> arr;
+    ARROW_RETURN_NOT_OK(FinishDoubles(std::move(v), &arr));
+    const char *name = res->colnames && res->colnames[j] ? res->colnames[j] : "var";
+    fields.push_back(arrow::field(name, arrow::float64()));
+    arrays.push_back(arr);
+  }
+
+  // Per-K metrics repeated on every row of that K
+  for (int m = 0; m < n_metrics; ++m) {
+    std::vector<double> v(static_cast<size_t>(total));
+    for (int32_t mi = 0; mi < res->n_k; ++mi) {
+      const em_k_metric_t *km = &res->metrics[mi];
+      const double values[8] = {km->fRs, res->tineq, km->fBetween, km->fSST,
+                                km->fSSE, km->fCHDum, km->nCounterIndex, km->fCHP};
+      std::fill(v.begin() + static_cast<ptrdiff_t>(mi) * rows,
+                v.begin() + static_cast<ptrdiff_t>(mi + 1) * rows, values[m]);
+    }
+    std::shared_ptr<arrow::Array> arr;
+    ARROW_RETURN_NOT_OK(FinishDoubles(std::move(v), &arr));
+    fields.push_back(arrow::field(kMetricNames[m], arrow::float64()));
+    arrays.push_back(arr);
+  }
+
+  // latitude, longitude
+  for (int c = 0; c < 2; ++c) {
+    const double *src = c == 0 ? res->lat : res->lon;
+    std::vector<double> v(static_cast<size_t>(total));
+    for (int64_t r = 0; r < total; ++r) {
+      v[static_cast<size_t>(r)] = src ? src[order[static_cast<size_t>(r)]] : -1.0;
+    }
+    std::shared_ptr<arrow::Array> arr;
+    ARROW_RETURN_NOT_OK(FinishDoubles(std::move(v), &arr));
+    fields.push_back(arrow::field(c == 0 ? "latitude" : "longitude", arrow::float64()));
+    arrays.push_back(arr);
+  }
+
+  *out = arrow::Table::Make(arrow::schema(fields), arrays, total);
+  return arrow::Status::OK();
+}
+
+// Normalized layout: samples once, metrics per K, membership rows x K
+static arrow::Status BuildNormalizedTables(const em_result_table_t *res,
+                                           std::shared_ptr<arrow::Table> *samples,
+                                           std::shared_ptr<arrow::Table> *metrics,
+                                           std::shared_ptr<arrow::Table> *membership) {
+  const int64_t rows = res->rows;
+  const int n_metrics = res->with_permutations ? 8 : 6;
+  std::vector<std::shared_ptr<arrow::Field>> fields;
+  std::vector<std::shared_ptr<arrow::Array>> arrays;
+  std::shared_ptr<arrow::Array> arr;
+
+  // Samples: name, coordinates, raw bins
+  {
+    arrow::StringBuilder sb;
+    for (int64_t i = 0; i < rows; ++i) {
+      ARROW_RETURN_NOT_OK(sb.Append(res->rownames && res->rownames[i] ? res->rownames[i] : ""));
+    }
+    ARROW_RETURN_NOT_OK(sb.Finish(&arr));
+    fields.push_back(arrow::field("Sample", arrow::utf8()));
+    arrays.push_back(arr);
+    ARROW_RETURN_NOT_OK(FinishDoubles(std::vector<double>(res->lat, res->lat + rows), &arr));
+    fields.push_back(arrow::field("latitude", arrow::float64()));
+    arrays.push_back(arr);
+    ARROW_RETURN_NOT_OK(FinishDoubles(std::vector<double>(res->lon, res->lon + rows), &arr));
+    fields.push_back(arrow::field("longitude", arrow::float64()));
+    arrays.push_back(arr);
+    for (int32_t j = 0; j < res->cols; ++j) {
+      std::vector<double> v(static_cast<size_t>(rows));
+      for (int64_t i = 0; i < rows; ++i) {
+        v[static_cast<size_t>(i)] =
+            res->data[static_cast<size_t>(i) * static_cast<size_t>(res->cols) + static_cast<size_t>(j)];
+      }
+      ARROW_RETURN_NOT_OK(FinishDoubles(std::move(v), &arr));
+      fields.push_back(arrow::field(res->colnames && res->colnames[j] ? res->colnames[j] : "var",
+                                    arrow::float64()));
+      arrays.push_back(arr);
+    }
+    *samples = arrow::Table::Make(arrow::schema(fields), arrays, rows);
+  }
+
+  // Metrics: one row per K
+  {
+    fields.clear();
+    arrays.clear();
+    arrow::Int32Builder kb;
+    for (int32_t mi = 0; mi < res->n_k; ++mi) ARROW_RETURN_NOT_OK(kb.Append(res->metrics[mi].nGrpDum));
+    ARROW_RETURN_NOT_OK(kb.Finish(&arr));
+    fields.push_back(arrow::field("K", arrow::int32(), false));
+    arrays.push_back(arr);
+    for (int m = 0; m < n_metrics; ++m) {
+      std::vector<double> v(static_cast<size_t>(res->n_k));
+      for (int32_t mi = 0; mi < res->n_k; ++mi) {
+        const em_k_metric_t *km = &res->metrics[mi];
+        const double values[8] = {km->fRs, res->tineq, km->fBetween, km->fSST,
+                                  km->fSSE, km->fCHDum, km->nCounterIndex, km->fCHP};
+        v[static_cast<size_t>(mi)] = values[m];
+      }
+      ARROW_RETURN_NOT_OK(FinishDoubles(std::move(v), &arr));
+      fields.push_back(arrow::field(kMetricNames[m], arrow::float64()));
+      arrays.push_back(arr);
+    }
+    *metrics = arrow::Table::Make(arrow::schema(fields), arrays, res->n_k);
+  }
+
+  // Membership: column "K<k>" holds the 1-based group of every sample
+  {
+    fields.clear();
+    arrays.clear();
+    for (int32_t mi = 0; mi < res->n_k; ++mi) {
+      const int32_t *member = res->all_member1 + static_cast<size_t>(mi) * static_cast<size_t>(rows);
+      arrow::Int32Builder gb;
+      ARROW_RETURN_NOT_OK(gb.Reserve(rows));
+      for (int64_t i = 0; i < rows; ++i) gb.UnsafeAppend(member[i] + 1);
+      ARROW_RETURN_NOT_OK(gb.Finish(&arr));
+      fields.push_back(arrow::field("K" + std::to_string(res->metrics[mi].nGrpDum), arrow::int32(), false));
+      arrays.push_back(arr);
+    }
+    *membership = arrow::Table::Make(arrow::schema(fields), arrays, rows);
+  }
+  return arrow::Status::OK();
+}
+
+// chunk_size is the row group size. The wide table passes the number of
+// samples so that every K lands in its own row group; with column statistics
+// (min/max of K) readers can skip the other Ks entirely.
+static int WriteParquetFile(const arrow::Table &table, const char *path, int64_t chunk_size) {
+  auto open_res = arrow::io::FileOutputStream::Open(path);
+  if (!open_res.ok()) return -3;
+  auto sink = *open_res;
+
+  parquet::WriterProperties::Builder builder;
+  builder.enable_statistics();
+  if (arrow::util::Codec::IsAvailable(arrow::Compression::SNAPPY)) {
+    builder.compression(parquet::Compression::SNAPPY);
+  }
+  // store_schema keeps Sample as a dictionary column when read back by Arrow
+  auto arrow_props = parquet::ArrowWriterProperties::Builder().store_schema()->build();
+  auto st = parquet::arrow::WriteTable(table, arrow::default_memory_pool(), sink,
+                                       chunk_size, builder.build(), arrow_props);
+  if (!st.ok()) return -4;
+  if (!sink->Close().ok()) return -5;
+  return 0;
+}
+
+static int ValidResults(const em_result_table_t *res) {
+  return res && res->data && res->metrics && res->all_member1 && res->rows > 0 &&
+         res->cols > 0 && res->n_k > 0;
+}
+
+extern "C" int em_write_results_parquet(const char *out_parquet_path,
+                                        const em_result_table_t *res) {
+  if (!out_parquet_path || !ValidResults(res)) return -1;
+
+  std::shared_ptr<arrow::Table> table;
+  if (!BuildResultsTable(res, &table).ok()) return -2;
+  // Rows are already sorted by K, then group: one row group per K
+  return WriteParquetFile(*table, out_parquet_path, res->rows);
+}
+
+extern "C" int em_write_normalized_parquet(const char *samples_path, const char *metrics_path,
+                                           const char *membership_path,
+                                           const em_result_table_t *res) {
+  if (!samples_path || !metrics_path || !membership_path || !ValidResults(res) ||
+      !res->lat || !res->lon) {
+    return -1;
+  }
+
+  std::shared_ptr<arrow::Table> samples, metrics, membership;
+  if (!BuildNormalizedTables(res, &samples, &metrics, &membership).ok()) return -2;
+  int rc = WriteParquetFile(*samples, samples_path, kDefaultRowGroup);
+  if (rc == 0) rc = WriteParquetFile(*metrics, metrics_path, kDefaultRowGroup);
+  if (rc == 0) rc = WriteParquetFile(*membership, membership_path, kDefaultRowGroup);
+  return rc;
+}
+
 extern "C" int parquet_write_table(const char *path, const double *data, int32_t rows, int32_t cols,
                         const char *const *colnames, const char *const *rownames) {
   (void)data; (void)rows; (void)cols; (void)colnames; (void)rownames; (void)path;
@@ -227,6 +509,8 @@ int parquet_is_available(void) { return 0; }
 int parquet_write_table(const char*, const double*, int32_t, int32_t, const char* const*, const char* const*) { return -1; }
 int em_csv_to_parquet_with_gps(const char*, const char*, const char*) { return -1; }
 int em_csv_to_both_with_gps(const char*, const char*, const char*, const char*) { return -1; }
+int em_write_results_parquet(const char*, const em_result_table_t*) { return -1; }
+int em_write_normalized_parquet(const char*, const char*, const char*, const em_result_table_t*) { return -1; }
 #endif
 
 
@@ -9,6 +9,17 @@ int parquet_write_table(const char *path, const double *data, int32_t rows, int3
 
 int parquet_is_available(void) { return 0; }
 
+int em_write_results_parquet(const char *out_parquet_path, const em_result_table_t *res) {
+  (void)out_parquet_path; (void)res;
+  return -1; // stub: Parquet output requires the Arrow build (parquet_arrow.cc)
+}
+
+int em_write_normalized_parquet(const char *samples_path, const char *metrics_path,
+                                const char *membership_path, const em_result_table_t *res) {
+  (void)samples_path; (void)metrics_path; (void)membership_path; (void)res;
+  return -1;
+}
+
 int parquet_write_from_csv_buffer(const char *path, const char *csv_buffer, size_t csv_size) {
   (void)path; (void)csv_buffer; (void)csv_size;
   return -1;
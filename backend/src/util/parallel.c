@@ -0,0 +1,184 @@
+#ifndef _POSIX_C_SOURCE
+#define _POSIX_C_SOURCE 200809L
+#endif
+#include "parallel.h"
+
+#include <stdlib.h>
+
+#ifdef _WIN32
+#include <windows.h>
+#include <process.h>
+typedef CRITICAL_SECTION em_mutex_t;
+#define em_mutex_init(m) InitializeCriticalSection(m)
+#define em_mutex_destroy(m) DeleteCriticalSection(m)
+#define em_mutex_lock(m) EnterCriticalSection(m)
+#define em_mutex_unlock(m) LeaveCriticalSection(m)
+#else
+#include <pthread.h>
+#include <time.h>
+#include <unistd.h>
+typedef pthread_mutex_t em_mutex_t;
+#define em_mutex_init(m) pthread_mutex_init(m, NULL)
+#define em_mutex_destroy(m) pthread_mutex_destroy(m)
+#define em_mutex_lock(m) pthread_mutex_lock(m)
+#define em_mutex_unlock(m) pthread_mutex_unlock(m)
+#endif
+
+typedef struct {
+  em_task_fn fn;
+  void *ctx;
+  int32_t n_tasks;
+  int32_t next;
+  em_mutex_t lock;
+} em_pool_t;
+
+typedef struct {
+  em_pool_t *pool;
+  int32_t worker;
+} em_worker_arg_t;
+
+int32_t em_hardware_threads(void) {
+#ifdef _WIN32
+  SYSTEM_INFO info;
+  GetSystemInfo(&info);
+  return info.dwNumberOfProcessors > 0 ? (int32_t)info.dwNumberOfProcessors : 1;
+#else
+  long n = sysconf(_SC_NPROCESSORS_ONLN);
+  return n > 0 ? (int32_t)n : 1;
+#endif
+}
+
+int32_t em_resolve_threads(int32_t requested) {
+  return requested > 0 ? requested : em_hardware_threads();
+}
+
+int32_t em_parallel_workers(int32_t n_tasks, int32_t n_threads) {
+  if (n_threads <= 1 || n_tasks <= 1) return 1;
+  return n_threads < n_tasks ? n_threads : n_tasks;
+}
+
+static int32_t next_task(em_pool_t *pool) {
+  int32_t task = -1;
+  em_mutex_lock(&pool->lock);
+  if (pool->next < pool->n_tasks) task = pool->next++;
+  em_mutex_unlock(&pool->lock);
+  return task;
+}
+
+static void run_worker(em_pool_t *pool, int32_t worker) {
+  int32_t task;
+  while ((task = next_task(pool)) >= 0) {
+    pool->fn(pool->ctx, task, worker);
+  }
+}
+
+#ifdef _WIN32
+static unsigned __stdcall worker_main(void *arg) {
+  em_worker_arg_t *wa = (em_worker_arg_t *)arg;
+  run_worker(wa->pool, wa->worker);
+  return 0;
+}
+#else
+static void *worker_main(void *arg) {
+  em_worker_arg_t *wa = (em_worker_arg_t *)arg;
+  run_worker(wa->pool, wa->worker);
+  return NULL;
+}
+#endif
+
+int em_parallel_for(int32_t n_tasks, int32_t n_threads, em_task_fn fn, void *ctx) {
+  if (!fn || n_tasks < 0) return -1;
+  if (n_tasks == 0) return 0;
+
+  int32_t workers = em_parallel_workers(n_tasks, n_threads);
+  if (workers <= 1) {
+    for (int32_t t = 0; t < n_tasks; t++) fn(ctx, t, 0);
+    return 0;
+  }
+
+  em_pool_t pool;
+  pool.fn = fn;
+  pool.ctx = ctx;
+  pool.n_tasks = n_tasks;
+  pool.next = 0;
+  em_mutex_init(&pool.lock);
+
+  em_worker_arg_t *args = (em_worker_arg_t *)calloc((size_t)workers, sizeof(em_worker_arg_t));
+#ifdef _WIN32
+  HANDLE *handles = (HANDLE *)calloc((size_t)workers, sizeof(HANDLE));
+#else
+  pthread_t *handles = (pthread_t *)calloc((size_t)workers, sizeof(pthread_t));
+#endif
+  int *started = (int *)calloc((size_t)workers, sizeof(int));
+
+  if (args && handles && started) {
+    for (int32_t w = 1; w < workers; w++) {
+      args[w].pool = &pool;
+      args[w].worker = w;
+#ifdef _WIN32
+      handles[w] = (HANDLE)_beginthreadex(NULL, 0, worker_main, &args[w], 0, NULL);
+      started[w] = handles[w] != 0;
+#else
+      started[w] = pthread_create(&handles[w], NULL, worker_main, &args[w]) == 0;
+#endif
+    }
+  }
+
+  // The caller is worker 0; it also drains anything a failed thread would have taken
+  run_worker(&pool, 0);
+
+  if (args && handles && started) {
+    for (int32_t w = 1; w < workers; w++) {
+      if (!started[w]) continue;
+#ifdef _WIN32
+      WaitForSingleObject(handles[w], INFINITE);
+      CloseHandle(handles[w]);
+#else
+      pthread_join(handles[w], NULL);
+#endif
+    }
+  }
+
+  free(args);
+  free(handles);
+  free(started);
+  em_mutex_destroy(&pool.lock);
+  return 0;
+}
+
+struct em_lock {
+  em_mutex_t mutex;
+};
+
+em_lock_t *em_lock_create(void) {
+  em_lock_t *lock = (em_lock_t *)malloc(sizeof(em_lock_t));
+  if (lock) em_mutex_init(&lock->mutex);
+  return lock;
+}
+
+void em_lock_destroy(em_lock_t *lock) {
+  if (!lock) return;
+  em_mutex_destroy(&lock->mutex);
+  free(lock);
+}
+
+void em_lock_acquire(em_lock_t *lock) {
+  em_mutex_lock(&lock->mutex);
+}
+
+void em_lock_release(em_lock_t *lock) {
+  em_mutex_unlock(&lock->mutex);
+}
+
+double em_monotonic_seconds(void) {
+#ifdef _WIN32
+  LARGE_INTEGER freq, now;
+  QueryPerformanceFrequency(&freq);
+  QueryPerformanceCounter(&now);
+  return (double)now.QuadPart / (double)freq.QuadPart;
+#else
+  struct timespec ts;
+  clock_gettime(CLOCK_MONOTONIC, &ts);
+  return (double)ts.tv_sec + (double)ts.tv_nsec * 1e-9;
+#endif
+}
@@ -1,3 +1,415 @@
-// Minimal regression smoke: build only (placeholder for future unit tests)
-int main(void) { return 0; }
+// Minimal regression checks for the backend library
+#include <math.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
 
+#include "csv.h"
+#include "group_state.h"
+#include "grouping.h"
+#include "metrics.h"
+#include "sweep.h"
+
+#define ROWS 24
+#define COLS 6
+
+static int failures = 0;
+
+#define CHECK(cond, msg)                                              \
+  do {                                                                \
+    if (!(cond)) {                                                    \
+      fprintf(stderr, "FAIL %s:%d: %s\n", __FILE__, __LINE__, msg);   \
+      failures++;                                                     \
+    }                                                                 \
+  } while (0)
+
+static void fill_data(double *data) {
+  uint64_t s = 0x2545F4914F6CDD1Dull;
+  for (int i = 0; i < ROWS * COLS; i++) {
+    s ^= s << 13; s ^= s >> 7; s ^= s << 17;
+    data[i] = (double)(s % 1000) / 10.0 + ((i / COLS) % 3 == i % COLS ? 40.0 : 0.0);
+  }
+}
+
+// Delta scores must agree with a full between-inequality rescan.
+static void test_group_state_delta(void) {
+  double data[ROWS * COLS], Y[COLS], tineq = 0.0;
+  int32_t member1[ROWS];
+  const int32_t k = 4;
+  fill_data(data);
+  em_total_inequality(data, ROWS, COLS, Y, &tineq);
+  em_initial_groups(ROWS, k, member1);
+
+  em_group_state_t st;
+  CHECK(em_group_state_init(&st, data, ROWS, COLS, k, Y, member1) == 0, "init");
+
+  double base = 0.0;
+  em_between_inequality(data, ROWS, COLS, k, member1, Y, &base);
+  CHECK(fabs(em_group_state_bineq(&st) - base) < 1e-9 * fabs(tineq), "cached bineq");
+
+  for (int32_t s = 0; s < ROWS; s++) {
+    for (int32_t g = 0; g < k; g++) {
+      int32_t from = member1[s];
+      if (g == from) continue;
+      double delta = 0.0, trial = 0.0;
+      em_group_state_delta(&st, s, from, g, &delta, NULL, NULL);
+      member1[s] = g;
+      em_between_inequality(data, ROWS, COLS, k, member1, Y, &trial);
+      member1[s] = from;
+      CHECK(fabs((trial - base) - delta) < 1e-9 * fabs(tineq), "delta vs rescan");
+    }
+  }
+  em_group_state_free(&st);
+}
+
+// The optimiser must report figures for the assignment it returns.
+static void test_switch_groups_consistent(void) {
+  double data[ROWS * COLS], Y[COLS], means[4 * COLS], tineq = 0.0;
+  int32_t member1[ROWS];
+  const int32_t k = 4;
+  fill_data(data);
+  em_total_inequality(data, ROWS, COLS, Y, &tineq);
+  em_initial_groups(ROWS, k, member1);
+
+  double bineq = 0.0, rs = 0.0, check = 0.0;
+  int32_t ix = 0;
+  CHECK(em_switch_groups(data, ROWS, COLS, k, tineq, Y, 2, member1, &bineq, &rs,
+                         &ix, means) == 0, "switch groups");
+  em_between_inequality(data, ROWS, COLS, k, member1, Y, &check);
+  CHECK(bineq == check, "final bineq matches rescan");
+  CHECK(rs > 0.0 && rs <= 100.0, "rs in range");
+}
+
+// Permutation results must not depend on the number of worker threads.
+static void test_ch_permutations_thread_invariant(void) {
+  double data[ROWS * COLS], table[ROWS * (COLS + 1)];
+  int32_t member1[ROWS];
+  const int32_t k = 3;
+  fill_data(data);
+  em_initial_groups(ROWS, k, member1);
+  for (int i = 0; i < ROWS; i++) {
+    table[i * (COLS + 1)] = member1[i];
+    for (int j = 0; j < COLS; j++) table[i * (COLS + 1) + j + 1] = data[i * COLS + j];
+  }
+
+  double ch = 0.0, sst = 0.0, sse = 0.0, unused = 0.0;
+  em_ch_stat(table, ROWS, COLS, k, 0, 0, &ch, &sst, &sse, &unused, &unused);
+
+  double mean1 = 0.0, p1 = 0.0, mean4 = 0.0, p4 = 0.0;
+  CHECK(em_ch_permutation_test(table, ROWS, COLS, k, ch, 199, 42u, 1, &mean1, &p1) == 0,
+        "permutations serial");
+  CHECK(em_ch_permutation_test(table, ROWS, COLS, k, ch, 199, 42u, 4, &mean4, &p4) == 0,
+        "permutations threaded");
+  CHECK(mean1 == mean4 && p1 == p4, "thread-invariant permutation results");
+  CHECK(mean1 > 0.0 && p1 >= 0.0 && p1 <= 1.0, "permutation outputs in range");
+}
+
+static int groups_populated(const int32_t *member1, int32_t k) {
+  int32_t counts[ROWS] = {0};
+  for (int i = 0; i < ROWS; i++) {
+    if (member1[i] < 0 || member1[i] >= k) return 0;
+    counts[member1[i]]++;
+  }
+  for (int32_t g = 0; g < k; g++) {
+    if (counts[g] == 0) return 0;
+  }
+  return 1;
+}
+
+// Warm starts must hand the optimiser a valid grouping with the right K, and
+// warm sweeps must stay independent of the thread count.
+static void test_warm_start(void) {
+  double data[ROWS * COLS], Y[COLS], tineq = 0.0;
+  int32_t member1[ROWS], next[ROWS];
+  fill_data(data);
+  em_total_inequality(data, ROWS, COLS, Y, &tineq);
+  em_initial_groups(ROWS, 3, member1);
+
+  CHECK(em_split_groups(data, ROWS, COLS, 3, Y, member1, next) == 0, "split groups");
+  CHECK(groups_populated(next, 4), "split gives 4 populated groups");
+  CHECK(em_merge_groups(data, ROWS, COLS, 3, Y, member1, next) == 0, "merge groups");
+  CHECK(groups_populated(next, 2), "merge gives 2 populated groups");
+
+  const int32_t k_min = 2, k_max = 6, count = k_max - k_min + 1;
+  em_k_metric_t m1[5], m4[5];
+  int32_t all1[5 * ROWS], all4[5 * ROWS], opt1 = 0, opt4 = 0;
+  for (int mode = EM_WARM_START_SPLIT; mode <= EM_WARM_START_MERGE; mode++) {
+    em_sweep_opts_t opts;
+    em_sweep_opts_default(&opts);
+    opts.warm_start = mode;
+    CHECK(em_sweep_k_ex(data, ROWS, COLS, Y, tineq, k_min, k_max, &opt1, 0, 42u,
+                        m1, count, NULL, NULL, all1, &opts) == count, "warm sweep serial");
+    opts.threads = 4;
+    CHECK(em_sweep_k_ex(data, ROWS, COLS, Y, tineq, k_min, k_max, &opt4, 0, 42u,
+                        m4, count, NULL, NULL, all4, &opts) == count, "warm sweep threaded");
+    CHECK(opt1 == opt4 && memcmp(all1, all4, sizeof(all1)) == 0, "thread-invariant warm sweep");
+    for (int32_t i = 0; i < count; i++) {
+      CHECK(groups_populated(all1 + i * ROWS, k_min + i), "warm sweep groupings valid");
+      CHECK(m1[i].fRs > 0.0 && m1[i].fRs <= 100.0, "warm sweep rs in range");
+    }
+  }
+}
+
+// Seeded starts must be valid and reproducible, and the best of several
+// starts must never lose to the legacy start or depend on the thread count.
+static void test_multi_start(void) {
+  double data[ROWS * COLS], Y[COLS], tineq = 0.0;
+  int32_t seeded[ROWS], again[ROWS];
+  fill_data(data);
+  em_total_inequality(data, ROWS, COLS, Y, &tineq);
+
+  CHECK(em_seed_groups(data, ROWS, COLS, 5, 7u, seeded) == 0, "seed groups");
+  CHECK(groups_populated(seeded, 5), "seeded groups populated");
+  em_seed_groups(data, ROWS, COLS, 5, 7u, again);
+  CHECK(memcmp(seeded, again, sizeof(seeded)) == 0, "seeded groups deterministic");
+  CHECK(em_seed_groups(data, ROWS, COLS, ROWS, 7u, seeded) == 0 &&
+            groups_populated(seeded, ROWS), "one row per seeded group");
+  CHECK(em_seed_groups(data, ROWS, COLS, ROWS + 1, 7u, seeded) == -1, "more groups than rows");
+
+  const int32_t k_min = 2, k_max = 6, count = k_max - k_min + 1;
+  em_k_metric_t m0[5], m1[5], m4[5];
+  int32_t all1[5 * ROWS], all4[5 * ROWS], opt = 0;
+  em_sweep_opts_t opts;
+  em_sweep_opts_default(&opts);
+  CHECK(em_sweep_k_ex(data, ROWS, COLS, Y, tineq, k_min, k_max, &opt, 0, 42u,
+                      m0, count, NULL, NULL, NULL, &opts) == count, "single-start sweep");
+  opts.starts = 6;
+  CHECK(em_sweep_k_ex(data, ROWS, COLS, Y, tineq, k_min, k_max, &opt, 0, 42u,
+                      m1, count, NULL, NULL, all1, &opts) == count, "multi-start sweep serial");
+  opts.threads = 16;
+  CHECK(em_sweep_k_ex(data, ROWS, COLS, Y, tineq, k_min, k_max, &opt, 0, 42u,
+                      m4, count, NULL, NULL, all4, &opts) == count, "multi-start sweep threaded");
+  CHECK(memcmp(all1, all4, sizeof(all1)) == 0, "thread-invariant multi-start sweep");
+  for (int32_t i = 0; i < count; i++) {
+    CHECK(m1[i].fRs >= m0[i].fRs, "best start never worse than the legacy start");
+    CHECK(groups_populated(all1 + i * ROWS, k_min + i), "multi-start groupings valid");
+  }
+
+  // An exhausted budget leaves only the legacy start
+  opts.threads = 1;
+  opts.start_budget_s = 1e-9;
+  CHECK(em_sweep_k_ex(data, ROWS, COLS, Y, tineq, k_min, k_max, &opt, 0, 42u,
+                      m1, count, NULL, NULL, NULL, &opts) == count, "budgeted sweep");
+  for (int32_t i = 0; i < count; i++) {
+    CHECK(m1[i].fRs == m0[i].fRs, "budgeted sweep keeps the legacy start");
+  }
+}
+
+// The batched best move must match the best single delta, and the
+// best-improvement optimiser must return a consistent local optimum.
+static void test_best_improvement(void) {
+  double data[ROWS * COLS], Y[COLS], means[4 * COLS], tineq = 0.0;
+  int32_t member1[ROWS];
+  const int32_t k = 4;
+  fill_data(data);
+  em_total_inequality(data, ROWS, COLS, Y, &tineq);
+  em_initial_groups(ROWS, k, member1);
+
+  em_group_state_t st;
+  em_group_state_init(&st, data, ROWS, COLS, k, Y, member1);
+  for (int32_t s = 0; s < ROWS; s++) {
+    int32_t from = member1[s], to = -1, expect = -1;
+    double best = 0.0, delta = 0.0;
+    for (int32_t g = 0; g < k; g++) {
+      if (g == from) continue;
+      em_group_state_delta(&st, s, from, g, &delta, NULL, NULL);
+      if (expect < 0 || delta > best) { expect = g; best = delta; }
+    }
+    CHECK(em_group_state_best_move(&st, s, from, &to, &delta, NULL, NULL) == 0, "best move");
+    CHECK(to == expect && fabs(delta - best) < 1e-9 * fabs(tineq), "best move vs deltas");
+  }
+  em_group_state_free(&st);
+
+  em_switch_opts_t sw;
+  em_switch_opts_default(&sw);
+  sw.strategy = EM_MOVE_BEST_IMPROVEMENT;
+  double bineq = 0.0, rs = 0.0, check = 0.0;
+  int32_t ix = 0;
+  CHECK(em_switch_groups_ex(data, ROWS, COLS, k, tineq, Y, 2, member1, &bineq, &rs,
+                            &ix, means, &sw) == 0, "best-improvement switch");
+  em_between_inequality(data, ROWS, COLS, k, member1, Y, &check);
+  CHECK(bineq == check && groups_populated(member1, k), "best-improvement result consistent");
+
+  // No single move improves the result any more
+  em_group_state_init(&st, data, ROWS, COLS, k, Y, member1);
+  double tol = EM_DELTA_REL_TOL * em_group_state_scale(&st, tineq);
+  for (int32_t s = 0; s < ROWS; s++) {
+    int32_t to = -1;
+    double delta = 0.0;
+    em_group_state_best_move(&st, s, member1[s], &to, &delta, NULL, NULL);
+    CHECK(to < 0 || delta <= tol, "best-improvement local optimum");
+  }
+  em_group_state_free(&st);
+
+  sw.strategy = 7;
+  CHECK(em_switch_groups_ex(data, ROWS, COLS, k, tineq, Y, 2, member1, &bineq, &rs,
+                            &ix, means, &sw) == -1, "unknown strategy rejected");
+}
+
+// Parallel rounds must not depend on the thread count, never lower RS, and
+// end in a local optimum; polishing may only improve on them.
+static void test_parallel_rounds(void) {
+  enum { N = 700, K = 6 };
+  static double data[N * COLS];
+  static int32_t start[N], m1[N], m4[N], polished[N];
+  double Y[COLS], means[K * COLS], tineq = 0.0;
+  uint64_t s = 0x9E3779B97F4A7C15ull;
+  for (int i = 0; i < N * COLS; i++) {
+    s ^= s << 13; s ^= s >> 7; s ^= s << 17;
+    data[i] = (double)(s % 1000) / 10.0 + ((i / COLS) % 4 == i % COLS ? 30.0 : 0.0);
+  }
+  em_total_inequality(data, N, COLS, Y, &tineq);
+  em_initial_groups(N, K, start);
+
+  double bineq0 = 0.0, rs0 = 0.0, bineq = 0.0, rs1 = 0.0, rs4 = 0.0, rsp = 0.0;
+  int ix = 0;
+  em_between_inequality(data, N, COLS, K, start, Y, &bineq0);
+  em_rs_stat(tineq, bineq0, &rs0, &ix);
+
+  em_switch_opts_t sw;
+  em_switch_opts_default(&sw);
+  sw.strategy = EM_MOVE_PARALLEL_ROUNDS;
+  sw.threads = 1;
+  memcpy(m1, start, sizeof(start));
+  CHECK(em_switch_groups_ex(data, N, COLS, K, tineq, Y, 2, m1, &bineq, &rs1, &ix,
+                            means, &sw) == 0, "parallel rounds serial");
+  sw.threads = 4;
+  memcpy(m4, start, sizeof(start));
+  CHECK(em_switch_groups_ex(data, N, COLS, K, tineq, Y, 2, m4, &bineq, &rs4, &ix,
+                            means, &sw) == 0, "parallel rounds threaded");
+  CHECK(memcmp(m1, m4, sizeof(m1)) == 0 && rs1 == rs4, "thread-invariant parallel rounds");
+  CHECK(rs1 > rs0 && groups_populated(m1, K), "parallel rounds improve RS");
+
+  em_group_state_t st;
+  em_group_state_init(&st, data, N, COLS, K, Y, m1);
+  double tol = EM_DELTA_REL_TOL * em_group_state_scale(&st, tineq);
+  for (int32_t r = 0; r < N; r++) {
+    int32_t to = -1;
+    double delta = 0.0;
+    em_group_state_best_move(&st, r, m1[r], &to, &delta, NULL, NULL);
+    CHECK(to < 0 || delta <= tol, "parallel rounds local optimum");
+  }
+  em_group_state_free(&st);
+
+  sw.polish = 1;
+  memcpy(polished, start, sizeof(start));
+  CHECK(em_switch_groups_ex(data, N, COLS, K, tineq, Y, 2, polished, &bineq, &rsp, &ix,
+                            means, &sw) == 0, "polished parallel rounds");
+  CHECK(rsp >= rs1, "polish never lowers RS");
+}
+
+// Budgets must stop the optimiser and say why; stopping at the first stale
+// pass must keep the legacy grouping.
+static void test_convergence_budgets(void) {
+  double data[ROWS * COLS], Y[COLS], means[5 * COLS], tineq = 0.0;
+  int32_t legacy[ROWS], stale[ROWS], capped[ROWS];
+  double bineq = 0.0, rs_legacy = 0.0, rs_stale = 0.0, rs_capped = 0.0;
+  int ix = 0;
+  const int32_t k = 5;
+  fill_data(data);
+  em_total_inequality(data, ROWS, COLS, Y, &tineq);
+
+  em_switch_stats_t legacy_stats, stats;
+  em_switch_opts_t sw;
+  em_switch_opts_default(&sw);
+  sw.stats = &legacy_stats;
+  em_initial_groups(ROWS, k, legacy);
+  CHECK(em_switch_groups_ex(data, ROWS, COLS, k, tineq, Y, 2, legacy, &bineq, &rs_legacy,
+                            &ix, means, &sw) == 0, "legacy switch with stats");
+  CHECK(legacy_stats.stop == EM_STOP_CONVERGED && legacy_stats.passes >= 3, "legacy converges");
+
+  sw.stats = &stats;
+  sw.stop_when_stale = 1;
+  em_initial_groups(ROWS, k, stale);
+  CHECK(em_switch_groups_ex(data, ROWS, COLS, k, tineq, Y, 2, stale, &bineq, &rs_stale,
+                            &ix, means, &sw) == 0, "stop when stale");
+  CHECK(memcmp(legacy, stale, sizeof(legacy)) == 0 && rs_stale == rs_legacy,
+        "stale stop keeps the legacy grouping");
+  CHECK(stats.passes == legacy_stats.passes - 2 && stats.moves == legacy_stats.moves &&
+            stats.stop == EM_STOP_CONVERGED, "stale stop saves two passes");
+
+  sw.stop_when_stale = 0;
+  sw.max_passes = 1;
+  em_initial_groups(ROWS, k, capped);
+  CHECK(em_switch_groups_ex(data, ROWS, COLS, k, tineq, Y, 2, capped, &bineq, &rs_capped,
+                            &ix, means, &sw) == 0, "pass budget");
+  CHECK(stats.passes == 1 && stats.stop == EM_STOP_MAX_PASSES, "pass budget stops");
+  CHECK(rs_capped <= rs_legacy && groups_populated(capped, k), "pass budget result valid");
+
+  sw.max_passes = 0;
+  sw.min_rs_gain = 1e9;
+  em_initial_groups(ROWS, k, capped);
+  CHECK(em_switch_groups_ex(data, ROWS, COLS, k, tineq, Y, 2, capped, &bineq, &rs_capped,
+                            &ix, means, &sw) == 0 && stats.passes == 1 &&
+            stats.stop == EM_STOP_MIN_GAIN, "minimum gain stops");
+
+  sw.min_rs_gain = 0.0;
+  sw.max_seconds = 1e-9;
+  em_initial_groups(ROWS, k, capped);
+  CHECK(em_switch_groups_ex(data, ROWS, COLS, k, tineq, Y, 2, capped, &bineq, &rs_capped,
+                            &ix, means, &sw) == 0 && stats.passes == 1 &&
+            stats.stop == EM_STOP_TIME, "time budget stops");
+
+  // The sweep records each K's stop reason and passes
+  const int32_t k_min = 2, k_max = 6, count = k_max - k_min + 1;
+  em_k_metric_t m0[5], m1[5];
+  int32_t opt = 0;
+  em_sweep_opts_t opts;
+  em_sweep_opts_default(&opts);
+  CHECK(em_sweep_k_ex(data, ROWS, COLS, Y, tineq, k_min, k_max, &opt, 0, 42u,
+                      m0, count, NULL, NULL, NULL, &opts) == count, "unbudgeted sweep");
+  opts.max_passes = 1;
+  opts.starts = 3;
+  CHECK(em_sweep_k_ex(data, ROWS, COLS, Y, tineq, k_min, k_max, &opt, 0, 42u,
+                      m1, count, NULL, NULL, NULL, &opts) == count, "pass-budgeted sweep");
+  for (int32_t i = 0; i < count; i++) {
+    CHECK(m0[i].nStop == EM_STOP_CONVERGED && m0[i].nPasses >= 3, "sweep metric converged");
+    CHECK(m1[i].nPasses == 1 &&
+              (m1[i].nStop == EM_STOP_MAX_PASSES || m1[i].nStop == EM_STOP_CONVERGED),
+          "sweep metric records the pass budget");
+  }
+}
+
+// Quoted fields, CRLF/CR endings, blank and short rows, trailing header comma.
+static void test_csv_read_table(void) {
+  const char *path = "test_csv_read_table.csv";
+  FILE *fp = fopen(path, "wb");
+  CHECK(fp != NULL, "create csv");
+  if (!fp) return;
+  fputs("\xEF\xBB\xBFSample,\"0.1,0.2\", 0.5 ,\r\n"
+        "\"S \"\"a\"\"\",1.25,-3e2\r\n"
+        "\r\n"
+        " S2 ,\"7\"\rS3,0.1\n", fp);
+  fclose(fp);
+
+  csv_table_t t;
+  CHECK(csv_read_table(path, &t) == 0, "read csv");
+  CHECK(t.rows == 3 && t.cols == 2, "csv shape");
+  if (t.rows == 3 && t.cols == 2) {
+    CHECK(strcmp(t.index_name, "Sample") == 0, "index name");
+    CHECK(strcmp(t.colnames[0], "0.1,0.2") == 0 && strcmp(t.colnames[1], "0.5") == 0, "colnames");
+    CHECK(strcmp(t.rownames[0], "S \"a\"") == 0 && strcmp(t.rownames[1], "S2") == 0, "rownames");
+    CHECK(t.data[0] == 1.25 && t.data[1] == -300.0, "row 0 values");
+    CHECK(t.data[2] == 7.0 && t.data[3] == 0.0, "quoted value, short row");
+    CHECK(t.data[4] == 0.1 && t.data[5] == 0.0, "CR-terminated row");
+  }
+  csv_free_table(&t);
+  remove(path);
+}
+
+int main(void) {
+  test_csv_read_table();
+  test_group_state_delta();
+  test_switch_groups_consistent();
+  test_ch_permutations_thread_invariant();
+  test_warm_start();
+  test_multi_start();
+  test_best_improvement();
+  test_parallel_rounds();
+  test_convergence_budgets();
+  if (failures) {
+    fprintf(stderr, "%d check(s) failed\n", failures);
+    return 1;
+  }
+  return 0;
+}
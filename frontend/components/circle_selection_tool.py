@@ -136,6 +136,22 @@ class CircleSelectionTool:
                 var selectButton = document.getElementById('circle-select-btn');
                 var clearButton = document.getElementById('circle-clear-btn');
                 
+                // Samples published by the map page (canvas markers have no
+                // element); marker elements on pages without it
+                function samplePoints() {{
+                    if (window.mapSamplePoints) {{
+                        return window.mapSamplePoints();
+                    }}
+                    var markers = document.querySelectorAll('.custom-marker');
+                    return Array.from(markers, function(marker) {{
+                        return {{
+                            name: marker.dataset.sampleName,
+                            lat: parseFloat(marker.dataset.lat),
+                            lon: parseFloat(marker.dataset.lon)
+                        }};
+                    }});
+                }}
+                
                 if (!selectButton || !clearButton) {{
                     console.error('Circle selection buttons not found');
                     return;
@@ -285,11 +301,8 @@ class CircleSelectionTool:
                     
                     // Count markers within current radius
                     var count = 0;
-                    document.querySelectorAll('.custom-marker').forEach(function(marker) {{
-                        var lat = parseFloat(marker.dataset.lat);
-                        var lon = parseFloat(marker.dataset.lon);
-                        var markerLatLng = L.latLng(lat, lon);
-                        if (centerPoint.distanceTo(markerLatLng) <= radius) {{
+                    samplePoints().forEach(function(sample) {{
+                        if (centerPoint.distanceTo(L.latLng(sample.lat, sample.lon)) <= radius) {{
                             count++;
                         }}
                     }});
@@ -320,16 +333,11 @@ class CircleSelectionTool:
                     var radius = selectionCircle.getRadius();
                     
                     var selectedMarkers = [];
-                    document.querySelectorAll('.custom-marker').forEach(function(marker) {{
-                        var lat = parseFloat(marker.dataset.lat);
-                        var lon = parseFloat(marker.dataset.lon);
-                        var name = marker.dataset.sampleName;
-                        
-                        var markerLatLng = L.latLng(lat, lon);
-                        var distance = center.distanceTo(markerLatLng);
+                    samplePoints().forEach(function(sample) {{
+                        var distance = center.distanceTo(L.latLng(sample.lat, sample.lon));
                         
                         if (distance <= radius) {{
-                            selectedMarkers.push(name);
+                            selectedMarkers.push(sample.name);
                             // Don't directly modify marker styles - let the selection system handle it
                         }}
                     }});
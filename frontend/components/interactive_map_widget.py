@@ -3,7 +3,7 @@ Enhanced interactive map widget with direct point selection and group visualizat
 """
 
 import folium
-from statistics import mean
+import numpy as np
 from PyQt6.QtCore import QUrl
 from PyQt6.QtCore import pyqtSignal as Signal
 from PyQt6.QtWebEngineWidgets import QWebEngineView
@@ -20,8 +20,10 @@ class MapBridge(QObject):
     
     # Signals for Python to JavaScript
     selectionChanged = Signal(list)  # Emitted when selection changes in Python
+    commandIssued = Signal(str)  # JSON map command, see InteractiveMapWidget._send
     
     # Signals for JavaScript to Python  
+    pageReady = Signal()  # Map page loaded and connected to the channel
     markerClicked = Signal(str)  # Sample name when marker is clicked
     markersSelected = Signal(list)  # List of sample names selected
     boxSelectionComplete = Signal(list)  # List of sample names in box selection
@@ -31,6 +33,11 @@ class MapBridge(QObject):
         super().__init__()
         self.selected_samples = []
         
+    @pyqtSlot()
+    def onPageReady(self):
+        """Called by the page once it listens for commands."""
+        self.pageReady.emit()
+        
     @pyqtSlot(str)
     def onMarkerClick(self, sample_name):
         """Handle marker click from JavaScript."""
@@ -61,17 +68,50 @@ class MapBridge(QObject):
 
 
 class InteractiveMapWidget(QWidget):
-    """Enhanced map widget with direct point selection and group visualization."""
+    """Enhanced map widget with direct point selection and group visualization.
+    
+    The map page is built and loaded once. Markers, selection styling and
+    the view are then changed by JSON commands sent through MapBridge
+    (see _send and _add_command_handlers), so updates do not reload the
+    page or refetch tiles.
+    """
     
     # Signal emitted when samples are selected/deselected
     selectionChanged = Signal(list)  # list of selected sample names
     
+    # Enhanced color palette for groups
+    GROUP_COLORS = {
+        1: '#FF6B6B',  # Red
+        2: '#4ECDC4',  # Teal  
+        3: '#45B7D1',  # Blue
+        4: '#96CEB4',  # Green
+        5: '#FFEAA7',  # Yellow
+        6: '#DDA0DD',  # Plum
+        7: '#98D8C8',  # Mint
+        8: '#FFD93D',  # Gold
+        9: '#6C5CE7',  # Purple
+        10: '#FD79A8'  # Pink
+    }
+    
+    # From this many samples on, markers are circles drawn on one canvas
+    # instead of one HTML element each, with tooltips and popups built
+    # only for the marker under the mouse
+    CANVAS_MARKER_THRESHOLD = 2000
+    # Canvas markers sharing a grid cell are merged up to this zoom level
+    CLUSTER_MAX_ZOOM = 9
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.selected_samples = []
         self.markers_data = []
         self.last_toggled_sample = None
+        self.cluster_markers = True  # cluster canvas markers at low zoom
         self.bridge = MapBridge()
+        self.k_values = []  # K values of load_memberships
+        self._groups = None  # samples x K group matrix of load_memberships
+        self._page_built = False
+        self._page_ready = False
+        self._pending_commands = []  # sent once the page is ready
         self._setup_ui()
         self._connect_bridge_signals()
         
@@ -93,6 +133,7 @@ class InteractiveMapWidget(QWidget):
         self.channel = QWebChannel()
         self.channel.registerObject("mapBridge", self.bridge)
         self.page.setWebChannel(self.channel)
+        self.page.loadStarted.connect(self._on_load_started)
         self.web_view.setPage(self.page)
         
         # Configure web engine settings
@@ -105,6 +146,7 @@ class InteractiveMapWidget(QWidget):
         
     def _connect_bridge_signals(self):
         """Connect bridge signals for bidirectional communication."""
+        self.bridge.pageReady.connect(self._on_page_ready)
         self.bridge.markerClicked.connect(self._on_marker_clicked)
         self.bridge.boxSelectionComplete.connect(self._on_box_selection)
         self.bridge.markersSelected.connect(self._on_multi_selection)
@@ -122,7 +164,7 @@ class InteractiveMapWidget(QWidget):
         self.last_toggled_sample = sample_name
         
         self.selectionChanged.emit(self.selected_samples)
-        self.bridge.updateSelection(self.selected_samples)
+        self._push_selection()
         
     def _on_box_selection(self, sample_names):
         """Handle box selection."""
@@ -132,16 +174,57 @@ class InteractiveMapWidget(QWidget):
                 self.selected_samples.append(name)
         
         self.selectionChanged.emit(self.selected_samples)
-        self.bridge.updateSelection(self.selected_samples)
+        self._push_selection()
         
     def _on_multi_selection(self, sample_names):
         """Handle multi-selection with Ctrl/Shift."""
         self.selected_samples = sample_names
         self.selectionChanged.emit(self.selected_samples)
         
+    def _on_load_started(self):
+        self._page_ready = False
+        
+    def _on_page_ready(self):
+        """Send the commands queued while the page was loading."""
+        self._page_ready = True
+        pending, self._pending_commands = self._pending_commands, []
+        for payload in pending:
+            self.bridge.commandIssued.emit(payload)
+        
+    def _send(self, command, **args):
+        """
+        Send a command to the map page, or queue it until the page is ready.
+        
+        Commands: setMarkers(markers, selected, canvas, cluster),
+        setMembership(markers, kValues, groups, k, selected, canvas,
+        cluster), showK(k), setSelection(selected), setView(lat, lon, zoom),
+        highlight(name).
+        """
+        if command in ('setMarkers', 'setMembership'):
+            # A full marker set replaces anything queued before it
+            self._pending_commands.clear()
+        payload = json.dumps({'command': command, **args})
+        if self._page_ready:
+            self.bridge.commandIssued.emit(payload)
+        else:
+            self._pending_commands.append(payload)
+            
+    def _marker_options(self, count):
+        """Rendering options of setMarkers/setMembership for count markers."""
+        canvas = count >= self.CANVAS_MARKER_THRESHOLD
+        return {'canvas': canvas, 'cluster': canvas and self.cluster_markers}
+        
+    def _push_selection(self):
+        """Send the current selection to the bridge and restyle the markers."""
+        self.bridge.updateSelection(self.selected_samples)
+        self._send('setSelection', selected=list(self.selected_samples))
+        
     def render_map(self, markers_data, center=None, zoom=None):
         """
-        Render the interactive map with enhanced selection capabilities.
+        Show markers on the map and center it.
+        
+        The page is built on the first call; later calls replace the
+        markers in place.
         
         Args:
             markers_data: List of dictionaries with 'lat', 'lon', 'name', 'group' keys
@@ -155,13 +238,93 @@ class InteractiveMapWidget(QWidget):
                 center = (-25.0, 133.0)  # Australia center
             else:
                 center = (
-                    mean([m["lat"] for m in markers_data]), 
-                    mean([m["lon"] for m in markers_data])
+                    float(np.mean([m["lat"] for m in markers_data])), 
+                    float(np.mean([m["lon"] for m in markers_data]))
                 )
         
         if zoom is None:
             zoom = 5
         
+        self.k_values = []
+        self._groups = None
+        if not self._page_built:
+            self._build_page(center, zoom)
+        
+        markers = [
+            {
+                'name': mk.get('name', ''),
+                'lat': float(mk['lat']),
+                'lon': float(mk['lon']),
+                'group': mk.get('group', 1),
+            }
+            for mk in markers_data
+        ]
+        self._send('setMarkers', markers=markers, selected=list(self.selected_samples),
+                   **self._marker_options(len(markers)))
+        self._send('setView', lat=center[0], lon=center[1], zoom=zoom)
+        
+    def load_memberships(self, samples, k_values, groups, k_value):
+        """
+        Show samples with their groups for every K at once.
+        
+        Coordinates and the whole (samples x K) group matrix go to the page
+        once; show_k() then only recolours the existing markers there.
+        
+        Args:
+            samples: List of dictionaries with 'name', 'lat', 'lon' keys
+            k_values: K values, the columns of groups
+            groups: Array-like (len(samples), len(k_values)) of group numbers
+            k_value: K to show first
+        """
+        self.k_values = [int(k) for k in k_values]
+        self._groups = np.asarray(groups, dtype=np.int32).reshape(len(samples), len(self.k_values))
+        column = self._groups[:, self.k_values.index(int(k_value))].tolist()
+        self.markers_data = [
+            {'name': s['name'], 'lat': float(s['lat']), 'lon': float(s['lon']), 'group': group}
+            for s, group in zip(samples, column)
+        ]
+        
+        if not self.markers_data:
+            center = (-25.0, 133.0)  # Australia center
+        else:
+            center = (
+                float(np.mean([m["lat"] for m in self.markers_data])), 
+                float(np.mean([m["lon"] for m in self.markers_data]))
+            )
+        if not self._page_built:
+            self._build_page(center, 5)
+        
+        markers = [{'name': m['name'], 'lat': m['lat'], 'lon': m['lon']} for m in self.markers_data]
+        self._send('setMembership', markers=markers, kValues=self.k_values,
+                   groups=self._groups.ravel().tolist(), k=int(k_value),
+                   selected=list(self.selected_samples), **self._marker_options(len(markers)))
+        self._send('setView', lat=center[0], lon=center[1], zoom=5)
+        
+    def groups_for_k(self, k_value):
+        """Sample name -> group at K from load_memberships (empty if not loaded)."""
+        if self._groups is None or int(k_value) not in self.k_values:
+            return {}
+        column = self._groups[:, self.k_values.index(int(k_value))].tolist()
+        return {m['name']: group for m, group in zip(self.markers_data, column)}
+        
+    def show_k(self, k_value):
+        """
+        Recolour the markers for another K of load_memberships, without
+        sending any marker data.
+        
+        Returns:
+            False if that K was not loaded with load_memberships
+        """
+        groups = self.groups_for_k(k_value)
+        if not groups:
+            return False
+        for m in self.markers_data:
+            m['group'] = groups[m['name']]
+        self._send('showK', k=int(k_value))
+        return True
+        
+    def _build_page(self, center, zoom):
+        """Write the map page (tiles, tools, command handlers) and load it once."""
         # Create map with satellite imagery
         m = folium.Map(
             location=center, 
@@ -174,126 +337,426 @@ class InteractiveMapWidget(QWidget):
             height='100%'
         )
         
-        # Enhanced color palette for groups
-        group_colors = {
-            1: '#FF6B6B',  # Red
-            2: '#4ECDC4',  # Teal  
-            3: '#45B7D1',  # Blue
-            4: '#96CEB4',  # Green
-            5: '#FFEAA7',  # Yellow
-            6: '#DDA0DD',  # Plum
-            7: '#98D8C8',  # Mint
-            8: '#FFD93D',  # Gold
-            9: '#6C5CE7',  # Purple
-            10: '#FD79A8'  # Pink
-        }
-        
-        # Add markers with group numbers
-        for mk in markers_data:
-            group = mk.get('group', 1)
-            color_hex = group_colors.get(group, '#888888')
-            
-            # Create custom HTML icon with group number
-            icon_html = f"""
-            <div style="
-                background-color: {color_hex};
-                color: white;
-                border: 2px solid {'#2ECC71' if mk['name'] in self.selected_samples else 'white'};
-                border-radius: 50%;
-                width: 30px;
-                height: 30px;
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                font-weight: bold;
-                font-size: 14px;
-                box-shadow: 0 2px 6px rgba(0,0,0,0.3);
-                cursor: pointer;
-                position: relative;
-            " data-sample-name="{mk.get('name', '')}" 
-              data-lat="{mk['lat']}" 
-              data-lon="{mk['lon']}"
-              class="custom-marker">
-                {group}
-            </div>
-            """
-            
-            # Use DivIcon for custom HTML marker
-            icon = folium.DivIcon(html=icon_html)
-            
-            # Create popup
-            popup_html = f"""
-            <div style="font-family: Arial, sans-serif; min-width: 150px;">
-                <b>{mk.get('name', 'Unknown')}</b><br>
-                Location: ({mk['lat']:.4f}, {mk['lon']:.4f})<br>
-                Group: {mk.get('group', 'N/A')}<br>
-                <div style="color: {'green' if mk['name'] in self.selected_samples else 'gray'};">
-                    {'✓ Selected' if mk['name'] in self.selected_samples else 'Click to select'}
-                </div>
-            </div>
-            """
-            
-            # Add marker
-            marker = folium.Marker(
-                location=(mk['lat'], mk['lon']),
-                popup=folium.Popup(popup_html, max_width=300),
-                tooltip=f"{mk.get('name', 'Sample')} (Group {group})",
-                icon=icon
-            )
-            
-            marker.add_to(m)
-        
         # Add selection tools and JavaScript
         self._add_selection_tools(m)
         
         # Add arrow and distance tools
         self._add_map_tools(m)
         
+        # Add QWebChannel and the marker command handlers
+        self._add_command_handlers(m)
+        
         # Save HTML to entro_cache directory
         html_path = self._get_map_html_path()
         m.save(html_path)
         
-        # Inject QWebChannel script
-        with open(html_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
+        self._page_built = True
+        self._page_ready = False
+        self.web_view.setUrl(QUrl.fromLocalFile(html_path))
         
-        # Add QWebChannel and selection handling JavaScript
-        channel_script = """
-        <script src="qrc:///qtwebchannel/qwebchannel.js"></script>
+    def _add_command_handlers(self, folium_map):
+        """Add the QWebChannel connection and the handlers for _send commands."""
+        folium_map.get_root().header.add_child(
+            folium.Element('<script src="qrc:///qtwebchannel/qwebchannel.js"></script>'))
+        
+        command_js = """
+        <style>
+        @keyframes pulse {
+            0% { transform: scale(1); }
+            50% { transform: scale(1.4); }
+            100% { transform: scale(1); }
+        }
+        </style>
         <script>
         var mapBridge = null;
-        new QWebChannel(qt.webChannelTransport, function(channel) {
-            mapBridge = channel.objects.mapBridge;
+        (function() {
+            var GROUP_COLORS = __GROUP_COLORS__;
+            var CLUSTER_MAX_ZOOM = __CLUSTER_MAX_ZOOM__;
+            var CLUSTER_CELL_PX = 60;  // grid cell size at the current zoom
+            var markerLayer = null;
+            var clusterLayer = null;  // clusters and lone markers while clustered
+            var entries = [];  // {m: marker data, marker: Leaflet marker, selected}
+            var membership = null;  // {kIndex: K -> column, groups: flat samples x K, nK}
+            var selected = new Set();
+            var canvasMode = false;  // circle markers on one canvas instead of HTML icons
+            var clustering = false;
+            var renderer = null;
+            var hoverTooltip = null;  // one tooltip shared by all canvas markers
             
-            // Listen for selection changes from Python
-            mapBridge.selectionChanged.connect(function(selectedSamples) {
-                updateMapSelection(selectedSamples);
-            });
-        });
-        
-        function updateMapSelection(selectedSamples) {
-            // Update visual state of markers based on selection
-            document.querySelectorAll('.custom-marker').forEach(function(marker) {
-                var sampleName = marker.dataset.sampleName;
-                if (selectedSamples.includes(sampleName)) {
-                    marker.style.border = '3px solid #2ECC71';
-                    marker.style.boxShadow = '0 0 10px #2ECC71';
+            function mapInstance() {
+                return window['__MAP_NAME__'];
+            }
+            
+            function escapeHtml(text) {
+                return String(text).replace(/[&<>"']/g, function(c) {
+                    return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+                });
+            }
+            
+            function groupColor(group) {
+                return GROUP_COLORS[group] || '#888888';
+            }
+            
+            function styleMarker(element, isSelected) {
+                element.style.border = isSelected ? '3px solid #2ECC71' : '2px solid white';
+                element.style.boxShadow = isSelected ? '0 0 10px #2ECC71'
+                                                     : '0 2px 6px rgba(0,0,0,0.3)';
+            }
+            
+            function circleStyle(m, isSelected) {
+                return {
+                    radius: 7,
+                    color: isSelected ? '#2ECC71' : 'white',
+                    weight: isSelected ? 3 : 1.5,
+                    opacity: 1,
+                    fillColor: groupColor(m.group),
+                    fillOpacity: 0.9
+                };
+            }
+            
+            function iconHtml(m) {
+                var isSelected = selected.has(m.name);
+                return '<div class="custom-marker"' +
+                    ' data-sample-name="' + escapeHtml(m.name) + '"' +
+                    ' data-lat="' + m.lat + '" data-lon="' + m.lon + '"' +
+                    ' style="background-color: ' + groupColor(m.group) + ';' +
+                    ' color: white;' +
+                    ' border: ' + (isSelected ? '3px solid #2ECC71' : '2px solid white') + ';' +
+                    ' border-radius: 50%; width: 30px; height: 30px;' +
+                    ' display: flex; align-items: center; justify-content: center;' +
+                    ' font-weight: bold; font-size: 14px;' +
+                    ' box-shadow: ' +
+                    (isSelected ? '0 0 10px #2ECC71' : '0 2px 6px rgba(0,0,0,0.3)') + ';' +
+                    ' cursor: pointer; position: relative;">' +
+                    escapeHtml(m.group) + '</div>';
+            }
+            
+            // Built when opened, so it shows the current selection
+            function popupHtml(m) {
+                var isSelected = selected.has(m.name);
+                return '<div style="font-family: Arial, sans-serif; min-width: 150px;">' +
+                    '<b>' + escapeHtml(m.name || 'Unknown') + '</b><br>' +
+                    'Location: (' + m.lat.toFixed(4) + ', ' + m.lon.toFixed(4) + ')<br>' +
+                    'Group: ' + escapeHtml(m.group) + '<br>' +
+                    '<div style="color: ' + (isSelected ? 'green' : 'gray') + ';">' +
+                    (isSelected ? '\u2713 Selected' : 'Click to select') + '</div></div>';
+            }
+            
+            function tooltipText(m) {
+                return escapeHtml(m.name || 'Sample') + ' (Group ' + escapeHtml(m.group) + ')';
+            }
+            
+            function toolActive() {
+                return window.isMeasurementModeActive || window.isArrowModeActive ||
+                    window.isCircleSelectionActive;
+            }
+            
+            // Canvas markers share one set of handlers on markerLayer; popups
+            // and tooltips are only created for the marker under the mouse
+            var canvasHandlers = {
+                click: function(e) {
+                    var m = e.layer.sample;
+                    if (toolActive()) {
+                        return;
+                    }
+                    if (window.onSampleMarkerClick) {
+                        window.onSampleMarkerClick(m.name);
+                    }
+                    L.popup({maxWidth: 300})
+                        .setLatLng(e.layer.getLatLng())
+                        .setContent(popupHtml(m))
+                        .openOn(mapInstance());
+                },
+                mouseover: function(e) {
+                    hoverTooltip.setContent(tooltipText(e.layer.sample));
+                    mapInstance().openTooltip(hoverTooltip, e.latlng);
+                },
+                mousemove: function(e) {
+                    hoverTooltip.setLatLng(e.latlng);
+                },
+                mouseout: function() {
+                    mapInstance().closeTooltip(hoverTooltip);
+                }
+            };
+            
+            function createMarker(m) {
+                if (canvasMode) {
+                    var circle = L.circleMarker([m.lat, m.lon], Object.assign(
+                        {renderer: renderer, bubblingMouseEvents: false},
+                        circleStyle(m, selected.has(m.name))));
+                    circle.sample = m;
+                    return circle;
+                }
+                var icon = L.divIcon({className: 'empty', html: iconHtml(m)});
+                return L.marker([m.lat, m.lon], {icon: icon})
+                    .bindPopup(function() { return popupHtml(m); }, {maxWidth: 300})
+                    .bindTooltip(tooltipText(m), {sticky: true});
+            }
+            
+            function buildMarkers(markers, selectedNames, options) {
+                var map = mapInstance();
+                if (clusterLayer) {
+                    map.removeLayer(clusterLayer);
+                    clusterLayer = null;
+                }
+                if (markerLayer) {
+                    map.removeLayer(markerLayer);
+                }
+                selected = new Set(selectedNames);
+                canvasMode = !!options.canvas;
+                clustering = canvasMode && !!options.cluster;
+                if (canvasMode) {
+                    renderer = renderer || L.canvas({padding: 0.5});
+                    hoverTooltip = hoverTooltip || L.tooltip();
+                    // A feature group passes its markers' events to canvasHandlers
+                    markerLayer = L.featureGroup().on(canvasHandlers);
                 } else {
-                    marker.style.border = '2px solid white';
-                    marker.style.boxShadow = '0 2px 6px rgba(0,0,0,0.3)';
+                    markerLayer = L.layerGroup();
                 }
+                entries = markers.map(function(m) {
+                    var marker = createMarker(m);
+                    markerLayer.addLayer(marker);
+                    return {m: m, marker: marker, selected: selected.has(m.name)};
+                });
+                updateClusters();
+            }
+            
+            function clusterText(members) {
+                var counts = {};
+                members.forEach(function(entry) {
+                    counts[entry.m.group] = (counts[entry.m.group] || 0) + 1;
+                });
+                return members.length + ' samples<br>' + Object.keys(counts)
+                    .sort(function(a, b) { return a - b; })
+                    .map(function(group) {
+                        return 'Group ' + escapeHtml(group) + ': ' + counts[group];
+                    })
+                    .join('<br>');
+            }
+            
+            function clusterMarker(members) {
+                var lat = 0, lon = 0, counts = {}, majority = null, anySelected = false;
+                members.forEach(function(entry) {
+                    var group = entry.m.group;
+                    lat += entry.m.lat;
+                    lon += entry.m.lon;
+                    counts[group] = (counts[group] || 0) + 1;
+                    if (majority === null || counts[group] > counts[majority]) {
+                        majority = group;
+                    }
+                    anySelected = anySelected || entry.selected;
+                });
+                var cluster = L.circleMarker([lat / members.length, lon / members.length], {
+                    renderer: renderer,
+                    bubblingMouseEvents: false,
+                    radius: Math.min(10 + 3 * Math.log2(members.length), 26),
+                    color: anySelected ? '#2ECC71' : 'white',
+                    weight: anySelected ? 3 : 2,
+                    opacity: 1,
+                    fillColor: groupColor(majority),
+                    fillOpacity: 0.75
+                });
+                cluster.bindTooltip(function() { return clusterText(members); }, {sticky: true});
+                cluster.on('click', function() {
+                    var bounds = L.latLngBounds(members.map(function(entry) {
+                        return entry.marker.getLatLng();
+                    }));
+                    mapInstance().fitBounds(bounds,
+                                            {padding: [40, 40], maxZoom: CLUSTER_MAX_ZOOM + 1});
+                });
+                return cluster;
+            }
+            
+            // Below CLUSTER_MAX_ZOOM, merge canvas markers that share a grid cell
+            function updateClusters() {
+                var map = mapInstance();
+                if (!markerLayer) {
+                    return;
+                }
+                if (clusterLayer) {
+                    map.removeLayer(clusterLayer);
+                    clusterLayer = null;
+                }
+                var zoom = map.getZoom();
+                if (!clustering || zoom > CLUSTER_MAX_ZOOM) {
+                    if (!map.hasLayer(markerLayer)) {
+                        markerLayer.addTo(map);
+                    }
+                    return;
+                }
+                if (map.hasLayer(markerLayer)) {
+                    map.removeLayer(markerLayer);
+                }
+                var cells = {};
+                entries.forEach(function(entry) {
+                    var point = map.project(entry.marker.getLatLng(), zoom);
+                    var key = Math.floor(point.x / CLUSTER_CELL_PX) + ':' +
+                        Math.floor(point.y / CLUSTER_CELL_PX);
+                    (cells[key] = cells[key] || []).push(entry);
+                });
+                clusterLayer = L.layerGroup();
+                Object.keys(cells).forEach(function(key) {
+                    var members = cells[key];
+                    // A lone marker stays in markerLayer, so its events still work
+                    clusterLayer.addLayer(members.length === 1 ? members[0].marker
+                                                               : clusterMarker(members));
+                });
+                clusterLayer.addTo(map);
+            }
+            
+            function restyle(entry) {
+                if (canvasMode) {
+                    entry.marker.setStyle(circleStyle(entry.m, entry.selected));
+                } else {
+                    // Used whenever Leaflet (re)creates the marker element
+                    entry.marker.options.icon = L.divIcon({className: 'empty',
+                                                           html: iconHtml(entry.m)});
+                    entry.marker.setTooltipContent(tooltipText(entry.m));
+                }
+            }
+            
+            // Set every marker's group from column k of the membership matrix
+            function showK(k) {
+                var column = membership.kIndex[k];
+                if (column === undefined) {
+                    console.log('K not loaded on the map:', k);
+                    return;
+                }
+                entries.forEach(function(entry, i) {
+                    var group = membership.groups[i * membership.nK + column];
+                    if (entry.m.group === group) {
+                        return;
+                    }
+                    entry.m.group = group;
+                    var element = !canvasMode && entry.marker.getElement();
+                    var div = element && element.querySelector('.custom-marker');
+                    if (div) {
+                        div.style.backgroundColor = groupColor(group);
+                        div.textContent = group;
+                    }
+                    restyle(entry);
+                });
+                if (clusterLayer) {
+                    updateClusters();
+                }
+            }
+            
+            // Samples on the map, for the selection tools (canvas markers have no element)
+            window.mapSamplePoints = function() {
+                return entries.map(function(entry) { return entry.m; });
+            };
+            
+            var commands = {
+                setMarkers: function(cmd) {
+                    membership = null;
+                    buildMarkers(cmd.markers, cmd.selected, cmd);
+                },
+                setMembership: function(cmd) {
+                    var kIndex = {};
+                    cmd.kValues.forEach(function(k, i) { kIndex[k] = i; });
+                    var nK = cmd.kValues.length;
+                    var column = kIndex[cmd.k] || 0;
+                    membership = {kIndex: kIndex, groups: cmd.groups, nK: nK};
+                    buildMarkers(cmd.markers.map(function(m, i) {
+                        return {name: m.name, lat: m.lat, lon: m.lon,
+                                group: cmd.groups[i * nK + column]};
+                    }), cmd.selected, cmd);
+                },
+                showK: function(cmd) {
+                    if (membership) {
+                        showK(cmd.k);
+                    }
+                },
+                setSelection: function(cmd) {
+                    selected = new Set(cmd.selected);
+                    var changed = false;
+                    entries.forEach(function(entry) {
+                        var isSelected = selected.has(entry.m.name);
+                        if (entry.selected !== isSelected) {
+                            entry.selected = isSelected;
+                            changed = true;
+                            if (canvasMode) {
+                                restyle(entry);
+                            }
+                        }
+                    });
+                    if (!canvasMode) {
+                        document.querySelectorAll('.custom-marker').forEach(function(marker) {
+                            styleMarker(marker, selected.has(marker.dataset.sampleName));
+                        });
+                    } else if (changed && clusterLayer) {
+                        updateClusters();
+                    }
+                },
+                setView: function(cmd) {
+                    mapInstance().setView([cmd.lat, cmd.lon], cmd.zoom);
+                },
+                highlight: function(cmd) {
+                    if (canvasMode) {
+                        entries.forEach(function(entry) {
+                            if (entry.m.name === cmd.name) {
+                                pulseRing(entry.marker.getLatLng());
+                            }
+                        });
+                        return;
+                    }
+                    document.querySelectorAll('.custom-marker').forEach(function(marker) {
+                        if (marker.dataset.sampleName === cmd.name) {
+                            // Add pulse animation
+                            marker.style.animation = 'pulse 2s 3';
+                            setTimeout(function() {
+                                marker.style.animation = '';
+                            }, 6000);
+                        }
+                    });
+                }
+            };
+            
+            // Canvas counterpart of the pulse animation: a ring around the marker
+            function pulseRing(latlng) {
+                var map = mapInstance();
+                var ring = L.circleMarker(latlng, {
+                    renderer: renderer, interactive: false, fill: false,
+                    radius: 12, color: '#2ECC71', weight: 3
+                }).addTo(map);
+                var large = false;
+                var timer = setInterval(function() {
+                    large = !large;
+                    ring.setRadius(large ? 18 : 12);
+                }, 500);
+                setTimeout(function() {
+                    clearInterval(timer);
+                    map.removeLayer(ring);
+                }, 6000);
+            }
+            
+            function handleCommand(payload) {
+                var cmd = JSON.parse(payload);
+                var handler = commands[cmd.command];
+                if (handler) {
+                    handler(cmd);
+                } else {
+                    console.log('Unknown map command:', cmd.command);
+                }
+            }
+            
+            // The map is created by the last script on the page; connect after it ran
+            window.addEventListener('load', function() {
+                mapInstance().on('zoomend', updateClusters);
+                new QWebChannel(qt.webChannelTransport, function(channel) {
+                    mapBridge = channel.objects.mapBridge;
+                    mapBridge.commandIssued.connect(handleCommand);
+                    mapBridge.onPageReady();
+                });
             });
-        }
+        })();
         </script>
         """
-        
-        # Insert before closing body tag
-        html_content = html_content.replace('</body>', channel_script + '</body>')
-        
-        with open(html_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        
-        self.web_view.setUrl(QUrl.fromLocalFile(html_path))
+        command_js = (command_js
+                      .replace('__GROUP_COLORS__', json.dumps(self.GROUP_COLORS))
+                      .replace('__CLUSTER_MAX_ZOOM__', str(self.CLUSTER_MAX_ZOOM))
+                      .replace('__MAP_NAME__', folium_map.get_name()))
+        folium_map.get_root().html.add_child(folium.Element(command_js))
         
     def _add_selection_tools(self, folium_map):
         """Add interactive selection functionality to the map."""
@@ -323,6 +786,31 @@ class InteractiveMapWidget(QWidget):
                 if (e.key === 'Shift') shiftPressed = false;
             });
             
+            // Select a sample by its marker; also called by canvas markers,
+            // which have no element for the click handler below
+            window.onSampleMarkerClick = function(sampleName) {
+                console.log('Marker clicked:', sampleName);
+                
+                if (ctrlPressed || shiftPressed) {
+                    // Multi-selection
+                    var index = selectedMarkers.indexOf(sampleName);
+                    if (index > -1) {
+                        selectedMarkers.splice(index, 1);
+                    } else {
+                        selectedMarkers.push(sampleName);
+                    }
+                    
+                    if (mapBridge) {
+                        mapBridge.onMultiSelection(JSON.stringify(selectedMarkers));
+                    }
+                } else {
+                    // Single selection toggle
+                    if (mapBridge) {
+                        mapBridge.onMarkerClick(sampleName);
+                    }
+                }
+            };
+            
             // Wait for map to be available
             function initSelectionTool() {
                 var mapKeys = Object.keys(window).filter(key => key.startsWith('map_'));
@@ -344,28 +832,7 @@ class InteractiveMapWidget(QWidget):
                     if (e.target.classList.contains('custom-marker')) {
                         e.stopPropagation();
                         e.preventDefault();
-                        var sampleName = e.target.dataset.sampleName;
-                        
-                        console.log('Marker clicked:', sampleName);
-                        
-                        if (ctrlPressed || shiftPressed) {
-                            // Multi-selection
-                            var index = selectedMarkers.indexOf(sampleName);
-                            if (index > -1) {
-                                selectedMarkers.splice(index, 1);
-                            } else {
-                                selectedMarkers.push(sampleName);
-                            }
-                            
-                            if (mapBridge) {
-                                mapBridge.onMultiSelection(JSON.stringify(selectedMarkers));
-                            }
-                        } else {
-                            // Single selection toggle
-                            if (mapBridge) {
-                                mapBridge.onMarkerClick(sampleName);
-                            }
-                        }
+                        window.onSampleMarkerClick(e.target.dataset.sampleName);
                     }
                 });
                 
@@ -412,13 +879,9 @@ class InteractiveMapWidget(QWidget):
                             
                             // Find all markers within bounds
                             var markersInBounds = [];
-                            document.querySelectorAll('.custom-marker').forEach(function(marker) {
-                                var lat = parseFloat(marker.dataset.lat);
-                                var lon = parseFloat(marker.dataset.lon);
-                                var name = marker.dataset.sampleName;
-                                
-                                if (bounds.contains(L.latLng(lat, lon))) {
-                                    markersInBounds.push(name);
+                            window.mapSamplePoints().forEach(function(sample) {
+                                if (bounds.contains(L.latLng(sample.lat, sample.lon))) {
+                                    markersInBounds.push(sample.name);
                                 }
                             });
                             
@@ -483,22 +946,19 @@ class InteractiveMapWidget(QWidget):
             selected_names: List of selected sample names
         """
         self.selected_samples = selected_names
-        self.bridge.updateSelection(selected_names)
-        # Re-render to update marker colors
-        self.render_map(self.markers_data)
+        self._push_selection()
         
     def set_selection(self, sample_names):
         """Set selection to specific samples."""
         self.selected_samples = sample_names
-        self.bridge.updateSelection(sample_names)
+        self._push_selection()
         self.selectionChanged.emit(self.selected_samples)
         
     def clear_selection(self):
         """Clear all selected samples."""
         self.selected_samples = []
-        self.bridge.updateSelection([])
+        self._push_selection()
         self.selectionChanged.emit(self.selected_samples)
-        self.render_map(self.markers_data)
         
     def get_selected_samples(self):
         """Return list of selected sample names."""
@@ -513,24 +973,9 @@ class InteractiveMapWidget(QWidget):
             lon: Longitude
             sample_name: Optional sample name to highlight
         """
-        # Re-render map centered on the location with higher zoom
-        self.render_map(self.markers_data, center=(lat, lon), zoom=12)
+        # Recenter with higher zoom, keeping the page and its tiles
+        self._send('setView', lat=float(lat), lon=float(lon), zoom=12)
         
         # If sample name provided, highlight it temporarily
         if sample_name:
-            # Execute JavaScript to highlight the marker
-            js_code = f"""
-            setTimeout(function() {{
-                var markers = document.querySelectorAll('.custom-marker');
-                markers.forEach(function(marker) {{
-                    if (marker.dataset.sampleName === '{sample_name}') {{
-                        // Add pulse animation
-                        marker.style.animation = 'pulse 2s 3';
-                        setTimeout(function() {{
-                            marker.style.animation = '';
-                        }}, 6000);
-                    }}
-                }});
-            }}, 500);
-            """
-            self.web_view.page().runJavaScript(js_code)
+            self._send('highlight', name=sample_name)
@@ -212,6 +212,34 @@ class SampleListWidget(QWidget):
         for i in range(5):
             self.tree_widget.resizeColumnToContents(i)
             
+    def set_groups(self, groups):
+        """
+        Update the group column in place, keeping items and check states.
+        
+        Args:
+            groups: Dictionary of sample name -> group
+        """
+        prev_sort = self.tree_widget.isSortingEnabled()
+        if prev_sort:
+            self.tree_widget.setSortingEnabled(False)
+        
+        self.tree_widget.blockSignals(True)
+        for i in range(self.tree_widget.topLevelItemCount()):
+            item = self.tree_widget.topLevelItem(i)
+            sample_data = item.data(1, Qt.ItemDataRole.UserRole)
+            if not sample_data or sample_data['name'] not in groups:
+                continue
+            sample_data['group'] = groups[sample_data['name']]
+            item.setText(2, str(sample_data['group']))
+            item.setData(1, Qt.ItemDataRole.UserRole, sample_data)
+        self.tree_widget.blockSignals(False)
+        
+        if prev_sort:
+            self.tree_widget.setSortingEnabled(True)
+        
+        # Group search results change with the groups
+        self._filter_items('')
+            
     def _on_item_clicked(self, item, column):
         """Handle item click - navigate to location on map if not checkbox."""
         if column != 0:  # Not checkbox column
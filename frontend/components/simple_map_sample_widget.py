@@ -93,6 +93,23 @@ class SimpleMapSampleWidget(QWidget):
         self.map_widget.render_map(markers_data)
         self.sample_list.load_samples(markers_data)
         
+    def load_memberships(self, samples, k_values, groups, k_value):
+        """Load samples with their groups for every K (see InteractiveMapWidget.load_memberships)"""
+        self.map_widget.load_memberships(samples, k_values, groups, k_value)
+        self.markers_data = self.map_widget.markers_data
+        self.sample_list.load_samples(self.markers_data)
+        
+    def show_k(self, k_value):
+        """Switch both widgets to another K loaded with load_memberships
+        
+        Returns:
+            False if that K was not loaded
+        """
+        if not self.map_widget.show_k(k_value):
+            return False
+        self.sample_list.set_groups(self.map_widget.groups_for_k(k_value))
+        return True
+        
     def get_selected_samples_data(self):
         """Get selected samples data"""
         return self.sample_list.get_selected_samples_data()
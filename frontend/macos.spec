@@ -3,10 +3,10 @@
 
 a = Analysis(
     ['main.py'],
-    pathex=[],
+    pathex=['../src'],
     binaries=[],
     datas=[('run_entropymax', '.'), ('components', 'components'), ('help', 'help'), ('utils', 'utils')],
-    hiddenimports=['PyQt6.QtCore', 'PyQt6.QtWidgets', 'PyQt6.QtGui', 'PyQt6.QtWebEngineWidgets', 'pyqtgraph', 'pandas', 'numpy', 'pyarrow', 'folium', 'OpenGL'],
+    hiddenimports=['PyQt6.QtCore', 'PyQt6.QtWidgets', 'PyQt6.QtGui', 'PyQt6.QtWebEngineWidgets', 'pyqtgraph', 'pandas', 'numpy', 'pyarrow', 'folium', 'OpenGL', 'app.core.datastore', 'app.gui.worker'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -15,6 +15,13 @@ from components.selected_psd_widget import SelectedPSDWidget
 from help import FormatExamplesDialog, ValidationRulesDialog, UsageGuideDialog
 from utils.create_kml import create_kml
 from utils.recent_files import save_recent_files, load_recent_files
+from utils.group_details_cache import GroupDetailsCache
+from utils.app_path import ensure_src_on_path
+
+ensure_src_on_path()
+from app.gui.worker import Worker, WorkerCancelled, start_worker  # noqa: E402
+
+
 class BentoBox(QFrame):
     """A styled frame to create the bento box effect."""
     def __init__(self, parent=None, title=""):
@@ -68,7 +75,9 @@ class EntropyMaxFinal(QMainWindow):
         self.ch_window = None
         self.rs_window = None
         self.selected_psd_window = None
-        self._group_details_cache = {}
+        self._group_details_cache = GroupDetailsCache()  # memory-bounded LRU
+        self._group_details_loading = {}  # (K, id(result)) -> callbacks waiting for a worker
+        self._map_result = None  # AnalysisResult whose memberships are on the map
         
         self._setup_ui()
         self._setup_menu()
@@ -437,8 +446,11 @@ class EntropyMaxFinal(QMainWindow):
         
     def _apply_map_for_k(self, k_value, announce=True):
         """
-        Rebuild markers from analysis_data['gps_data'][k] and redraw the map.
-        Preserves current sample selection.
+        Show the groups at K on the map, preserving the current sample selection.
+        
+        For a loaded AnalysisResult all memberships go to the map once; after
+        that switching K only recolours the markers. Otherwise markers are
+        rebuilt from analysis_data['gps_data'][k].
         
         Args:
             k_value: K value to display
@@ -449,13 +461,48 @@ class EntropyMaxFinal(QMainWindow):
                               "Please run analysis first.")
             return
         
+        result = self.current_analysis_data.get('result')
+        if result is not None and int(k_value) in result.k_values:
+            self._show_memberships_for_k(result, int(k_value))
+        else:
+            self._map_result = None
+            if not self._load_markers_for_k(k_value):
+                return
+        
+        # Update preview card
+        self.map_preview_card.update_status(
+            f"Loaded {len(self.map_sample_widget.markers_data)} samples (K={k_value})")
+        
+        if announce:
+            self.statusBar().showMessage(f"Map updated for K={k_value}")
+    
+    def _show_memberships_for_k(self, result, k_value):
+        """Switch the map to K, sending the result's memberships on first use."""
+        if self._map_result is result and self.map_sample_widget.show_k(k_value):
+            return
+        
+        current_selection = list(self.selected_samples) if hasattr(self, 'selected_samples') else []
+        latitude, longitude = result.sample_coordinates()
+        samples = [
+            {'name': name, 'lat': lat, 'lon': lon}
+            for name, lat, lon in zip(result.sample_names, latitude.tolist(), longitude.tolist())
+        ]
+        self.map_sample_widget.load_memberships(
+            samples, result.k_values, result.membership_matrix(), k_value)
+        self._map_result = result
+        
+        if current_selection:
+            self.map_sample_widget.sample_list.set_selection(current_selection)
+    
+    def _load_markers_for_k(self, k_value):
+        """Rebuild and load markers from analysis_data['gps_data'][k]; False if there are none."""
         gps_data_all = self.current_analysis_data.get('gps_data', {})
         gps_data = gps_data_all.get(int(k_value))
         
         if not gps_data:
             QMessageBox.warning(self, "No GPS Data", 
                               f"No GPS/group data found for K={k_value}.")
-            return
+            return False
         
         # Save current selection
         current_selection = list(self.selected_samples) if hasattr(self, 'selected_samples') else []
@@ -477,12 +524,7 @@ class EntropyMaxFinal(QMainWindow):
         # Restore selection
         if current_selection:
             self.map_sample_widget.sample_list.set_selection(current_selection)
-        
-        # Update preview card
-        self.map_preview_card.update_status(f"Loaded {len(markers)} samples (K={k_value})")
-        
-        if announce:
-            self.statusBar().showMessage(f"Map updated for K={k_value}")
+        return True
     
     def _on_show_map(self):
         """Load map data from Parquet and display."""
@@ -581,12 +623,10 @@ class EntropyMaxFinal(QMainWindow):
         self.map_sample_widget.load_data(updated_markers)
         
     def _on_run_analysis(self, params):
-        """Run analysis using real CLI"""
+        """Run analysis using real CLI (on a worker thread, see _analysis_steps)"""
         from PyQt6.QtWidgets import QProgressDialog
         from PyQt6.QtCore import Qt
         from utils.temp_manager import TempFileManager
-        from utils.cli_integration import CLIIntegration
-        from utils.data_pipeline import DataPipeline
         
         # Cross-check sample names between Raw and GPS before heavy work
         try:
@@ -625,100 +665,181 @@ class EntropyMaxFinal(QMainWindow):
         
         # Initialize managers
         self.temp_manager = TempFileManager()
+        temp_manager = self.temp_manager
+        # Drop the previous result first: it memory-maps its session cache,
+        # which cannot be deleted or replaced while mapped on Windows.
+        self.current_analysis_data = {}
+        self._map_result = None
+        self._group_details_cache.clear()
         
-        try:
-            # Setup binary from bundle (always copy to ensure integrity)
+        # Show progress dialog; the window stays responsive while the worker runs
+        progress = QProgressDialog("Running analysis...", "Cancel", 0, 5, self)
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setAutoClose(False)
+        progress.show()
+        
+        def close_progress():
             try:
-                binary_path = self.temp_manager.setup_binary_from_bundle()
-            except Exception as e:
-                raise Exception(f"Failed to setup CLI binary: {e}")
-            
-            cli = CLIIntegration(cli_path=binary_path)
-            pipeline = DataPipeline()
-            
-            # Show progress dialog
-            progress = QProgressDialog("Running analysis...", None, 0, 5, self)
-            progress.setWindowModality(Qt.WindowModality.WindowModal)
-            progress.show()
-            
-            # Step 1: Setup binary
-            progress.setLabelText("Preparing analysis environment...")
-            progress.setValue(1)
-            QApplication.processEvents()
-            
-            # Step 2: Run CLI
-            progress.setLabelText("Running EntropyMax analysis...")
-            progress.setValue(2)
-            QApplication.processEvents()
-            
-            output_csv = str(self.temp_manager.get_path('cli_output'))
-            success, message = cli.run_analysis(
-                params['input_file'],
-                params['gps_file'], 
-                output_csv,
-                params,
-                working_dir=str(self.temp_manager.session_dir)
-            )
-            
-            if not success:
-                raise Exception(f"CLI failed: {message}")
+                progress.canceled.disconnect()  # closing the dialog emits canceled
+            except TypeError:
+                pass  # already closed
+            progress.close()
+        
+        def on_progress(report):
+            progress.setValue(report.step)
+            progress.setLabelText(report.message)
+        
+        def on_cancel_requested():
+            self.statusBar().showMessage("Cancelling analysis...")
+            worker.cancel()
+        
+        def on_cancelled():
+            close_progress()
+            self.statusBar().showMessage("Analysis cancelled.")
+            temp_manager.cleanup()
+        
+        def on_error(e):
+            close_progress()
+            QMessageBox.critical(self, "Analysis Error", str(e))
+            self.statusBar().showMessage("Analysis failed.")
+            # Cleanup on error
+            temp_manager.cleanup()
+        
+        def on_result(analysis_data):
+            try:
+                # Step 5: Update UI
+                progress.setLabelText("Updating visualizations...")
+                progress.setValue(5)
                 
-            # Step 3: Convert to Parquet
-            progress.setLabelText("Converting to Parquet format...")
-            progress.setValue(3)
-            QApplication.processEvents()
-            
-            parquet_path = str(self.temp_manager.get_path('parquet'))
-            if not pipeline.csv_to_parquet(output_csv, parquet_path):
-                raise Exception("Failed to convert CSV to Parquet")
+                # Save analysis data
+                optimal_k = analysis_data.get('optimal_k')
+                self.current_analysis_data = {
+                    **params,
+                    **analysis_data
+                }
+                # reset group details cache on new run
+                self._group_details_cache.clear()
                 
-            # Step 4: Extract data
-            progress.setLabelText("Extracting analysis results...")
-            progress.setValue(4)
-            QApplication.processEvents()
-            
-            analysis_data = pipeline.extract_analysis_data(parquet_path)
-            if not analysis_data:
-                raise Exception("Failed to extract data from Parquet")
+                # Plot results
+                self._plot_analysis_results()
                 
-            # Step 5: Update UI
-            progress.setLabelText("Updating visualizations...")
-            progress.setValue(5)
-            QApplication.processEvents()
-            
-            # Save analysis data
-            optimal_k = analysis_data.get('optimal_k')
-            self.current_analysis_data = {
-                **params,
-                **analysis_data,
-                'parquet_path': parquet_path
-            }
-            # reset group details cache on new run
-            self._group_details_cache = {}
-            
-            # Plot results
-            self._plot_analysis_results()
-            
-            # Update status (don't update map yet, wait for Step 4)
-            self.ch_preview_card.update_status("Analysis complete")
-            self.rs_preview_card.update_status("Analysis complete")
-            self.map_preview_card.update_status("Ready - Click 'Update Map View' to display results")
-            
-            # Enable next step buttons
-            self.control_panel.show_map_btn.setEnabled(True)
-            self.control_panel.export_btn.setEnabled(True)
+                # Update status (don't update map yet, wait for Step 4)
+                self.ch_preview_card.update_status("Analysis complete")
+                self.rs_preview_card.update_status("Analysis complete")
+                self.map_preview_card.update_status(
+                    "Ready - Click 'Update Map View' to display results")
+                
+                # Enable next step buttons
+                self.control_panel.show_map_btn.setEnabled(True)
+                self.control_panel.export_btn.setEnabled(True)
+                
+                close_progress()
+                self.statusBar().showMessage(
+                    f"Analysis complete. Optimal K={optimal_k}. "
+                    "Click 'Update Map View' to see results")
+                self._prefetch_group_details(optimal_k)
+            except Exception as e:
+                on_error(e)
+        
+        worker = Worker(self._analysis_steps, temp_manager, params)
+        worker.signals.progress.connect(on_progress)
+        worker.signals.result.connect(on_result)
+        worker.signals.error.connect(on_error)
+        worker.signals.cancelled.connect(on_cancelled)
+        progress.canceled.connect(on_cancel_requested)
+        start_worker(worker)
+        
+    @staticmethod
+    def _analysis_steps(context, temp_manager, params):
+        """CLI run, Parquet conversion and extraction for _on_run_analysis.
+        
+        Runs on a worker thread and must not touch widgets: progress goes
+        through context, the analysis data dict (with 'parquet_path') is
+        returned.
+        """
+        import shutil
+        import time
+        from pathlib import Path
+
+        from utils.cli_integration import CLIIntegration
+        from utils.data_pipeline import DataPipeline
+        
+        # Step 1: Setup binary from bundle (always copy to ensure integrity)
+        context.progress(1, 5, "Preparing analysis environment...")
+        try:
+            binary_path = temp_manager.setup_binary_from_bundle()
+        except Exception as e:
+            raise Exception(f"Failed to setup CLI binary: {e}")
+        
+        cli = CLIIntegration(cli_path=binary_path)
+        pipeline = DataPipeline()
+        
+        # Step 2: Run CLI
+        context.progress(2, 5, "Running EntropyMax analysis...")
+        output_csv = str(temp_manager.get_path('cli_output'))
+        parquet_path = str(temp_manager.get_path('parquet'))
+        normalized_dir = temp_manager.get_path('normalized')
+        # Stale results from a previous run must not be mistaken for new output
+        Path(output_csv).unlink(missing_ok=True)
+        Path(parquet_path).unlink(missing_ok=True)
+        Path(parquet_path).with_suffix('.arrow').unlink(missing_ok=True)
+        shutil.rmtree(normalized_dir, ignore_errors=True)
+        context.check_cancelled()
+        run = cli.start_analysis(
+            params['input_file'],
+            params['gps_file'], 
+            output_csv,
+            params,
+            working_dir=str(temp_manager.session_dir),
+            output_parquet=parquet_path,
+            output_normalized_dir=str(normalized_dir)
+        )
+        
+        # Follow the CLI progress events until it exits or the user cancels
+        k_total, k_done = 0, 0
+        while not run.done():
+            for event in run.poll():
+                kind = event.get('event')
+                if kind == 'start':
+                    k_total = event['k_max'] - event['k_min'] + 1
+                elif kind == 'k_done':
+                    k_done += 1
+                if kind in ('k_start', 'pass', 'k_done'):
+                    label = f"Optimising groupings: {k_done} of {k_total} K values done"
+                    if kind == 'pass':
+                        label += f"\nK={event['k']}: pass {event['pass']}, {event['moves']} moves"
+                    context.progress(2, 5, label)
+                elif kind == 'writing':
+                    context.progress(2, 5, "Writing results...")
+            if context.cancelled:
+                run.cancel()
+                break
+            time.sleep(0.05)
+        
+        success, message = run.finish()
+        if run.cancelled:
+            raise WorkerCancelled()
+        if not success:
+            raise Exception(f"CLI failed: {message}")
             
-            progress.close()
-            self.statusBar().showMessage(f"Analysis complete. Optimal K={optimal_k}. Click 'Update Map View' to see results")
+        # Step 3: Convert to Parquet (only when the CLI could not write it directly)
+        if normalized_dir.is_dir():
+            # Normalized layout: the extractor reads the directory directly
+            parquet_path = str(normalized_dir)
+        elif not Path(parquet_path).exists():
+            context.progress(3, 5, "Converting to Parquet format...")
+            if not pipeline.csv_to_parquet(output_csv, parquet_path):
+                raise Exception("Failed to convert CSV to Parquet")
+        context.check_cancelled()
             
-        except Exception as e:
-            if 'progress' in locals():
-                progress.close()
-            QMessageBox.critical(self, "Analysis Error", str(e))
-            self.statusBar().showMessage("Analysis failed.")
-            # Cleanup on error
-            if hasattr(self, 'temp_manager'):
-                self.temp_manager.cleanup()
+        # Step 4: Extract data
+        context.progress(4, 5, "Extracting analysis results...")
+        # Load through a memory-mapped Arrow copy; parquet_path stays the
+        # source for exports
+        analysis_data = pipeline.extract_analysis_data(pipeline.write_session_cache(parquet_path))
+        if not analysis_data:
+            raise Exception("Failed to extract data from Parquet")
+        return {**analysis_data, 'parquet_path': parquet_path}
         
     def _on_show_group_details(self):
         """Show group detail popups with line charts for each group."""
@@ -728,8 +849,6 @@ class EntropyMaxFinal(QMainWindow):
             return
         
         try:
-            from utils.data_pipeline import DataPipeline
-            
             # Use user-selected K if available; otherwise prefer optimal K when valid; else fall back to max available K
             k_values = self.current_analysis_data.get('k_values', [])
             optimal_k = self.current_analysis_data.get('optimal_k', None)
@@ -742,31 +861,33 @@ class EntropyMaxFinal(QMainWindow):
             else:
                 raise Exception("No available K values in analysis data")
             
-            parquet_path = self.current_analysis_data.get('parquet_path')
-            
-            if not parquet_path:
-                raise Exception("Parquet file path not found in analysis data")
-            
-            # Extract group details from Parquet
-            pipeline = DataPipeline()
-            group_details = pipeline.extract_group_details(parquet_path, k_value)
-            
+        except Exception as e:
+            QMessageBox.critical(self, "Error Showing Group Details", str(e))
+            return
+        
+        def show(group_details):
             if not group_details:
-                raise Exception(f"No group data found for K={k_value}")
+                QMessageBox.critical(self, "Error Showing Group Details",
+                                     f"No group data found for K={k_value}")
+                return
             
             # Show group detail popups with extracted data
             self.group_detail_popup.load_and_show_popups_from_data(
                 group_details, k_value, x_unit='μm', y_unit='%'
             )
             
-            optimal_k = self.current_analysis_data.get('optimal_k', None)
             if k_value == optimal_k:
                 self.statusBar().showMessage(f"Showing details for K={k_value} groups (Optimal).")
             else:
                 self.statusBar().showMessage(f"Showing details for K={k_value} groups.")
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Error Showing Group Details", str(e))
+        
+        # Extract group details from the loaded results in the background
+        self.statusBar().showMessage(f"Loading details for K={k_value} groups...")
+        self._load_group_details_for_k(
+            k_value, show,
+            on_error=lambda e: QMessageBox.critical(self, "Error Showing Group Details", str(e))
+        )
+        self._prefetch_group_details(k_value)
     
     def _on_export_results(self):
         """Export analysis results CSV and cleanup temp files."""
@@ -791,27 +912,42 @@ class EntropyMaxFinal(QMainWindow):
         if not file_path:  # User cancelled
             return
         
-        try:
-            from pathlib import Path
-            
-            # Ensure .csv extension
-            if not file_path.endswith('.csv'):
-                file_path += '.csv'
-            
-            # Export the processed CSV from temp directory
-            self.temp_manager.export_to('cli_output', Path(file_path))
-            
+        from pathlib import Path
+        
+        # Ensure .csv extension
+        if not file_path.endswith('.csv'):
+            file_path += '.csv'
+        
+        temp_manager = self.temp_manager
+        parquet_path = (self.current_analysis_data or {}).get('parquet_path') \
+            or temp_manager.get_path('parquet')
+        
+        def export(context):
+            # Export the processed CSV from temp directory; with Parquet
+            # output from the CLI, write the CSV from the Parquet file instead
+            if temp_manager.file_exists('cli_output'):
+                temp_manager.export_to('cli_output', Path(file_path))
+            else:
+                from utils.data_pipeline import DataPipeline
+                if not DataPipeline.parquet_to_csv(str(parquet_path), file_path):
+                    raise FileNotFoundError(f"No analysis output found at {parquet_path}")
+        
+        def exported(_):
             # Clean up temporary files after successful export
-            self.temp_manager.cleanup()
+            temp_manager.cleanup()
             
             QMessageBox.information(self, "Export Successful", 
                                 f"Results saved to:\n{file_path}\n\nTemporary files have been cleaned up.")
             
             self.statusBar().showMessage(f"Results exported to {Path(file_path).name}")
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Export Error", 
-                              f"Failed to export results:\n{str(e)}")
+        
+        self.statusBar().showMessage("Exporting results...")
+        worker = Worker(export)
+        worker.signals.result.connect(exported)
+        worker.signals.error.connect(
+            lambda e: QMessageBox.critical(self, "Export Error",
+                                           f"Failed to export results:\n{str(e)}"))
+        start_worker(worker)
     
     def _on_export_kml(self):
         """Export map data as KML file using teammate's implementation."""
@@ -900,6 +1036,7 @@ class EntropyMaxFinal(QMainWindow):
                 groups_to_export = actual_groups
             else:
                 groups_to_export = list(range(1, k_value + 1))
+            exports = []
             for group_number in groups_to_export:
                 filename_suffix = f"k{k_value}_group{group_number}"
                 file_path, _ = QFileDialog.getSaveFileName(
@@ -912,11 +1049,14 @@ class EntropyMaxFinal(QMainWindow):
                     continue
                 if not file_path.endswith('.kml'):
                     file_path += '.kml'
-                try:
-                    create_kml(parquet_path, k_value, group_number, file_path.replace('.kml', ''))
-                except Exception as e:
+                exports.append((group_number, file_path.replace('.kml', '')))
+            
+            def exported_separately(failures):
+                for group_number, e in failures:
                     QMessageBox.critical(self, "KML Export Error", f"Failed to export KML for group {group_number};\n{str(e)}")
-            self.statusBar().showMessage(f"KML exported: K = {k_value}, all groups separately")
+                self.statusBar().showMessage(f"KML exported: K = {k_value}, all groups separately")
+            
+            self._export_kml_in_background(parquet_path, k_value, exports, exported_separately)
             return
         if group_choice == "All groups":
             group_number = 0
@@ -938,23 +1078,52 @@ class EntropyMaxFinal(QMainWindow):
         if not file_path:  # User cancelled
             return
         
-        try:
-            # Ensure .kml extension
-            if not file_path.endswith('.kml'):
-                file_path += '.kml'
-            
-            # Use teammate's create_kml function with group_number parameter
-            # Parameters: file_name (parquet), k_value, group_number (0 = all groups), output_file_name
-            create_kml(parquet_path, k_value, group_number, file_path.replace('.kml', ''))
-            
+        # Ensure .kml extension
+        if not file_path.endswith('.kml'):
+            file_path += '.kml'
+        
+        def exported(failures):
+            if failures:
+                QMessageBox.critical(self, "KML Export Error", 
+                                  f"Failed to export KML:\n{str(failures[0][1])}")
+                return
             QMessageBox.information(self, "Export Successful", 
                                 f"KML file exported successfully:\n{file_path}\n\nK-value: {k_value}\n{export_description}")
             
             self.statusBar().showMessage(f"KML exported: K={k_value}, {export_description}")
-            
-        except Exception as e:
-            QMessageBox.critical(self, "KML Export Error", 
-                              f"Failed to export KML:\n{str(e)}")
+        
+        # Use teammate's create_kml function with group_number parameter (0 = all groups)
+        self._export_kml_in_background(parquet_path, k_value,
+                                       [(group_number, file_path.replace('.kml', ''))], exported)
+    
+    def _export_kml_in_background(self, parquet_path, k_value, exports, on_done):
+        """Write KML files on a worker thread.
+        
+        exports is a list of (group_number, output_file_name) for create_kml;
+        on_done(failures) gets the (group_number, exception) pairs that failed.
+        """
+        def export(context, parquet_path, k_value, exports):
+            failures = []
+            for n, (group_number, output_file_name) in enumerate(exports):
+                context.check_cancelled()
+                context.progress(n, len(exports), f"Exporting KML for group {group_number}...")
+                try:
+                    create_kml(parquet_path, k_value, group_number, output_file_name)
+                except Exception as e:
+                    failures.append((group_number, e))
+            return failures
+        
+        if not exports:
+            on_done([])
+            return
+        self.statusBar().showMessage(f"Exporting KML for K={k_value}...")
+        worker = Worker(export, parquet_path, k_value, exports)
+        worker.signals.progress.connect(lambda report: self.statusBar().showMessage(report.message))
+        worker.signals.result.connect(on_done)
+        worker.signals.error.connect(
+            lambda e: QMessageBox.critical(self, "KML Export Error",
+                                           f"Failed to export KML:\n{str(e)}"))
+        start_worker(worker)
             
     def _plot_analysis_results(self):
         """Plot the analysis results."""
@@ -1002,7 +1171,8 @@ class EntropyMaxFinal(QMainWindow):
             self.selected_psd_widget.clear()
         self.group_detail_popup.close_all()
         self.current_analysis_data = {}
-        self._group_details_cache = {}
+        self._map_result = None
+        self._group_details_cache.clear()
         
         # Reset preview cards
         self.map_preview_card.update_status("Not loaded")
@@ -1030,25 +1200,86 @@ class EntropyMaxFinal(QMainWindow):
         super().closeEvent(event)
 
 
-    def _get_group_details_for_k(self, k_value):
-        """Load group details for K with simple cache."""
+    def _load_group_details_for_k(self, k_value, on_loaded, on_error=None, speculative=False):
+        """Load group details for K on a worker thread, with LRU cache.
+        
+        on_loaded(details) runs in the GUI thread, right away when K is
+        cached; details is None if nothing was found. on_error(exception)
+        runs if loading failed. Results that arrive after a new analysis
+        has replaced the current one are dropped. Speculative loads
+        (prefetch) run at low priority and are cached as least recently used.
+        """
         if not self.current_analysis_data:
-            return None
+            return
         k = int(k_value)
         if k in self._group_details_cache:
-            return self._group_details_cache[k]
-        parquet_path = self.current_analysis_data.get('parquet_path')
-        if not parquet_path:
-            return None
-        try:
-            from utils.data_pipeline import DataPipeline
-            pipeline = DataPipeline()
-            details = pipeline.extract_group_details(parquet_path, k)
+            if not speculative:
+                on_loaded(self._group_details_cache.get(k))
+            return
+        # Loaded results from the analysis run (re-read the file only if missing)
+        source = (self.current_analysis_data.get('result')
+                  or self.current_analysis_data.get('parquet_path'))
+        if not source:
+            if on_error:
+                on_error(Exception("Parquet file path not found in analysis data"))
+            return
+        
+        # One load per K and result; later requests wait for the same worker
+        key = (k, id(source))
+        waiting = self._group_details_loading.get(key)
+        if waiting is not None:
+            waiting.append((on_loaded, on_error, speculative))
+            return
+        waiting = self._group_details_loading[key] = [(on_loaded, on_error, speculative)]
+        
+        def is_current():
+            current = (self.current_analysis_data.get('result')
+                       or self.current_analysis_data.get('parquet_path'))
+            return current is source
+        
+        def loaded(details):
+            if not is_current():
+                return
             if details:
-                self._group_details_cache[k] = details
-            return details
-        except Exception:
-            return None
+                # Only prefetched so far: keep it behind what the user has opened
+                self._group_details_cache.put(k, details,
+                                              speculative=all(s for _, _, s in waiting))
+            for callback, _, _ in waiting:
+                callback(details)
+        
+        def failed(e):
+            if not is_current():
+                return
+            for _, callback, _ in waiting:
+                if callback:
+                    callback(e)
+        
+        def load(context, source, k):
+            from utils.data_pipeline import DataPipeline
+            return DataPipeline.extract_group_details(source, k)
+        
+        worker = Worker(load, source, k)
+        worker.signals.result.connect(loaded)
+        worker.signals.error.connect(failed)
+        worker.signals.finished.connect(lambda: self._group_details_loading.pop(key, None))
+        start_worker(worker, priority=-1 if speculative else 0)
+    
+    def _prefetch_group_details(self, k_value):
+        """Load group details for K±1 and the optimal K in the background.
+        
+        Users nearly always step to a neighbouring K next; prefetched
+        details only use spare room in the cache.
+        """
+        if not self.current_analysis_data or k_value is None:
+            return
+        k_values = set(self.current_analysis_data.get('k_values', []))
+        optimal_k = self.current_analysis_data.get('optimal_k')
+        candidates = [int(k_value) + 1, int(k_value) - 1]
+        if optimal_k is not None:
+            candidates.append(int(optimal_k))
+        for k in candidates:
+            if k in k_values and k not in self._group_details_cache:
+                self._load_group_details_for_k(k, lambda details: None, speculative=True)
 
     def _refresh_selected_psd(self):
         """Update Selected PSD widget based on current selection and K."""
@@ -1069,10 +1300,16 @@ class EntropyMaxFinal(QMainWindow):
         if k_value is None:
             self.selected_psd_widget.clear()
             return
-        group_details = self._get_group_details_for_k(k_value)
-        if not group_details:
-            self.selected_psd_widget.clear()
+        if k_value not in self._group_details_cache:
+            # Refresh again once the details are loaded in the background
+            self._load_group_details_for_k(
+                k_value,
+                lambda details: (self._refresh_selected_psd() if details
+                                 else self.selected_psd_widget.clear()),
+                on_error=lambda e: self.selected_psd_widget.clear()
+            )
             return
+        group_details = self._group_details_cache.get(k_value)
         # collect x_labels and sample curves
         x_labels = None
         samples_to_plot = []
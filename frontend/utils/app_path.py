@@ -0,0 +1,16 @@
+"""Import path setup for the shared ``app`` package under src/."""
+
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[2] / 'src'
+
+
+def ensure_src_on_path() -> None:
+    """Put src/ on sys.path when running from a source checkout.
+
+    Frozen builds ship ``app`` through the spec files' ``pathex`` instead, so a
+    missing src/ directory is not an error.
+    """
+    if SRC_DIR.is_dir() and str(SRC_DIR) not in sys.path:
+        sys.path.insert(0, str(SRC_DIR))
@@ -5,14 +5,153 @@ Handles command construction and execution.
 
 import subprocess
 import os
+import json
+import queue
+import threading
+import time
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
 from .cache_paths import ensure_cache_root
 
+# Exit status of run_entropymax after SIGINT/SIGTERM (EM_ERR_CANCELLED = -5)
+CANCELLED_EXIT_CODE = 251
+
+
+def analysis_deadline(params: Dict) -> Optional[float]:
+    """Deadline in seconds from params['deadline_s'] or EM_ANALYSIS_DEADLINE (None = no limit)."""
+    value = params.get('deadline_s')
+    if value is None:
+        value = os.environ.get('EM_ANALYSIS_DEADLINE')
+    try:
+        seconds = float(value) if value not in (None, '') else 0.0
+    except ValueError:
+        logger.warning(f"Ignoring invalid analysis deadline: {value!r}")
+        return None
+    return seconds if seconds > 0 else None
+
+
+class AnalysisRun:
+    """A run_entropymax process started by CLIIntegration.start_analysis.
+
+    The CLI is started with --progress; a reader thread parses its JSON event
+    lines so the caller can poll() them without blocking (e.g. from the Qt
+    event loop). cancel() asks the CLI to stop at the end of the current pass
+    and kills it if it does not exit within the grace period.
+    """
+
+    def __init__(self, cmd: List[str], working_dir: str, deadline_s: Optional[float],
+                 finalize):
+        self._finalize = finalize
+        self._events: "queue.Queue[Dict]" = queue.Queue()
+        self._stderr: List[str] = []
+        self._cancelled = False
+        self._timed_out = False
+        self._result: Optional[Tuple[bool, str]] = None
+        self.started = time.monotonic()
+        self.deadline = self.started + deadline_s if deadline_s else None
+        self.deadline_s = deadline_s
+
+        self.process = subprocess.Popen(
+            cmd,
+            cwd=working_dir,  # Run in writable cache directory
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+        )
+        self._readers = [
+            threading.Thread(target=self._read_events, daemon=True),
+            threading.Thread(target=self._read_stderr, daemon=True),
+        ]
+        for reader in self._readers:
+            reader.start()
+
+    def _read_events(self):
+        for line in self.process.stdout:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                logger.debug(f"CLI: {line}")
+                continue
+            if isinstance(event, dict) and 'event' in event:
+                self._events.put(event)
+
+    def _read_stderr(self):
+        for line in self.process.stderr:
+            self._stderr.append(line)
+
+    def poll(self) -> List[Dict]:
+        """Return the progress events received since the last call (never blocks)."""
+        if self.deadline is not None and not self._timed_out and time.monotonic() > self.deadline:
+            if self.process.poll() is None:
+                logger.error("CLI execution timeout")
+                self._timed_out = True
+                self.cancel()
+        events = []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def done(self) -> bool:
+        return self.process.poll() is not None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled and not self._timed_out
+
+    def cancel(self, grace_s: float = 5.0):
+        """Stop the CLI: SIGTERM first (clean stop after the current pass), then kill."""
+        if self.process.poll() is not None:
+            return
+        self._cancelled = True
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=grace_s)
+        except subprocess.TimeoutExpired:
+            logger.warning("CLI did not stop after terminate, killing it")
+            self.process.kill()
+
+    def finish(self) -> Tuple[bool, str]:
+        """Wait for the CLI to exit and collect its output. Returns (success, message)."""
+        if self._result is not None:
+            return self._result
+        while not self.done():
+            self.poll()  # enforces the deadline
+            try:
+                self.process.wait(timeout=0.1)
+            except subprocess.TimeoutExpired:
+                pass
+        for reader in self._readers:
+            reader.join(timeout=1.0)
+
+        code = self.process.returncode
+        if self._timed_out:
+            self._result = (False, f"Analysis timeout (>{self.deadline_s:g} s)")
+        elif self._cancelled or code == CANCELLED_EXIT_CODE:
+            # Also when the CLI was interrupted from outside (e.g. Ctrl+C)
+            logger.info("CLI analysis cancelled")
+            self._result = (False, "Analysis cancelled")
+        elif code == 0:
+            try:
+                self._result = self._finalize()
+            except Exception as e:
+                logger.error(f"CLI execution exception: {e}")
+                self._result = (False, str(e))
+        else:
+            error_msg = "".join(self._stderr)
+            logger.error(f"CLI failed with code {code}: {error_msg}")
+            self._result = (False, f"CLI error (code {code}): {error_msg}")
+        return self._result
+
 
 class CLIIntegration:
     """Handle interaction with run_entropymax CLI"""
@@ -36,26 +175,62 @@ class CLIIntegration:
                 f"Make sure to call TempFileManager.setup_binary_from_bundle() first."
             )
             
-    def run_analysis(self, 
-                    input_csv: str, 
+    def run_analysis(self,
+                    input_csv: str,
                     gps_csv: str,
                     output_csv: str,
                     params: Dict,
-                    working_dir: Optional[str] = None) -> Tuple[bool, str]:
+                    working_dir: Optional[str] = None,
+                    output_parquet: Optional[str] = None,
+                    output_normalized_dir: Optional[str] = None) -> Tuple[bool, str]:
         """
-        Run CLI analysis
-        
+        Run CLI analysis and wait for it to finish
+
         Args:
             input_csv: Path to raw data CSV
             gps_csv: Path to GPS coordinates CSV
             output_csv: Path for output CSV (where to move the CLI output)
-            params: Analysis parameters dict
+            params: Analysis parameters dict. params['deadline_s'] (or the
+                        EM_ANALYSIS_DEADLINE environment variable) limits the
+                        run time in seconds; by default there is no limit.
             working_dir: Working directory where CLI will run and create output.csv
                         If None, uses the directory of output_csv
+            output_parquet: If given, ask the CLI for Parquet output and move it
+                        here. Builds without Parquet support still write CSV to
+                        output_csv, so callers should check which file exists.
+            output_normalized_dir: If given, collect the normalized tables
+                        (samples, metrics, membership) into this directory.
+                        The CLI writes them when params['normalized_output'] is
+                        set or EM_OUTPUT_LAYOUT=normalized is in the environment.
             
         Returns:
             (success: bool, message/error: str)
         """
+        try:
+            run = self.start_analysis(input_csv, gps_csv, output_csv, params,
+                                      working_dir=working_dir,
+                                      output_parquet=output_parquet,
+                                      output_normalized_dir=output_normalized_dir)
+        except Exception as e:
+            logger.error(f"CLI execution exception: {e}")
+            return False, str(e)
+        return run.finish()
+
+    def start_analysis(self,
+                       input_csv: str,
+                       gps_csv: str,
+                       output_csv: str,
+                       params: Dict,
+                       working_dir: Optional[str] = None,
+                       output_parquet: Optional[str] = None,
+                       output_normalized_dir: Optional[str] = None) -> AnalysisRun:
+        """
+        Start CLI analysis without waiting for it.
+
+        Takes the same arguments as run_analysis. Poll the returned
+        AnalysisRun for progress events, cancel() it if needed and call
+        finish() once done() to move the output into place.
+        """
         # Build command (CLI only accepts input files, not output path)
         # CLI will write to 'output.csv' in working directory
         cmd = [
@@ -79,6 +254,12 @@ class CLIIntegration:
         row_props = '1' if params.get('take_proportions', True) else '0'
         cmd.extend(['--row_proportions', row_props])
         
+        if output_parquet:
+            cmd.extend(['--output-format', 'parquet'])
+        if output_normalized_dir and params.get('normalized_output'):
+            cmd.extend(['--output-layout', 'normalized'])
+        cmd.append('--progress')
+
         # Determine working directory
         if working_dir is None:
             working_dir = str(Path(output_csv).parent)
@@ -88,36 +269,40 @@ class CLIIntegration:
         
         # CLI will write output.csv to working directory
         default_output = Path(working_dir) / "output.csv"
+        default_parquet = Path(working_dir) / "output.parquet"
         
-        try:
-            # Execute CLI with specified working directory
-            result = subprocess.run(
-                cmd,
-                cwd=working_dir,  # Run in writable cache directory
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 minutes timeout
-            )
-            
-            if result.returncode == 0:
-                # CLI succeeded, now move output.csv to desired location
-                if default_output.exists():
-                    import shutil
-                    shutil.move(str(default_output), output_csv)
-                    logger.info(f"CLI analysis completed, output moved to {output_csv}")
-                    return True, "Analysis completed successfully"
-                else:
-                    logger.error(f"CLI succeeded but output file not found at {default_output}")
-                    return False, f"CLI output file not found at expected location: {default_output}"
-            else:
-                error_msg = result.stderr if result.stderr else result.stdout
-                logger.error(f"CLI failed with code {result.returncode}: {error_msg}")
-                return False, f"CLI error (code {result.returncode}): {error_msg}"
-                
-        except subprocess.TimeoutExpired:
-            logger.error("CLI execution timeout")
-            return False, "Analysis timeout (>5 minutes)"
-        except Exception as e:
-            logger.error(f"CLI execution exception: {e}")
-            return False, str(e)
-            
+        def finalize() -> Tuple[bool, str]:
+            import shutil
+            if (output_normalized_dir
+                    and self._collect_normalized(working_dir, output_normalized_dir)):
+                logger.info("CLI analysis completed, normalized output moved to "
+                            f"{output_normalized_dir}")
+                return True, "Analysis completed successfully"
+            if output_parquet and default_parquet.exists():
+                shutil.move(str(default_parquet), output_parquet)
+                logger.info(f"CLI analysis completed, output moved to {output_parquet}")
+                return True, "Analysis completed successfully"
+            # CLI succeeded, now move output.csv to desired location
+            if default_output.exists():
+                shutil.move(str(default_output), output_csv)
+                logger.info(f"CLI analysis completed, output moved to {output_csv}")
+                return True, "Analysis completed successfully"
+            logger.error(f"CLI succeeded but output file not found at {default_output}")
+            return False, f"CLI output file not found at expected location: {default_output}"
+
+        return AnalysisRun(cmd, working_dir, analysis_deadline(params), finalize)
+
+    @staticmethod
+    def _collect_normalized(working_dir: str, output_dir: str) -> bool:
+        """Move output_{samples,metrics,membership}.<ext> into output_dir as <part>.<ext>."""
+        import shutil
+        parts = ('samples', 'metrics', 'membership')
+        for ext in ('parquet', 'csv'):
+            sources = [Path(working_dir) / f"output_{part}.{ext}" for part in parts]
+            if all(src.exists() for src in sources):
+                Path(output_dir).mkdir(parents=True, exist_ok=True)
+                for part, src in zip(parts, sources):
+                    shutil.move(str(src), str(Path(output_dir) / f"{part}.{ext}"))
+                return True
+        return False
+            
\ No newline at end of file
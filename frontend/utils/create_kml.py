@@ -1,15 +1,17 @@
 from pykml.factory import KML_ElementMaker as KML
 from lxml import etree
-import pandas as pd
+from .data_pipeline import DataPipeline
 
 def create_kml(file_name, k_value, group_number, output_file_name):
     '''
     creates kml with data assuming chosen k value
-        file_name = input file_name
+        file_name = input file_name (wide parquet or normalized result directory)
         k_value = k value to show in kml file
         group_number = group number to show, 0 to show all in k
     '''
-    df = pd.read_parquet(file_name, filters=[('K', '=', k_value)])
+    # Only this K's row group and the columns written to the KML are read
+    df = DataPipeline.load_results_frame(file_name, k_value,
+                                         columns=['K', 'Group', 'Sample', 'latitude', 'longitude'])
     # checks if group number needs to be filtered
     if group_number != 0:
         df = df[df['Group'] == group_number]
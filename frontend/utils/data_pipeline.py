@@ -4,14 +4,19 @@ Handles CSV to Parquet conversion and data extraction.
 """
 
 import pandas as pd
-import pyarrow.parquet as pq
+import pyarrow as pa
 from pathlib import Path
-from typing import Dict, List, Optional
-import numpy as np
+from typing import Dict, List, Optional, Union
 import logging
 
 # Use teammate's refactored extractor for parquet parsing
-from .parquet_extractor import ParquetDataExtractor
+from .parquet_extractor import (
+    AnalysisResult,
+    ParquetDataExtractor,
+    read_normalized_part,
+    write_ipc_cache,
+    write_results_parquet,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +29,10 @@ class DataPipeline:
         """
         Convert CSV to Parquet format
         
+        Results are written sorted by (K, Group) with one row group per K
+        and column statistics (see write_results_parquet), so K-filtered
+        reads only decode that K.
+        
         Args:
             csv_path: Path to input CSV
             parquet_path: Path for output Parquet
@@ -33,10 +42,9 @@ class DataPipeline:
         """
         try:
             df = pd.read_csv(csv_path, low_memory=False)
-            df.to_parquet(
-                parquet_path, 
-                index=False, 
-                engine='pyarrow',
+            write_results_parquet(
+                pa.Table.from_pandas(df, preserve_index=False),
+                parquet_path,
                 compression='snappy'
             )
             logger.info(f"Converted CSV to Parquet: {parquet_path}")
@@ -45,6 +53,101 @@ class DataPipeline:
             logger.error(f"CSV to Parquet conversion failed: {e}")
             return False
             
+    @staticmethod
+    def parquet_to_csv(parquet_path: str, csv_path: str) -> bool:
+        """
+        Write a Parquet result file back out as CSV (same columns and order).
+        A normalized result directory is expanded to the wide CLI layout.
+        
+        Args:
+            parquet_path: Path to input Parquet or normalized result directory
+            csv_path: Path for output CSV
+            
+        Returns:
+            Success status
+        """
+        try:
+            df = DataPipeline.load_results_frame(parquet_path)
+            df.to_csv(csv_path, index=False)
+            logger.info(f"Converted Parquet to CSV: {csv_path}")
+            return True
+        except Exception as e:
+            logger.error(f"Parquet to CSV conversion failed: {e}")
+            return False
+            
+    @staticmethod
+    def load_results_frame(result_path: str, k_value: Optional[int] = None,
+                           columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Load results as a DataFrame in the wide CLI layout
+        (K, Group, Sample, grain sizes, metrics, latitude, longitude).
+        
+        Args:
+            result_path: Wide Parquet file or normalized result directory
+            k_value: Only return rows for this K (all K values if None).
+                Wide files written per K row group only read that K.
+            columns: Only return these columns (all if None); wide files
+                only read these columns
+            
+        Returns:
+            DataFrame sorted by K, then Group
+        """
+        if not Path(result_path).is_dir():
+            filters = [('K', '=', int(k_value))] if k_value is not None else None
+            return pd.read_parquet(result_path, engine='pyarrow', filters=filters, columns=columns)
+        
+        samples = read_normalized_part(result_path, 'samples').to_pandas()
+        metrics = read_normalized_part(result_path, 'metrics').to_pandas()
+        k_columns = [f"K{int(k_value)}"] if k_value is not None else None
+        try:
+            membership = read_normalized_part(result_path, 'membership',
+                                              columns=k_columns).to_pandas()
+        except (KeyError, pa.ArrowInvalid):
+            membership = pd.DataFrame()
+        grain_cols = [c for c in samples.columns if c not in ('Sample', 'latitude', 'longitude')]
+        
+        frames = []
+        for col in membership.columns:
+            k = int(col.lstrip('K'))
+            if k_value is not None and k != int(k_value):
+                continue
+            part = samples[['Sample'] + grain_cols + ['latitude', 'longitude']].copy()
+            part.insert(0, 'Group', membership[col].to_numpy())
+            part.insert(0, 'K', k)
+            frames.append(part.sort_values('Group', kind='stable'))
+        if not frames:
+            return pd.DataFrame(columns=['K', 'Group', 'Sample'] + grain_cols
+                                + [c for c in metrics.columns if c != 'K']
+                                + ['latitude', 'longitude'])
+        
+        df = pd.concat(frames, ignore_index=True).merge(metrics, on='K', how='left')
+        metric_cols = [c for c in metrics.columns if c != 'K']
+        df = df[['K', 'Group', 'Sample'] + grain_cols + metric_cols + ['latitude', 'longitude']]
+        return df[columns] if columns is not None else df
+            
+    @staticmethod
+    def write_session_cache(result_path: str) -> str:
+        """
+        Write an uncompressed Arrow IPC copy of a result next to it
+        
+        AnalysisResult memory-maps the copy, so loading, reopening and
+        switching K decompress nothing and pages are only read on access.
+        
+        Args:
+            result_path: Wide Parquet file or normalized result directory
+            
+        Returns:
+            Path to load (the cache), or result_path if the cache could not
+            be written
+        """
+        try:
+            cache_path = write_ipc_cache(result_path)
+            logger.info(f"Wrote memory-mapped session cache: {cache_path}")
+            return cache_path
+        except Exception as e:
+            logger.warning(f"Session cache not written, reading {result_path} directly: {e}")
+            return result_path
+            
     @staticmethod
     def extract_analysis_data(parquet_path: str) -> Optional[Dict]:
         """
@@ -52,55 +155,31 @@ class DataPipeline:
         the refactored teammate extractor.
         
         Args:
-            parquet_path: Path to Parquet file
+            parquet_path: Path to Parquet file, its Arrow IPC session cache
+                (see write_session_cache) or normalized result directory
             
         Returns:
-            Dictionary with k_values, ch_values, rs_values, groupings, optimal_k
+            Dictionary with k_values, ch_values, rs_values, groupings, optimal_k,
+            gps_data and 'result', the loaded AnalysisResult. groupings and
+            gps_data are K -> dict mappings computed from it on lookup; pass
+            'result' to extract_group_details instead of the path to avoid
+            reloading the file.
         """
         try:
             # Use teammate's extractor for robust column handling
-            extractor = ParquetDataExtractor(parquet_path)
-            extractor.validate_data()
-            
-            # Load parquet as dataframe only for metrics (CH, Rs)
-            table = pq.read_table(parquet_path)
-            df = table.to_pandas()
+            result = AnalysisResult(parquet_path)
+            result.validate_data()
             
-            k_values = sorted(extractor.get_all_k_values())
             analysis_data = {
-                'k_values': [],
-                'ch_values': [],
-                'rs_values': [],
-                'groupings': {},
-                'optimal_k': None,
-                'gps_data': {}
+                'k_values': result.k_values,
+                'ch_values': result.ch_values,
+                'rs_values': result.rs_values,
+                'groupings': result.groupings,
+                'optimal_k': result.optimal_k,
+                'gps_data': result.gps_data,
+                'result': result
             }
-            
-            for k in k_values:
-                # Append K value
-                analysis_data['k_values'].append(int(k))
-                
-                # Metrics from dataframe (column names expected)
-                k_data = df[df['K'] == k]
-                first_row = k_data.iloc[0]
-                analysis_data['ch_values'].append(float(first_row['Calinski-Harabasz pseudo-F statistic']))
-                analysis_data['rs_values'].append(float(first_row['% explained']))
-                
-                # Groupings and GPS from extractor
-                groups: Dict[int, List[str]] = {}
-                gps_info = extractor.get_gps_data_for_k(int(k))
-                for sample_id, info in gps_info.items():
-                    gid = info['group']
-                    groups.setdefault(gid, []).append(sample_id)
-                
-                analysis_data['groupings'][int(k)] = groups
-                analysis_data['gps_data'][int(k)] = gps_info
-            
-            # Determine optimal K by maximum CH
-            if analysis_data['ch_values']:
-                ch_array = np.array(analysis_data['ch_values'])
-                optimal_idx = np.argmax(ch_array)
-                analysis_data['optimal_k'] = analysis_data['k_values'][optimal_idx]
+            if analysis_data['optimal_k'] is not None:
                 logger.info(f"Optimal K determined: {analysis_data['optimal_k']}")
             
             return analysis_data
@@ -110,59 +189,34 @@ class DataPipeline:
             return None
             
     @staticmethod
-    def extract_group_details(parquet_path: str, k_value: int) -> Optional[Dict]:
+    def extract_group_details(source: Union[str, AnalysisResult], k_value: int) -> Optional[Dict]:
         """
         Extract detailed group data for a specific K value using teammate's
         refactored ParquetDataExtractor, which handles variable grain size columns.
         
         Args:
-            parquet_path: Path to Parquet file
+            source: Loaded AnalysisResult (preferred), or path to Parquet file
+                or normalized result directory (only K=k_value is read)
             k_value: K value to extract
             
         Returns:
             Dictionary with sample data grouped by group ID
         """
         try:
-            extractor = ParquetDataExtractor(parquet_path)
-            extractor.validate_data()
+            if isinstance(source, AnalysisResult):
+                result = source
+            else:
+                result = ParquetDataExtractor(source, k_values=[int(k_value)])
             
-            group_ids = extractor.get_group_ids_for_k(k_value)
-            if not group_ids:
+            group_details = result.get_group_details(int(k_value))
+            if not group_details:
                 logger.warning(f"No data found for K={k_value}")
                 return None
             
-            # Build group details structure
-            group_details: Dict[int, Dict] = {}
-            
-            # Use dataframe to get column names and match with extractor's data
-            table = pq.read_table(parquet_path)
-            df = table.to_pandas()
-            
-            # Get grain size columns using same logic as extractor:
-            # From column 3 (after K, Group, Sample) to column_no - 8 (before statistics and GPS)
-            total_cols = len(df.columns)
-            grain_start = 3
-            val_max = total_cols - 8
-            grain_size_cols = list(df.columns[grain_start:val_max])
-            
-            logger.debug(f"Total columns: {total_cols}, Grain size columns: {len(grain_size_cols)}")
-            
-            for gid in group_ids:
-                samples = []
-                for sample in extractor.get_samples_by_group(k_value, gid):
-                    samples.append({
-                        'name': sample['sample_id'],
-                        'values': [float(v.as_py()) if hasattr(v, 'as_py') else float(v) for v in sample['x']]
-                    })
-                group_details[int(gid)] = {
-                    'samples': samples,
-                    'x_labels': grain_size_cols,
-                    'count': len(samples)
-                }
-            
             logger.info(f"Extracted group details for K={k_value}: {len(group_details)} groups")
             return group_details
             
         except Exception as e:
             logger.error(f"Group details extraction failed: {e}")
             return None
+            
\ No newline at end of file
@@ -0,0 +1,114 @@
+"""Memory-bounded LRU cache for per-K group details.
+
+Group details (see DataPipeline.extract_group_details) hold every sample's
+grain size curve as Python lists, so a handful of K values of a large result
+can use hundreds of MB. GroupDetailsCache keeps the most recently used K
+values within a byte budget; prefetched entries are stored as least recently
+used so they never push out what the user is looking at.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+_BUDGET_ENV_VAR = "EM_GROUP_DETAILS_CACHE_MB"
+DEFAULT_BUDGET_MB = 256
+
+# Rough CPython sizes: a float in a list (object + pointer), and the dict,
+# name string and list around each sample
+_BYTES_PER_VALUE = 32
+_BYTES_PER_SAMPLE = 400
+
+
+def estimate_details_bytes(details: Dict[int, dict]) -> int:
+    """Approximate memory held by one K's group details."""
+    total = 0
+    for group in details.values():
+        samples = group.get('samples', [])
+        total += len(samples) * _BYTES_PER_SAMPLE
+        total += sum(len(sample.get('values', ())) for sample in samples) * _BYTES_PER_VALUE
+    return total
+
+
+def _budget_from_env() -> int:
+    value = os.environ.get(_BUDGET_ENV_VAR)
+    try:
+        megabytes = float(value) if value not in (None, '') else DEFAULT_BUDGET_MB
+    except ValueError:
+        logger.warning(f"Ignoring invalid {_BUDGET_ENV_VAR}: {value!r}")
+        megabytes = DEFAULT_BUDGET_MB
+    return int(megabytes * 1024 * 1024)
+
+
+class GroupDetailsCache:
+    """K -> group details, evicting least recently used K values over budget.
+
+    Args:
+        max_bytes: Memory budget; defaults to EM_GROUP_DETAILS_CACHE_MB
+            (256 MB if unset). The most recent entry is always kept, even
+            if it alone exceeds the budget.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = _budget_from_env() if max_bytes is None else max_bytes
+        self._entries: "OrderedDict[int, dict]" = OrderedDict()  # least recent first
+        self._sizes: Dict[int, int] = {}
+        self.total_bytes = 0
+
+    def __contains__(self, k_value: int) -> bool:
+        return k_value in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._entries)
+
+    def get(self, k_value: int, default=None):
+        """Details for K (marked most recently used), or default."""
+        if k_value not in self._entries:
+            return default
+        self._entries.move_to_end(k_value)
+        return self._entries[k_value]
+
+    def __getitem__(self, k_value: int) -> dict:
+        if k_value not in self._entries:
+            raise KeyError(k_value)
+        return self.get(k_value)
+
+    def put(self, k_value: int, details: dict, speculative: bool = False) -> None:
+        """Store details for K and evict least recently used entries over budget.
+
+        Speculative (prefetched) entries are stored as least recently used:
+        they are evicted first unless they are read before then.
+        """
+        self.discard(k_value)
+        size = estimate_details_bytes(details)
+        self._entries[k_value] = details
+        self._sizes[k_value] = size
+        self.total_bytes += size
+        if speculative:
+            self._entries.move_to_end(k_value, last=False)
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            self.discard(oldest)
+            logger.debug(f"Evicted group details for K={oldest}")
+            if oldest == k_value:
+                break  # a prefetched entry that does not fit
+
+    __setitem__ = put
+
+    def discard(self, k_value: int) -> None:
+        """Remove K if cached."""
+        if self._entries.pop(k_value, None) is not None:
+            self.total_bytes -= self._sizes.pop(k_value)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._sizes.clear()
+        self.total_bytes = 0
@@ -15,275 +15,86 @@ Input Parquet Format:
     K, Group, Sample, [grain_size_columns...], 
     % explained, Total inequality, Between region inequality, 
     Total sum of squares, Within group sum of squares, 
-    Calinski-Harabasz pseudo-F statistic, Latitude, Longitude
+    Calinski-Harabasz pseudo-F statistic,
+    [Permutation mean C-H, Permutation C-H p-value,]  (only with --permutations)
+    Latitude, Longitude
+
+Normalized layout (``run_entropymax --output-layout normalized``): a directory
+holding three tables, as ``.parquet`` or ``.csv``:
+    samples:    Sample, latitude, longitude, [grain_size_columns...]
+    metrics:    K, % explained, ... (one row per K, same metric columns as above)
+    membership: K2, K3, ... (one int column per K, one row per sample, 1-based group)
+
+Loading and queries live in ``app.core.datastore.AnalysisResult`` (src/app), the
+result model shared by the GUI; ParquetDataExtractor keeps the original name
+and entry point on top of it.
 """
 
-import pyarrow.parquet as pq
-from typing import Dict, List, Optional
 import logging
+from typing import Dict, List, Optional
+
+from .app_path import ensure_src_on_path
+
+# The shared result model lives in the app package under src/
+ensure_src_on_path()
+
+from app.core.datastore import (  # noqa: E402
+    NORMALIZED_PARTS,
+    AnalysisResult,
+    GpsView,
+    SampleView,
+    read_normalized_part,
+    write_ipc_cache,
+    write_results_parquet,
+)
 
 logger = logging.getLogger(__name__)
 
+__all__ = [
+    'NORMALIZED_PARTS',
+    'AnalysisResult',
+    'GpsView',
+    'ParquetDataExtractor',
+    'SampleView',
+    'read_normalized_part',
+    'write_ipc_cache',
+    'write_results_parquet',
+]
 
-class ParquetDataExtractor:
+
+class ParquetDataExtractor(AnalysisResult):
     """
     Extract and organize data from Parquet files.
     
     Uses column position-based access for flexibility with variable grain size columns.
     Original algorithm by teammate, refactored for production use.
+    
+    Same object as AnalysisResult; prefer sharing one instance (e.g. the
+    'result' entry of DataPipeline.extract_analysis_data) over creating new
+    extractors for the same file.
     """
     
-    def __init__(self, parquet_file_path: str):
+    def __init__(self, parquet_file_path: str, k_values: Optional[List[int]] = None):
         """
         Initialize extractor and load data from Parquet file.
         
         Args:
-            parquet_file_path: Path to the Parquet file
-        """
-        self.parquet_path = parquet_file_path
-        self.group_data_dict: Dict[int, List[Dict]] = {}
-        self._column_positions = {}
-        self._load_data()
-    
-    def _detect_column_positions(self, parquet_file: pq.ParquetFile) -> None:
-        """
-        Detect column positions based on Parquet schema.
-        Uses relative positioning to handle variable number of grain size columns.
-        
-        Args:
-            parquet_file: PyArrow ParquetFile object
-        """
-        column_no = parquet_file.metadata.num_columns
-        
-        # Fixed positions based on actual CLI output format:
-        # K, Group, Sample, [grain_sizes...], % explained, Total inequality, 
-        # Between region inequality, Total sum of squares, Within group sum of squares, 
-        # Calinski-Harabasz pseudo-F statistic, latitude, longitude
-        self._column_positions = {
-            'k_value': 0,  # K column
-            'group_id': 1,  # Group column
-            'sample_id': 2,  # Sample column
-            'grain_start': 3,  # Grain size data starts at column 3
-            'latitude': column_no - 2,  # Second to last column
-            'longitude': column_no - 1,  # Last column
-            'val_max': column_no - 8  # Last grain size column (before 8 statistics columns)
-        }
-        
-        logger.debug(f"Detected column positions: {self._column_positions}")
-    
-    def _load_data(self) -> None:
-        """
-        Load and parse data from Parquet file.
-        Populates self.group_data_dict with organized data.
+            parquet_file_path: Path to the wide Parquet file, or to a
+                normalized result directory
+            k_values: Only load these K values (all if None)
         """
         try:
-            reader = pq.read_table(self.parquet_path)
-            parquet_file = pq.ParquetFile(self.parquet_path)
-            
-            # Detect column positions
-            self._detect_column_positions(parquet_file)
-            
-            logger.info(f"Loading data from {self.parquet_path}")
-            logger.info(f"Total rows: {reader.num_rows}, Total columns: {parquet_file.metadata.num_columns}")
-            
-            # Extract data for each row
-            pos = self._column_positions
-            for row in range(reader.num_rows):
-                # Extract K value (group count)
-                k_value = reader[pos['k_value']][row].as_py()
-                
-                # Extract group index
-                group_index = reader[pos['group_id']][row].as_py()
-                
-                # Extract grain size percentage data for this sample
-                # x_values contains the percentage values for each grain size bin
-                x_values = [reader[i][row] for i in range(pos['grain_start'], pos['val_max'])]
-                
-                # Extract sample ID
-                sample_id = reader[pos['sample_id']][row].as_py()
-                
-                # Extract GPS coordinates
-                latitude = reader[pos['latitude']][row].as_py()
-                longitude = reader[pos['longitude']][row].as_py()
-                
-                # Add to data structure
-                self._add_group_data(
-                    k_value, group_index, x_values,
-                    sample_id, latitude, longitude
-                )
-            
-            logger.info(f"Successfully loaded data for K values: {sorted(self.group_data_dict.keys())}")
-            
+            super().__init__(parquet_file_path, k_values=k_values)
         except Exception as e:
-            logger.error(f"Failed to load data from Parquet: {e}")
+            logger.error(f"Failed to load results from {parquet_file_path}: {e}")
             raise
+        logger.info(f"Successfully loaded data for K values: {self.get_all_k_values()}")
     
-    def _add_group_data(self, group_count: int, group_index: int, 
-                       x: List, sample_id: str,
-                       latitude: float, longitude: float) -> None:
-        """
-        Add sample data to the group data dictionary.
-        
-        Args:
-            group_count: K value (number of groups)
-            group_index: Group ID this sample belongs to
-            x: Grain size percentage values (the actual data to plot)
-            sample_id: Sample identifier
-            latitude: GPS latitude
-            longitude: GPS longitude
-        """
-        entry = {
-            "group": group_index,
-            "x": x,  # This contains the percentage values for each grain size
-            "sample_id": sample_id,
-            "latitude": latitude,
-            "longitude": longitude
-        }
-        
-        # Initialize list for this K value if it doesn't exist
-        if group_count not in self.group_data_dict:
-            self.group_data_dict[group_count] = []
-        
-        # Add sample data
-        self.group_data_dict[group_count].append(entry)
-    
-    def get_data_for_k(self, k_value: int) -> List[Dict]:
-        """
-        Get all sample data for a specific K value.
-        
-        Args:
-            k_value: K value (number of groups)
-            
-        Returns:
-            List of sample data dictionaries
-        """
-        return self.group_data_dict.get(k_value, [])
-    
-    def get_all_k_values(self) -> List[int]:
-        """
-        Get all available K values.
-        
-        Returns:
-            Sorted list of K values
-        """
-        return sorted(self.group_data_dict.keys())
+    @property
+    def parquet_path(self) -> str:
+        return self.path
     
-    def get_samples_by_group(self, k_value: int, group_id: int) -> List[Dict]:
-        """
-        Get all samples belonging to a specific group within a K value.
-        
-        Args:
-            k_value: K value (number of groups)
-            group_id: Group ID
-            
-        Returns:
-            List of sample data for the specified group
-        """
-        all_data = self.get_data_for_k(k_value)
-        return [sample for sample in all_data if sample['group'] == group_id]
-    
-    def get_group_ids_for_k(self, k_value: int) -> List[int]:
-        """
-        Get all unique group IDs for a specific K value.
-        
-        Args:
-            k_value: K value (number of groups)
-            
-        Returns:
-            Sorted list of unique group IDs
-        """
-        all_data = self.get_data_for_k(k_value)
-        if not all_data:
-            return []
-        return sorted(set(sample['group'] for sample in all_data))
-    
-    def get_gps_data_for_k(self, k_value: int) -> Dict[str, Dict]:
-        """
-        Get GPS coordinates for all samples at a specific K value.
-        
-        Args:
-            k_value: K value (number of groups)
-            
-        Returns:
-            Dictionary mapping sample_id to GPS and group info:
-            {
-                'sample_id': {
-                    'lat': float,
-                    'lon': float,
-                    'group': int
-                }
-            }
-        """
-        all_data = self.get_data_for_k(k_value)
-        gps_data = {}
-        
-        for sample in all_data:
-            gps_data[sample['sample_id']] = {
-                'lat': sample['latitude'],
-                'lon': sample['longitude'],
-                'group': sample['group']
-            }
-        
-        return gps_data
-    
-    def get_statistics(self, k_value: int) -> Dict:
-        """
-        Get statistics for a specific K value.
-        
-        Args:
-            k_value: K value (number of groups)
-            
-        Returns:
-            Dictionary with statistics
-        """
-        all_data = self.get_data_for_k(k_value)
-        
-        if not all_data:
-            return {
-                'num_groups': 0,
-                'num_samples': 0,
-                'samples_per_group': {}
-            }
-        
-        group_ids = self.get_group_ids_for_k(k_value)
-        samples_per_group = {}
-        
-        for group_id in group_ids:
-            group_samples = self.get_samples_by_group(k_value, group_id)
-            samples_per_group[group_id] = len(group_samples)
-        
-        return {
-            'num_groups': len(group_ids),
-            'num_samples': len(all_data),
-            'samples_per_group': samples_per_group
-        }
-    
-    def validate_data(self) -> bool:
-        """
-        Validate that data was loaded correctly.
-        
-        Returns:
-            True if data is valid
-            
-        Raises:
-            ValueError: If data is invalid
-        """
-        if not self.group_data_dict:
-            raise ValueError("No data loaded from Parquet file")
-        
-        # Check each K value has data
-        for k_value, data in self.group_data_dict.items():
-            if not data:
-                raise ValueError(f"K value {k_value} has no data")
-            
-            # Check each sample has required fields
-            for sample in data:
-                required_fields = ['group', 'x', 'sample_id', 'latitude', 'longitude']
-                for field in required_fields:
-                    if field not in sample:
-                        raise ValueError(f"Sample missing required field: {field}")
-        
-        logger.info("Data validation passed")
-        return True
-
-
+    @property
+    def group_data_dict(self) -> Dict[int, List[SampleView]]:
+        """All samples per K value (views, built on access)."""
+        return {k_value: self.get_data_for_k(k_value) for k_value in self.get_all_k_values()}
@@ -56,6 +56,7 @@ class TempFileManager:
         filenames = {
             'cli_output': 'analysis_output.csv',
             'parquet': 'analysis_output.parquet',
+            'normalized': 'analysis_normalized',  # directory: samples/metrics/membership
             'lock': '.lock',
             'log': 'session.log'
         }
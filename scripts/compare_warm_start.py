@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Compare warm-started K sweeps against cold starts.
+
+Runs the in-process backend (src/app/core/engine.py) on one input CSV once per
+start mode:
+  none   every K starts from contiguous blocks (legacy, "cold")
+  split  K starts from the converged K-1 grouping with one group split
+  merge  K starts from the converged K+1 grouping with two groups merged
+
+and prints, per K, the Rs and CH each mode reached together with the
+optimisation passes and trial moves it took. Trial moves are
+passes x rows x (K-1): every pass tries each sample in every other group.
+
+Usage:
+  python scripts/compare_warm_start.py --input data/input.csv \\
+      [--k-min 2] [--k-max 20] [--row-proportions] [--threads 0] \\
+      [--modes none,split,merge] [--csv report.csv]
+
+Notes:
+  - The input layout is the CLI's: sample name first, then one column per bin
+  - Needs the backend shared library (libentropymax, see docs/BACKEND.md) or
+    its path in ENTROPYMAX_LIB
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from app.core import engine  # noqa: E402
+
+
+def load_input_matrix(path: Path) -> np.ndarray:
+    with path.open("r", encoding="utf-8", errors="ignore", newline="") as f:
+        r = csv.reader(f)
+        next(r)
+        rows = []
+        for rec in r:
+            if not rec or not rec[0].strip():
+                continue
+            vals = []
+            for v in rec[1:]:
+                try:
+                    vals.append(float(v))
+                except ValueError:
+                    vals.append(0.0)
+            rows.append(vals)
+    width = max(len(v) for v in rows)
+    return np.array([v + [0.0] * (width - len(v)) for v in rows], dtype=np.float64)
+
+
+def run_mode(data: np.ndarray, params: engine.SweepParams) -> Dict:
+    passes: Dict[int, int] = {}
+
+    def on_progress(event):
+        if event.kind == "k_done":
+            passes[event.k] = event.passes
+
+    t0 = time.perf_counter()
+    result = engine.run_sweep(data, params, progress=on_progress)
+    elapsed = time.perf_counter() - t0
+    rows = data.shape[0]
+    per_k = {}
+    for m in result.metrics:
+        k = int(m["nGrpDum"])
+        per_k[k] = {
+            "rs": float(m["fRs"]),
+            "ch": float(m["fCHDum"]),
+            "passes": passes.get(k, 0),
+            "trials": passes.get(k, 0) * rows * (k - 1),
+        }
+    return {"per_k": per_k, "optimal_k": result.optimal_k, "elapsed": elapsed}
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Compare warm-started K sweeps against cold starts")
+    ap.add_argument("--input", required=True, type=Path, help="Input CSV (sample name, then bins)")
+    ap.add_argument("--k-min", type=int, default=2)
+    ap.add_argument("--k-max", type=int, default=20)
+    ap.add_argument("--row-proportions", action="store_true",
+                    help="Same as the CLI's --row_proportions=1")
+    ap.add_argument("--threads", type=int, default=0, help="Worker threads (0 = all cores)")
+    ap.add_argument("--modes", default="none,split,merge", help="Comma-separated start modes")
+    ap.add_argument("--csv", type=Path, help="Also write the per-K report to this CSV")
+    args = ap.parse_args()
+
+    data = load_input_matrix(args.input)
+    modes: List[str] = [m.strip() for m in args.modes.split(",") if m.strip()]
+    runs = {}
+    for mode in modes:
+        params = engine.SweepParams(
+            k_min=args.k_min,
+            k_max=args.k_max,
+            row_proportions=args.row_proportions,
+            threads=args.threads,
+            warm_start=mode,
+        )
+        runs[mode] = run_mode(data, params)
+
+    print(f"{data.shape[0]} samples x {data.shape[1]} bins, K {args.k_min}..{args.k_max}")
+    header = ["K"]
+    for key in ("rs", "ch", "passes", "trials"):
+        header += [f"{key}_{mode}" for mode in modes]
+    table = []
+    for k in range(args.k_min, args.k_max + 1):
+        row = [k]
+        for key in ("rs", "ch", "passes", "trials"):
+            row += [runs[mode]["per_k"].get(k, {}).get(key, "") for mode in modes]
+        table.append(row)
+
+    def fmt(v):
+        return f"{v:.4f}" if isinstance(v, float) else str(v)
+
+    widths = [max(len(h), *(len(fmt(r[i])) for r in table)) for i, h in enumerate(header)]
+    print("  ".join(h.rjust(w) for h, w in zip(header, widths)))
+    for row in table:
+        print("  ".join(fmt(v).rjust(w) for v, w in zip(row, widths)))
+
+    print()
+    base = runs[modes[0]]
+    for mode in modes:
+        per_k = runs[mode]["per_k"]
+        total_passes = sum(v["passes"] for v in per_k.values())
+        total_trials = sum(v["trials"] for v in per_k.values())
+        line = (f"{mode:>6}: optimal K {runs[mode]['optimal_k']}, {total_passes} passes, "
+                f"{total_trials} trial moves, {runs[mode]['elapsed']:.2f} s")
+        if mode != modes[0]:
+            common = [k for k in per_k if k in base["per_k"]]
+            d_rs = [per_k[k]["rs"] - base["per_k"][k]["rs"] for k in common]
+            d_ch = [per_k[k]["ch"] - base["per_k"][k]["ch"] for k in common]
+            if common:
+                line += (f"; vs {modes[0]}: Rs {min(d_rs):+.4f}..{max(d_rs):+.4f},"
+                         f" CH {min(d_ch):+.4f}..{max(d_ch):+.4f}")
+        print(line)
+
+    if args.csv:
+        with args.csv.open("w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(header)
+            w.writerows(table)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
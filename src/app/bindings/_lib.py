@@ -0,0 +1,74 @@
+"""Locate the compiled EntropyMax backend shared library.
+
+The library is built by ``backend/CMakeLists.txt`` (target ``entropymax_shared``,
+option ``BUILD_SHARED_BACKEND``). Search order:
+
+1. ``ENTROPYMAX_LIB`` environment variable (full path to the library file)
+2. PyInstaller bundle directory (``sys._MEIPASS``) when frozen
+3. Common CMake build directories under ``backend/`` and ``build/bin``
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import platform
+import sys
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+LIB_ENV_VAR = "ENTROPYMAX_LIB"
+_BUILD_DIRS = ("build", "build-vcpkg", "build-msvc", "build-make")
+
+
+def library_filename() -> str:
+    """Return the platform-specific file name of the shared library."""
+    system = platform.system()
+    if system == "Windows":
+        return "entropymax.dll"
+    if system == "Darwin":
+        return "libentropymax.dylib"
+    return "libentropymax.so"
+
+
+def _repo_root() -> Path:
+    # src/app/bindings/_lib.py -> repository root
+    return Path(__file__).resolve().parents[3]
+
+
+def candidate_paths() -> list[Path]:
+    """Return every location searched for the shared library, in order."""
+    name = library_filename()
+    paths: list[Path] = []
+
+    override = os.getenv(LIB_ENV_VAR)
+    if override:
+        paths.append(Path(override).expanduser())
+
+    if getattr(sys, "frozen", False):
+        paths.append(Path(getattr(sys, "_MEIPASS", Path(sys.executable).parent)) / name)
+
+    backend = _repo_root() / "backend"
+    for build_dir in _BUILD_DIRS:
+        paths.append(backend / build_dir / name)
+        paths.append(backend / build_dir / "Release" / name)
+    paths.append(_repo_root() / "build" / "bin" / name)
+    return paths
+
+
+def find_library() -> Path:
+    """Return the first existing shared library path.
+
+    Raises:
+        FileNotFoundError: If the library has not been built.
+    """
+    for path in candidate_paths():
+        if path.is_file():
+            logger.debug("Using backend library at %s", path)
+            return path
+    raise FileNotFoundError(
+        f"{library_filename()} not found. Build it with "
+        f"'cmake -S backend -B backend/build && cmake --build backend/build' "
+        f"or set {LIB_ENV_VAR} to its path."
+    )
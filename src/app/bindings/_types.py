@@ -0,0 +1,120 @@
+"""Result and error types shared by the cffi and Cython backend bindings."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+# NumPy view of em_k_metric_t; align=True reproduces the C padding after nGrpDum
+METRIC_DTYPE = np.dtype(
+    [
+        ("nGrpDum", np.int32),
+        ("fCHDum", np.float64),
+        ("fRs", np.float64),
+        ("fSST", np.float64),
+        ("fSSE", np.float64),
+        ("fBetween", np.float64),
+        ("fCHP", np.float64),
+        ("nCounterIndex", np.float64),
+        ("nPasses", np.int32),
+        ("nStop", np.int32),
+    ],
+    align=True,
+)
+
+
+# em_status_t EM_ERR_CANCELLED (util.h)
+EM_ERR_CANCELLED = -5
+
+# em_progress_kind_t values, in enum order
+PROGRESS_KINDS = ("k_start", "pass", "k_done")
+
+# em_stop_reason_t values, in enum order (METRIC_DTYPE nStop, ProgressEvent.stop)
+STOP_REASONS = ("converged", "min_gain", "max_passes", "time")
+
+# em_warm_start_t values, in enum order
+WARM_START_MODES = ("none", "split", "merge")
+
+
+def warm_start_mode(name: str) -> int:
+    """em_warm_start_t value for ``"none"``, ``"split"`` or ``"merge"``."""
+    try:
+        return WARM_START_MODES.index(name)
+    except ValueError:
+        raise ValueError(
+            f"unknown warm start {name!r}, expected one of {WARM_START_MODES}") from None
+
+
+# em_move_strategy_t values, in enum order
+MOVE_STRATEGIES = ("first", "best", "rounds")
+
+
+def move_strategy_mode(name: str) -> int:
+    """em_move_strategy_t value for ``"first"`` (VB6), ``"best"`` or ``"rounds"``."""
+    try:
+        return MOVE_STRATEGIES.index(name)
+    except ValueError:
+        raise ValueError(
+            f"unknown move strategy {name!r}, expected one of {MOVE_STRATEGIES}") from None
+
+
+class BackendError(RuntimeError):
+    """Raised when a backend call returns a non-zero status."""
+
+    def __init__(self, func: str, code: int):
+        super().__init__(f"{func} failed with status {code}")
+        self.func = func
+        self.code = code
+
+
+class SweepCancelled(BackendError):
+    """Raised when a progress callback cancelled the sweep."""
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    """One em_progress_t event from a running sweep.
+
+    Attributes:
+        kind: ``"k_start"``, ``"pass"`` or ``"k_done"``.
+        k: Number of groups the event refers to.
+        passes: Pass number (``"pass"``) or total passes (``"k_done"``).
+        moves: Moves accepted in the pass, or in total for ``"k_done"``.
+        rs: Current RS statistic (%).
+        elapsed: Seconds since the sweep started.
+        stop: For ``"k_done"``, why the kept start stopped (``STOP_REASONS``).
+    """
+
+    kind: str
+    k: int
+    passes: int
+    moves: int
+    rs: float
+    elapsed: float
+    stop: str = "converged"
+
+
+@dataclass
+class SweepResult:
+    """Output of a K sweep.
+
+    Attributes:
+        metrics: Structured array (``METRIC_DTYPE``), one record per K.
+        membership: Group index per sample for every K, shape (n_k, rows), 0-based.
+        member1: Group index per sample for the optimal K, 0-based.
+        group_means: Group centroids for the optimal K, shape (optimal_k, cols).
+        optimal_k: K with the highest CH value.
+        tineq: Total inequality used to score the groupings.
+    """
+
+    metrics: np.ndarray
+    membership: np.ndarray
+    member1: np.ndarray
+    group_means: np.ndarray
+    optimal_k: int
+    tineq: float
+
+    @property
+    def k_values(self) -> np.ndarray:
+        return self.metrics["nGrpDum"]
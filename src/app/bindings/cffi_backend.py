@@ -0,0 +1,395 @@
+"""In-process cffi bindings for the EntropyMax C backend.
+
+Calls the shared library (``libentropymax``) directly instead of spawning the
+``run_entropymax`` executable, so inputs and outputs move as NumPy arrays with
+no CSV round trip. Input matrices are passed to C without copying when they
+are already C-contiguous ``float64``.
+
+The library is opened lazily on first use; see :mod:`app.bindings._lib` for the
+search order.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+from cffi import FFI
+
+from ._lib import find_library
+from ._types import (
+    EM_ERR_CANCELLED,
+    METRIC_DTYPE,
+    PROGRESS_KINDS,
+    STOP_REASONS,
+    BackendError,
+    ProgressEvent,
+    SweepCancelled,
+    SweepResult,
+    move_strategy_mode,
+    warm_start_mode,
+)
+
+ProgressCallback = Callable[[ProgressEvent], "bool | None"]
+
+CDEF = """
+typedef struct {
+  int32_t nGrpDum;
+  double fCHDum;
+  double fRs;
+  double fSST;
+  double fSSE;
+  double fBetween;
+  double fCHP;
+  double nCounterIndex;
+  int32_t nPasses;
+  int32_t nStop;
+} em_k_metric_t;
+
+int em_proportion(double *data, int32_t rows, int32_t cols);
+int em_gdtl_percent(double *data, int32_t rows, int32_t cols);
+int em_total_inequality(const double *data, int32_t rows, int32_t cols,
+                        double *out_Y, double *out_tineq);
+int em_ch_stat(const double *class_table, int32_t samples, int32_t classes, int32_t k,
+               int32_t perms_n, uint64_t seed,
+               double *out_CH, double *out_sstt, double *out_sset,
+               double *out_perm_mean, double *out_perm_p);
+int em_group_zstats(const double *group_means, const int32_t *n_k, int32_t k, int32_t cols,
+                    const double *TM, const double *SD, double *out_Z);
+
+typedef struct {
+  int32_t kind;
+  int32_t k;
+  int32_t pass;
+  int32_t moves;
+  double rs;
+  double elapsed_s;
+  int32_t stop;
+} em_progress_t;
+typedef int (*em_progress_fn)(void *user, const em_progress_t *event);
+
+typedef struct {
+  int32_t threads;
+  em_progress_fn progress;
+  void *progress_user;
+  int32_t warm_start;
+  int32_t starts;
+  double start_budget_s;
+  int32_t move_strategy;
+  int32_t polish;
+  int32_t max_passes;
+  double max_seconds_per_k;
+  double min_rs_gain;
+  int32_t stop_when_stale;
+} em_sweep_opts_t;
+
+void em_sweep_opts_default(em_sweep_opts_t *opts);
+int32_t em_resolve_threads(int32_t requested);
+int em_sweep_k_ex(const double *data_in, int32_t rows, int32_t cols,
+                  const double *Y, double tineq, int32_t k_min, int32_t k_max,
+                  int32_t *out_opt_k, int32_t perms_n, uint64_t seed,
+                  em_k_metric_t *out_metrics, int32_t metrics_cap,
+                  int32_t *out_member1, double *out_group_means,
+                  int32_t *out_all_member1, const em_sweep_opts_t *opts);
+int em_prepare_and_sweep(const double *data_proc, int32_t rows, int32_t cols,
+                         int32_t k_min, int32_t k_max,
+                         int32_t perms_n, uint64_t seed,
+                         em_k_metric_t *out_metrics, int32_t metrics_cap,
+                         int32_t *out_member1, double *out_group_means,
+                         int32_t *out_all_member1,
+                         double *out_tineq);
+"""
+
+ffi = FFI()
+ffi.cdef(CDEF)
+
+_lib = None
+_lib_lock = threading.Lock()
+
+
+def load(path: str | Path | None = None):
+    """Open the shared library (once) and return the cffi handle."""
+    global _lib
+    with _lib_lock:
+        if _lib is None:
+            lib_path = Path(path) if path is not None else find_library()
+            lib = ffi.dlopen(str(lib_path))
+            if ffi.sizeof("em_k_metric_t") != METRIC_DTYPE.itemsize:
+                raise RuntimeError("em_k_metric_t layout does not match METRIC_DTYPE")
+            _lib = lib
+        return _lib
+
+
+def _check(func: str, code: int) -> None:
+    if code != 0:
+        raise BackendError(func, code)
+
+
+def _as_matrix(data) -> np.ndarray:
+    arr = np.ascontiguousarray(data, dtype=np.float64)
+    if arr.ndim != 2 or arr.shape[0] == 0 or arr.shape[1] == 0:
+        raise ValueError(f"expected a non-empty 2D matrix, got shape {arr.shape}")
+    return arr
+
+
+def _dptr(arr: np.ndarray):
+    return ffi.from_buffer("double[]", arr)
+
+
+def _iptr(arr: np.ndarray):
+    return ffi.from_buffer("int32_t[]", arr)
+
+
+def preprocess(data, row_proportions: bool = False, gdtl_percent: bool = True) -> np.ndarray:
+    """Apply the CLI preprocessing (row proportions, then grand-total percent).
+
+    Returns a new array; ``data`` is left untouched.
+    """
+    lib = load()
+    work = np.array(data, dtype=np.float64, order="C", copy=True)
+    if work.ndim != 2 or work.size == 0:
+        raise ValueError(f"expected a non-empty 2D matrix, got shape {work.shape}")
+    rows, cols = work.shape
+    if row_proportions:
+        _check("em_proportion", lib.em_proportion(_dptr(work), rows, cols))
+    if gdtl_percent:
+        _check("em_gdtl_percent", lib.em_gdtl_percent(_dptr(work), rows, cols))
+    return work
+
+
+def total_inequality(data) -> tuple[np.ndarray, float]:
+    """Return the column totals ``Y`` and the total inequality of ``data``."""
+    lib = load()
+    arr = _as_matrix(data)
+    rows, cols = arr.shape
+    Y = np.empty(cols, dtype=np.float64)
+    tineq = ffi.new("double *")
+    _check("em_total_inequality",
+           lib.em_total_inequality(_dptr(arr), rows, cols, _dptr(Y), tineq))
+    return Y, float(tineq[0])
+
+
+def ch_stat(class_table, k: int, perms_n: int = 0, seed: int = 42) -> dict[str, float]:
+    """Calinski-Harabasz statistic for a class table (first column is the group index)."""
+    lib = load()
+    table = _as_matrix(class_table)
+    samples, width = table.shape
+    out = ffi.new("double[5]")
+    _check("em_ch_stat",
+           lib.em_ch_stat(_dptr(table), samples, width - 1, int(k), int(perms_n), int(seed),
+                          out, out + 1, out + 2, out + 3, out + 4))
+    return {
+        "ch": out[0],
+        "sst": out[1],
+        "sse": out[2],
+        "perm_mean": out[3],
+        "perm_p": out[4],
+    }
+
+
+def group_zstats(group_means, n_k, tm, sd) -> np.ndarray:
+    """Z statistics of each group mean relative to the global mean."""
+    lib = load()
+    means = _as_matrix(group_means)
+    k, cols = means.shape
+    counts = np.ascontiguousarray(n_k, dtype=np.int32)
+    tm_arr = np.ascontiguousarray(tm, dtype=np.float64)
+    sd_arr = np.ascontiguousarray(sd, dtype=np.float64)
+    if counts.shape != (k,) or tm_arr.shape != (cols,) or sd_arr.shape != (cols,):
+        raise ValueError("n_k, tm and sd must match the group_means shape")
+    out = np.empty((k, cols), dtype=np.float64)
+    _check("em_group_zstats",
+           lib.em_group_zstats(_dptr(means), _iptr(counts), k, cols,
+                               _dptr(tm_arr), _dptr(sd_arr), _dptr(out)))
+    return out
+
+
+def _progress_handler(progress: ProgressCallback, errors: list):
+    def handler(user, event):
+        try:
+            cancel = progress(ProgressEvent(
+                kind=PROGRESS_KINDS[event.kind],
+                k=event.k,
+                passes=getattr(event, "pass"),
+                moves=event.moves,
+                rs=event.rs,
+                elapsed=event.elapsed_s,
+                stop=STOP_REASONS[event.stop],
+            ))
+        except BaseException as exc:  # re-raised by sweep_k once C returns
+            errors.append(exc)
+            return 1
+        return 1 if cancel else 0
+    return ffi.callback("int(void *, const em_progress_t *)", handler, error=1)
+
+
+def sweep_k(data, Y, tineq: float, k_min: int = 2, k_max: int = 20, perms_n: int = 0,
+            seed: int = 42, threads: int = 1,
+            progress: ProgressCallback | None = None,
+            warm_start: str = "none", starts: int = 1,
+            start_budget: float = 0.0, move_strategy: str = "first",
+            polish: bool = False, max_passes: int = 0, max_seconds: float = 0.0,
+            min_rs_gain: float = 0.0, stop_when_stale: bool = False) -> SweepResult:
+    """Optimise groupings for every K in ``k_min..k_max`` (``em_sweep_k_ex``).
+
+    Args:
+        data: Preprocessed data matrix (rows x cols).
+        Y: Column totals passed to the inequality measures.
+        tineq: Total inequality passed to the inequality measures.
+        k_min: Smallest number of groups.
+        k_max: Largest number of groups.
+        perms_n: CH permutations per K (0 disables the test).
+        seed: Seed for the permutation RNG and the extra starts.
+        threads: Worker threads (0 = all cores); results do not depend on it.
+        progress: Called with a ProgressEvent for every K start, pass and K
+            completion (from worker threads when ``threads > 1``, one call at
+            a time). Returning True cancels the sweep.
+        warm_start: ``"split"`` starts each K from the K-1 grouping,
+            ``"merge"`` from the K+1 grouping; ``"none"`` starts every K
+            from contiguous blocks (legacy).
+        starts: Optimisation starts per K, keeping the best RS; starts after
+            the first begin from seeded k-means++ groups.
+        start_budget: Seconds after which extra starts are stopped (0: no
+            limit); the first start of every K always completes, and only a
+            budget makes results depend on timing.
+        move_strategy: ``"first"`` keeps the first improving move per target
+            (VB6 results); ``"best"`` scores all targets of a sample at once
+            and applies only the best move; ``"rounds"`` scores every
+            sample's best move in parallel and commits the improving ones,
+            so one K uses all ``threads``.
+        polish: Finish ``"rounds"`` with first-improvement passes.
+        max_passes: Passes per start (0: until converged).
+        max_seconds: Wall time for the starts of one K (0: no limit).
+        min_rs_gain: Stop after a pass raising RS by less than this many
+            percentage points (0: off).
+        stop_when_stale: Stop at the first pass without moves instead of the
+            third (same grouping for ``"first"``, fewer passes).
+
+        The ``nPasses`` and ``nStop`` metric fields record the passes and
+        stop reason (index into ``STOP_REASONS``) of each K's kept start.
+
+    Raises:
+        SweepCancelled: If ``progress`` cancelled the sweep.
+    """
+    lib = load()
+    arr = _as_matrix(data)
+    rows, cols = arr.shape
+    Y_arr = np.ascontiguousarray(Y, dtype=np.float64)
+    if Y_arr.shape != (cols,):
+        raise ValueError(f"Y must have {cols} entries, got shape {Y_arr.shape}")
+    if k_min < 1 or k_max < k_min:
+        raise ValueError(f"invalid K range {k_min}..{k_max}")
+    cap = int(k_max) - int(k_min) + 1
+
+    metrics = np.zeros(cap, dtype=METRIC_DTYPE)
+    member1 = np.zeros(rows, dtype=np.int32)
+    group_means = np.zeros((int(k_max), cols), dtype=np.float64)
+    membership = np.zeros((cap, rows), dtype=np.int32)
+    opt_k = ffi.new("int32_t *")
+    opts = ffi.new("em_sweep_opts_t *")
+    lib.em_sweep_opts_default(opts)
+    opts.threads = lib.em_resolve_threads(int(threads))
+    opts.warm_start = warm_start_mode(warm_start)
+    opts.starts = int(starts)
+    opts.start_budget_s = float(start_budget)
+    opts.move_strategy = move_strategy_mode(move_strategy)
+    opts.polish = int(bool(polish))
+    opts.max_passes = int(max_passes)
+    opts.max_seconds_per_k = float(max_seconds)
+    opts.min_rs_gain = float(min_rs_gain)
+    opts.stop_when_stale = int(bool(stop_when_stale))
+    errors: list = []
+    if progress is not None:
+        callback = _progress_handler(progress, errors)  # kept alive for the call
+        opts.progress = callback
+
+    count = lib.em_sweep_k_ex(
+        _dptr(arr), rows, cols, _dptr(Y_arr), float(tineq), int(k_min), int(k_max),
+        opt_k, int(perms_n), int(seed),
+        ffi.cast("em_k_metric_t *", ffi.from_buffer(metrics)), cap,
+        _iptr(member1), _dptr(group_means), _iptr(membership), opts,
+    )
+    if errors:
+        raise errors[0]
+    if count == EM_ERR_CANCELLED:
+        raise SweepCancelled("em_sweep_k_ex", count)
+    if count <= 0:
+        raise BackendError("em_sweep_k_ex", count)
+
+    optimal_k = int(opt_k[0])
+    return SweepResult(
+        metrics=metrics[:count],
+        membership=membership[:count],
+        member1=member1,
+        group_means=group_means[:optimal_k].copy(),
+        optimal_k=optimal_k,
+        tineq=float(tineq),
+    )
+
+
+def prepare_and_sweep(data, k_min: int = 2, k_max: int = 20, perms_n: int = 0,
+                      seed: int = 42) -> SweepResult:
+    """Run ``em_prepare_and_sweep`` on already-preprocessed data.
+
+    Unlike :func:`run`, the column totals and total inequality are taken from
+    ``data`` itself rather than from the raw matrix.
+    """
+    lib = load()
+    arr = _as_matrix(data)
+    rows, cols = arr.shape
+    if k_min < 1 or k_max < k_min:
+        raise ValueError(f"invalid K range {k_min}..{k_max}")
+    cap = int(k_max) - int(k_min) + 1
+
+    metrics = np.zeros(cap, dtype=METRIC_DTYPE)
+    member1 = np.zeros(rows, dtype=np.int32)
+    group_means = np.zeros((int(k_max), cols), dtype=np.float64)
+    membership = np.zeros((cap, rows), dtype=np.int32)
+    tineq = ffi.new("double *")
+
+    count = lib.em_prepare_and_sweep(
+        _dptr(arr), rows, cols, int(k_min), int(k_max), int(perms_n), int(seed),
+        ffi.cast("em_k_metric_t *", ffi.from_buffer(metrics)), cap,
+        _iptr(member1), _dptr(group_means), _iptr(membership), tineq,
+    )
+    if count <= 0:
+        raise BackendError("em_prepare_and_sweep", count)
+
+    metrics = metrics[:count]
+    # em_prepare_and_sweep does not report the optimal K; same rule as the
+    # sweep: highest CH, smallest K on ties
+    optimal_k = int(metrics["nGrpDum"][int(np.argmax(metrics["fCHDum"]))])
+    return SweepResult(
+        metrics=metrics,
+        membership=membership[:count],
+        member1=member1,
+        group_means=group_means[:optimal_k].copy(),
+        optimal_k=optimal_k,
+        tineq=float(tineq[0]),
+    )
+
+
+def run(data, k_min: int = 2, k_max: int = 20, row_proportions: bool = False,
+        gdtl_percent: bool = True, perms_n: int = 0, seed: int = 42,
+        threads: int = 1, progress: ProgressCallback | None = None,
+        warm_start: str = "none", starts: int = 1,
+        start_budget: float = 0.0, move_strategy: str = "first",
+        polish: bool = False, max_passes: int = 0, max_seconds: float = 0.0,
+        min_rs_gain: float = 0.0, stop_when_stale: bool = False) -> SweepResult:
+    """Run the same pipeline as the ``run_entropymax`` executable on raw data.
+
+    Like the CLI, column totals and total inequality come from the raw matrix
+    while the groupings are optimised on the preprocessed copy, so the results
+    match the executable's output for the same options.
+    """
+    raw = _as_matrix(data)
+    Y, tineq = total_inequality(raw)
+    work = preprocess(raw, row_proportions=row_proportions, gdtl_percent=gdtl_percent)
+    return sweep_k(work, Y, tineq, k_min=k_min, k_max=k_max, perms_n=perms_n,
+                   seed=seed, threads=threads, progress=progress,
+                   warm_start=warm_start, starts=starts, start_budget=start_budget,
+                   move_strategy=move_strategy, polish=polish,
+                   max_passes=max_passes, max_seconds=max_seconds,
+                   min_rs_gain=min_rs_gain, stop_when_stale=stop_when_stale)
@@ -0,0 +1,296 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+# distutils: include_dirs = ../backend/include
+# distutils: sources = ../backend/src/algo/preprocess.c ../backend/src/algo/metrics.c ../backend/src/algo/grouping.c ../backend/src/algo/group_state.c ../backend/src/algo/sweep.c ../backend/src/util/parallel.c ../backend/src/util/util.c
+"""Cython bindings for the EntropyMax K sweep.
+
+Typed-memoryview wrappers around the C backend that release the GIL for the
+whole computation, so several sweeps can run concurrently from Python threads
+(e.g. a ``ThreadPoolExecutor``) and the Qt event loop keeps running while one
+is in progress.
+
+The backend sources are compiled into the extension. Build from the
+repository root:
+
+    cythonize -i src/app/bindings/cython_backend/wrapper_cy.pyx
+"""
+
+from libc.stdint cimport int32_t, uint64_t
+from libc.stdlib cimport free, malloc
+
+import numpy as np
+
+from app.bindings._types import (
+    EM_ERR_CANCELLED,
+    METRIC_DTYPE,
+    PROGRESS_KINDS,
+    STOP_REASONS,
+    BackendError,
+    ProgressEvent,
+    SweepCancelled,
+    SweepResult,
+    move_strategy_mode,
+    warm_start_mode,
+)
+
+
+cdef extern from "sweep.h" nogil:
+    ctypedef struct em_k_metric_t:
+        int32_t nGrpDum
+        double fCHDum
+        double fRs
+        double fSST
+        double fSSE
+        double fBetween
+        double fCHP
+        double nCounterIndex
+        int32_t nPasses
+        int32_t nStop
+
+    ctypedef struct em_progress_t:
+        int32_t kind
+        int32_t k
+        int32_t pass_ "pass"
+        int32_t moves
+        double rs
+        double elapsed_s
+        int32_t stop
+
+    ctypedef int (*em_progress_fn)(void *user, const em_progress_t *event) noexcept nogil
+
+    ctypedef struct em_sweep_opts_t:
+        int32_t threads
+        em_progress_fn progress
+        void *progress_user
+        int32_t warm_start
+        int32_t starts
+        double start_budget_s
+        int32_t move_strategy
+        int32_t polish
+        int32_t max_passes
+        double max_seconds_per_k
+        double min_rs_gain
+        int32_t stop_when_stale
+
+    void em_sweep_opts_default(em_sweep_opts_t *opts)
+    int em_sweep_k_ex(const double *data_in, int32_t rows, int32_t cols,
+                      const double *Y, double tineq, int32_t k_min, int32_t k_max,
+                      int32_t *out_opt_k, int32_t perms_n, uint64_t seed,
+                      em_k_metric_t *out_metrics, int32_t metrics_cap,
+                      int32_t *out_member1, double *out_group_means,
+                      int32_t *out_all_member1, const em_sweep_opts_t *opts)
+
+cdef extern from "metrics.h" nogil:
+    int em_total_inequality(const double *data, int32_t rows, int32_t cols,
+                            double *out_Y, double *out_tineq)
+
+cdef extern from "preprocess.h" nogil:
+    int em_proportion(double *data, int32_t rows, int32_t cols)
+    int em_gdtl_percent(double *data, int32_t rows, int32_t cols)
+
+cdef extern from "parallel.h" nogil:
+    int32_t em_resolve_threads(int32_t requested)
+
+
+cdef class _ProgressState:
+    cdef object callback
+    cdef object error
+
+    def __cinit__(self, callback):
+        self.callback = callback
+        self.error = None
+
+
+cdef int _on_progress(void *user, const em_progress_t *event) noexcept nogil:
+    with gil:
+        state = <_ProgressState>user
+        try:
+            cancel = state.callback(ProgressEvent(
+                kind=PROGRESS_KINDS[event.kind],
+                k=event.k,
+                passes=event.pass_,
+                moves=event.moves,
+                rs=event.rs,
+                elapsed=event.elapsed_s,
+                stop=STOP_REASONS[event.stop],
+            ))
+        except BaseException as exc:  # re-raised by sweep_k once C returns
+            state.error = exc
+            return 1
+        return 1 if cancel else 0
+
+
+def total_inequality(const double[:, ::1] data):
+    """Return the column totals ``Y`` and the total inequality of ``data``."""
+    cdef int32_t rows = <int32_t>data.shape[0]
+    cdef int32_t cols = <int32_t>data.shape[1]
+    Y = np.empty(cols, dtype=np.float64)
+    cdef double[::1] Y_view = Y
+    cdef double tineq = 0.0
+    cdef int rc
+    with nogil:
+        rc = em_total_inequality(&data[0, 0], rows, cols, &Y_view[0], &tineq)
+    if rc != 0:
+        raise BackendError("em_total_inequality", rc)
+    return Y, tineq
+
+
+def preprocess(data, bint row_proportions=False, bint gdtl_percent=True):
+    """Apply the CLI preprocessing (row proportions, then grand-total percent).
+
+    Returns a new array; ``data`` is left untouched.
+    """
+    work = np.array(data, dtype=np.float64, order="C", copy=True)
+    cdef double[:, ::1] view = work
+    cdef int32_t rows = <int32_t>view.shape[0]
+    cdef int32_t cols = <int32_t>view.shape[1]
+    cdef int rc = 0
+    with nogil:
+        if row_proportions:
+            rc = em_proportion(&view[0, 0], rows, cols)
+        if rc == 0 and gdtl_percent:
+            rc = em_gdtl_percent(&view[0, 0], rows, cols)
+    if rc != 0:
+        raise BackendError("preprocess", rc)
+    return work
+
+
+def sweep_k(const double[:, ::1] data, const double[::1] Y, double tineq,
+            int32_t k_min=2, int32_t k_max=20, int32_t perms_n=0,
+            uint64_t seed=42, int32_t threads=1, progress=None,
+            str warm_start="none", int32_t starts=1, double start_budget=0.0,
+            str move_strategy="first", bint polish=False, int32_t max_passes=0,
+            double max_seconds=0.0, double min_rs_gain=0.0, bint stop_when_stale=False):
+    """Optimise groupings for every K in ``k_min..k_max`` without holding the GIL.
+
+    Args:
+        data: Preprocessed data matrix (rows x cols), C-contiguous float64.
+        Y: Column totals passed to the inequality measures.
+        tineq: Total inequality passed to the inequality measures.
+        k_min: Smallest number of groups.
+        k_max: Largest number of groups.
+        perms_n: CH permutations per K (0 disables the test).
+        seed: Seed for the permutation RNG and the extra starts.
+        threads: Worker threads inside the sweep (0 = all cores).
+        progress: Optional callable receiving a ProgressEvent per K start,
+            pass and K completion; returning True cancels the sweep. It
+            re-acquires the GIL for each call.
+        warm_start: ``"split"`` starts each K from the K-1 grouping,
+            ``"merge"`` from the K+1 grouping; ``"none"`` starts every K
+            from contiguous blocks (legacy).
+        starts: Optimisation starts per K, keeping the best RS; starts after
+            the first begin from seeded k-means++ groups.
+        start_budget: Seconds after which extra starts are stopped (0: no
+            limit); the first start of every K always completes.
+        move_strategy: ``"first"`` keeps the first improving move per target
+            (VB6 results); ``"best"`` scores all targets of a sample at once
+            and applies only the best move; ``"rounds"`` scores every
+            sample's best move in parallel and commits the improving ones,
+            so one K uses all ``threads``.
+        polish: Finish ``"rounds"`` with first-improvement passes.
+        max_passes: Passes per start (0: until converged).
+        max_seconds: Wall time for the starts of one K (0: no limit).
+        min_rs_gain: Stop after a pass raising RS by less than this many
+            percentage points (0: off).
+        stop_when_stale: Stop at the first pass without moves instead of the
+            third (same grouping for ``"first"``, fewer passes).
+
+    Returns:
+        SweepResult with metrics, membership matrix and group means; the
+        ``nPasses`` and ``nStop`` fields record each K's passes and stop
+        reason (index into ``STOP_REASONS``).
+
+    Raises:
+        SweepCancelled: If ``progress`` cancelled the sweep.
+    """
+    cdef int32_t rows = <int32_t>data.shape[0]
+    cdef int32_t cols = <int32_t>data.shape[1]
+    if rows == 0 or cols == 0:
+        raise ValueError("expected a non-empty 2D matrix")
+    if Y.shape[0] != cols:
+        raise ValueError(f"Y must have {cols} entries, got {Y.shape[0]}")
+    if k_min < 1 or k_max < k_min:
+        raise ValueError(f"invalid K range {k_min}..{k_max}")
+    cdef int32_t cap = k_max - k_min + 1
+    cdef int32_t warm = warm_start_mode(warm_start)
+    cdef int32_t strategy = move_strategy_mode(move_strategy)
+
+    member1 = np.zeros(rows, dtype=np.int32)
+    group_means = np.zeros((k_max, cols), dtype=np.float64)
+    membership = np.zeros((cap, rows), dtype=np.int32)
+    cdef int32_t[::1] member1_view = member1
+    cdef double[:, ::1] means_view = group_means
+    cdef int32_t[:, ::1] membership_view = membership
+
+    cdef em_k_metric_t *metrics = <em_k_metric_t *>malloc(cap * sizeof(em_k_metric_t))
+    if metrics == NULL:
+        raise MemoryError()
+
+    cdef em_sweep_opts_t opts
+    cdef _ProgressState state = _ProgressState(progress) if progress is not None else None
+    cdef em_k_metric_t m
+    cdef int32_t opt_k = 0
+    cdef int count, i
+    try:
+        with nogil:
+            em_sweep_opts_default(&opts)
+            opts.threads = em_resolve_threads(threads)
+            opts.warm_start = warm
+            opts.starts = starts
+            opts.start_budget_s = start_budget
+            opts.move_strategy = strategy
+            opts.polish = polish
+            opts.max_passes = max_passes
+            opts.max_seconds_per_k = max_seconds
+            opts.min_rs_gain = min_rs_gain
+            opts.stop_when_stale = stop_when_stale
+            if state is not None:
+                opts.progress = _on_progress
+                opts.progress_user = <void *>state
+            count = em_sweep_k_ex(&data[0, 0], rows, cols, &Y[0], tineq, k_min, k_max,
+                                  &opt_k, perms_n, seed, metrics, cap,
+                                  &member1_view[0], &means_view[0, 0],
+                                  &membership_view[0, 0], &opts)
+        if state is not None and state.error is not None:
+            raise state.error
+        if count == EM_ERR_CANCELLED:
+            raise SweepCancelled("em_sweep_k_ex", count)
+        if count <= 0:
+            raise BackendError("em_sweep_k_ex", count)
+
+        out = np.zeros(count, dtype=METRIC_DTYPE)
+        for i in range(count):
+            m = metrics[i]
+            out[i] = (m.nGrpDum, m.fCHDum, m.fRs, m.fSST, m.fSSE, m.fBetween,
+                      m.fCHP, m.nCounterIndex, m.nPasses, m.nStop)
+    finally:
+        free(metrics)
+
+    return SweepResult(
+        metrics=out,
+        membership=membership[:count],
+        member1=member1,
+        group_means=group_means[:opt_k].copy(),
+        optimal_k=int(opt_k),
+        tineq=float(tineq),
+    )
+
+
+def run(data, int32_t k_min=2, int32_t k_max=20, bint row_proportions=False,
+        bint gdtl_percent=True, int32_t perms_n=0, uint64_t seed=42,
+        int32_t threads=1, progress=None, str warm_start="none", int32_t starts=1,
+        double start_budget=0.0, str move_strategy="first", bint polish=False,
+        int32_t max_passes=0, double max_seconds=0.0, double min_rs_gain=0.0,
+        bint stop_when_stale=False):
+    """Run the same pipeline as the ``run_entropymax`` executable on raw data.
+
+    Column totals and total inequality come from the raw matrix and the
+    groupings are optimised on the preprocessed copy, as in the CLI.
+    """
+    raw = np.ascontiguousarray(data, dtype=np.float64)
+    if raw.ndim != 2:
+        raise ValueError(f"expected a 2D matrix, got shape {raw.shape}")
+    Y, tineq = total_inequality(raw)
+    work = preprocess(raw, row_proportions, gdtl_percent)
+    return sweep_k(work, Y, tineq, k_min, k_max, perms_n, seed, threads, progress,
+                   warm_start, starts, start_budget, move_strategy, polish,
+                   max_passes, max_seconds, min_rs_gain, stop_when_stale)
@@ -0,0 +1,761 @@
+"""In-memory analysis results shared by the GUI.
+
+:class:`AnalysisResult` loads one ``run_entropymax`` result -- the wide
+Parquet file or a normalized result directory -- into columnar NumPy arrays:
+
+* per result row: int32 K, group and sample index;
+* per sample: names, a float64 grain size matrix, latitude and longitude
+  (the wide layout repeats these for every K; only the first copy is kept);
+* per K: the metric row.
+
+Rows are indexed by K and by (K, group), so the CH/Rs series, per-K GPS and
+group maps and per-group grain size matrices are served as views or slices
+of these arrays. Charts, map, sample list and group details all read the
+same instance instead of re-reading the file.
+
+Wide result files are written sorted by (K, Group) with one row group per K
+and column statistics (:func:`write_results_parquet`, and the CLI's Parquet
+writer). Loading a subset of K values only reads the matching row groups, and
+the grain size columns, which repeat for every K, are read from the first K's
+row group only (and, for a sample name that several input rows share, from
+the rows needed to tell those samples apart).
+
+For repeated access within a session, :func:`write_ipc_cache` converts a
+result once into uncompressed Arrow IPC (Feather v2) files. Loading those
+memory-maps them: nothing is decompressed, the operating system pages data in
+as it is read, and reopening the result or another K is close to free.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from collections.abc import Callable, Iterator, Mapping
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "CH_COLUMN",
+    "IPC_SUFFIX",
+    "NORMALIZED_PARTS",
+    "RS_COLUMN",
+    "AnalysisResult",
+    "GpsView",
+    "SampleView",
+    "read_ipc_table",
+    "read_normalized_part",
+    "write_ipc_cache",
+    "write_results_parquet",
+]
+
+NORMALIZED_PARTS = ("samples", "metrics", "membership")
+CH_COLUMN = "Calinski-Harabasz pseudo-F statistic"
+RS_COLUMN = "% explained"
+IPC_SUFFIX = ".arrow"
+
+
+def read_normalized_part(
+    directory: str | Path, part: str, columns: list[str] | None = None
+) -> pa.Table:
+    """Read one table of a normalized result directory.
+
+    Args:
+        directory: Directory holding the normalized tables.
+        part: One of ``NORMALIZED_PARTS``.
+        columns: Only read these columns (all if None).
+
+    Returns:
+        The table, from the ``<part>.arrow`` cache if present, else
+        ``<part>.parquet``, else ``<part>.csv``.
+    """
+    directory = Path(directory)
+    ipc_path = directory / f"{part}{IPC_SUFFIX}"
+    if ipc_path.exists():
+        table = read_ipc_table(ipc_path)
+        return table if columns is None else table.select(columns)
+    parquet_path = directory / f"{part}.parquet"
+    if parquet_path.exists():
+        return pq.read_table(parquet_path, columns=columns)
+    csv_path = directory / f"{part}.csv"
+    if csv_path.exists():
+        # Sample names may look numeric; keep them as text
+        convert = pacsv.ConvertOptions(
+            column_types={"Sample": pa.string()}, include_columns=columns
+        )
+        return pacsv.read_csv(csv_path, convert_options=convert)
+    raise FileNotFoundError(f"No {part} table in {directory}")
+
+
+def write_results_parquet(table: pa.Table, path: str | Path, compression: str = "snappy") -> None:
+    """Write a wide result table for K-selective reads.
+
+    Rows are sorted by (K, Group), keeping the input order within a group,
+    and each K is written as its own row group with column statistics, so a
+    reader filtering on K skips every other K. Sample is stored
+    dictionary-encoded. Tables without K/Group columns are written as is.
+
+    Args:
+        table: Wide result table (K, Group, Sample, grain sizes, metrics, ...).
+        path: Output Parquet file.
+        compression: Parquet compression codec.
+    """
+    names = table.column_names
+    if "K" not in names or "Group" not in names or table.num_rows == 0:
+        pq.write_table(table, path, compression=compression, write_statistics=True)
+        return
+
+    table = table.sort_by([("K", "ascending"), ("Group", "ascending")])
+    if "Sample" in names and not pa.types.is_dictionary(table.schema.field("Sample").type):
+        index = names.index("Sample")
+        table = table.set_column(index, "Sample", table.column("Sample").dictionary_encode())
+    k_column = table.column("K").to_numpy()
+    bounds = (np.flatnonzero(np.diff(k_column)) + 1).tolist()
+    starts = [0] + bounds
+    ends = bounds + [table.num_rows]
+    sorting = [pq.SortingColumn(names.index("K")), pq.SortingColumn(names.index("Group"))]
+    with pq.ParquetWriter(path, table.schema, compression=compression, write_statistics=True,
+                          sorting_columns=sorting) as writer:
+        for start, end in zip(starts, ends):
+            writer.write_table(table.slice(start, end - start), row_group_size=end - start)
+
+
+def read_ipc_table(path: str | Path) -> pa.Table:
+    """Open an Arrow IPC file memory-mapped.
+
+    The columns are zero-copy views of the mapping, which stays open as long
+    as any of them is referenced.
+    """
+    return pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+
+
+def _write_ipc(path: Path, schema: pa.Schema, batches) -> None:
+    """Write record batches to an uncompressed IPC file, replacing ``path`` atomically."""
+    partial = path.with_name(path.name + ".partial")
+    try:
+        with pa.OSFile(str(partial), "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+            for batch in batches:
+                writer.write(batch)
+        os.replace(partial, path)
+    finally:
+        partial.unlink(missing_ok=True)
+
+
+def write_ipc_cache(result_path: str | Path) -> str:
+    """Write an uncompressed Arrow IPC copy of a result for memory-mapped loading.
+
+    A wide Parquet file is copied to ``<name>.arrow`` next to it, one row
+    group at a time, so the whole table is never decoded at once. Sample
+    names share one dictionary across the file (the IPC file format does not
+    allow per-batch dictionaries). A normalized directory gets
+    ``<part>.arrow`` next to each table, which :func:`read_normalized_part`
+    prefers.
+
+    Args:
+        result_path: Wide Parquet file or normalized result directory.
+
+    Returns:
+        The path to load with :class:`AnalysisResult`.
+
+    Raises:
+        OSError: If the cache cannot be written, e.g. while a previous copy
+            is still mapped on Windows. Callers can keep using ``result_path``.
+    """
+    path = Path(result_path)
+    if path.is_dir():
+        for part in NORMALIZED_PARTS:
+            table = read_normalized_part(path, part)
+            _write_ipc(path / f"{part}{IPC_SUFFIX}", table.schema,
+                       table.to_batches(max_chunksize=65536))
+        return str(path)
+
+    parquet_file = pq.ParquetFile(path)
+    schema = parquet_file.schema_arrow
+    sample_index = schema.get_field_index("Sample")
+    dictionary = None
+    if sample_index >= 0:
+        samples = parquet_file.read(columns=["Sample"]).column(0)
+        if pa.types.is_dictionary(samples.type):
+            samples = samples.cast(samples.type.value_type)
+        dictionary = pc.unique(samples.combine_chunks())
+        schema = schema.set(sample_index,
+                            pa.field("Sample", pa.dictionary(pa.int32(), dictionary.type)))
+
+    def batches():
+        for i in range(parquet_file.metadata.num_row_groups):
+            table = parquet_file.read_row_group(i)
+            if dictionary is not None:
+                names = table.column(sample_index)
+                if pa.types.is_dictionary(names.type):
+                    names = names.cast(names.type.value_type)
+                indices = pc.index_in(names, value_set=dictionary).cast(pa.int32())
+                encoded = pa.chunked_array(
+                    [pa.DictionaryArray.from_arrays(chunk, dictionary) for chunk in indices.chunks],
+                    type=schema.field(sample_index).type)
+                table = table.set_column(sample_index, schema.field(sample_index), encoded)
+            yield from table.to_batches()
+
+    target = path.with_suffix(IPC_SUFFIX)
+    _write_ipc(target, schema, batches())
+    return str(target)
+
+
+def _row_groups_for_k(parquet_file: pq.ParquetFile, k_index: int, k_values: set[int]) -> list[int]:
+    """Row groups whose K statistics admit one of ``k_values`` (all without statistics)."""
+    selected = []
+    metadata = parquet_file.metadata
+    for i in range(metadata.num_row_groups):
+        stats = metadata.row_group(i).column(k_index).statistics
+        if (stats is None or not stats.has_min_max
+                or any(stats.min <= k <= stats.max for k in k_values)):
+            selected.append(i)
+    return selected
+
+
+def _to_float64(column) -> np.ndarray:
+    """Column as a float64 array (nulls become NaN)."""
+    return np.asarray(column.to_numpy(), dtype=np.float64)
+
+
+def _to_int32(column) -> np.ndarray:
+    """Column of K or group numbers as an int32 array."""
+    return np.asarray(column.to_numpy(), dtype=np.int32)
+
+
+class _RowView(Mapping):
+    """Read-only mapping over one result row of an AnalysisResult.
+
+    Values are read from the columnar arrays on access, so a view costs two
+    references instead of a dict of Python objects per sample.
+    """
+
+    __slots__ = ("_owner", "_row")
+    _FIELDS: dict[str, Callable] = {}
+
+    def __init__(self, owner: AnalysisResult, row: int):
+        self._owner = owner
+        self._row = row
+
+    def __getitem__(self, key: str):
+        try:
+            getter = self._FIELDS[key]
+        except KeyError:
+            raise KeyError(key) from None
+        return getter(self._owner, self._row)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._FIELDS)
+
+    def __len__(self) -> int:
+        return len(self._FIELDS)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+class SampleView(_RowView):
+    """One sample at one K: ``group``, ``x``, ``sample_id``, ``latitude``, ``longitude``.
+
+    ``x`` is a read-only row of the grain size matrix (no copy).
+    """
+
+    __slots__ = ()
+    _FIELDS = {
+        "group": lambda r, row: int(r._group[row]),
+        "x": lambda r, row: r._values[r._sample_index[row]],
+        "sample_id": lambda r, row: r._sample_names[r._sample_index[row]],
+        "latitude": lambda r, row: float(r._latitude[r._sample_index[row]]),
+        "longitude": lambda r, row: float(r._longitude[r._sample_index[row]]),
+    }
+
+
+class GpsView(_RowView):
+    """GPS position and group of one sample at one K: ``lat``, ``lon``, ``group``."""
+
+    __slots__ = ()
+    _FIELDS = {
+        "lat": lambda r, row: float(r._latitude[r._sample_index[row]]),
+        "lon": lambda r, row: float(r._longitude[r._sample_index[row]]),
+        "group": lambda r, row: int(r._group[row]),
+    }
+
+
+class _PerK(Mapping):
+    """K -> value mapping computed on access (nothing is stored per K)."""
+
+    __slots__ = ("_keys", "_get")
+
+    def __init__(self, keys: list[int], get: Callable[[int], object]):
+        self._keys = keys
+        self._get = get
+
+    def __getitem__(self, k_value: int):
+        if k_value not in self._keys:
+            raise KeyError(k_value)
+        return self._get(k_value)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class AnalysisResult:
+    """A ``run_entropymax`` result loaded once into columnar arrays.
+
+    Args:
+        path: Wide Parquet file, its ``.arrow`` cache (memory-mapped), or
+            normalized result directory.
+        k_values: Only load these K values (all if None). For wide Parquet
+            files only the row groups whose K statistics match are read.
+
+    Attributes:
+        path: The path the result was loaded from.
+        grain_columns: Grain size column names, in file order.
+    """
+
+    def __init__(self, path: str | Path, k_values: list[int] | None = None):
+        self.path = str(path)
+        self.grain_columns: list[str] = []
+        self._metrics: dict[int, dict[str, float]] = {}
+        # Per result row
+        self._k = np.empty(0, dtype=np.int32)
+        self._group = np.empty(0, dtype=np.int32)
+        self._sample_index = np.empty(0, dtype=np.int32)
+        # Per sample
+        self._sample_names: list[str] = []
+        self._values = np.empty((0, 0), dtype=np.float64)
+        self._latitude = np.empty(0, dtype=np.float64)
+        self._longitude = np.empty(0, dtype=np.float64)
+        # K -> result rows of that K, in file order
+        self._rows_by_k: dict[int, np.ndarray] = {}
+        # (K, group) index: rows sorted by K, then group, then file order;
+        # _group_slices[K][group] is that group's slice of _group_order
+        self._group_order = np.empty(0, dtype=np.intp)
+        self._group_slices: dict[int, dict[int, slice]] = {}
+        wanted = None if k_values is None else {int(k) for k in k_values}
+        if Path(path).is_dir():
+            self._load_normalized(wanted)
+        elif Path(path).suffix == IPC_SUFFIX:
+            self._load_ipc(wanted)
+        else:
+            self._load_wide(wanted)
+
+    # -- loading --------------------------------------------------------------
+
+    @staticmethod
+    def _detect_column_positions(names: list[str]) -> dict[str, int]:
+        """Locate the wide layout columns; the number of grain size columns varies."""
+        column_no = len(names)
+        # Fixed positions based on actual CLI output format:
+        # K, Group, Sample, [grain_sizes...], % explained, Total inequality,
+        # Between region inequality, Total sum of squares, Within group sum of squares,
+        # Calinski-Harabasz pseudo-F statistic, [permutation columns], latitude, longitude
+        # Grain sizes end where the metrics start; permutation runs add two
+        # extra metric columns, so locate '% explained' by name when present.
+        val_max = names.index(RS_COLUMN) if RS_COLUMN in names else column_no - 8
+        return {
+            "k_value": 0,
+            "group_id": 1,
+            "sample_id": 2,
+            "grain_start": 3,
+            "latitude": column_no - 2,
+            "longitude": column_no - 1,
+            "val_max": val_max,
+        }
+
+    def _wide_columns(self, names: list[str]) -> tuple[list[str], list[str]]:
+        """Set :attr:`grain_columns`; return the key + metric and grain + GPS column names."""
+        pos = self._detect_column_positions(names)
+        logger.debug("Detected column positions: %s", pos)
+        self.grain_columns = names[pos["grain_start"]:pos["val_max"]]
+        key_names = names[pos["k_value"]:pos["grain_start"]] + names[pos["val_max"]:pos["latitude"]]
+        return key_names, self.grain_columns + names[pos["latitude"]:]
+
+    def _load_wide(self, wanted: set[int] | None) -> None:
+        parquet_file = pq.ParquetFile(self.path)
+        key_names, value_names = self._wide_columns(parquet_file.schema_arrow.names)
+
+        row_groups = list(range(parquet_file.metadata.num_row_groups))
+        if wanted is not None:
+            row_groups = _row_groups_for_k(parquet_file, 0, wanted)
+        keys = parquet_file.read_row_groups(row_groups, columns=key_names)
+        logger.info("Loading %s: %d rows from %d of %d row groups", self.path, keys.num_rows,
+                    len(row_groups), parquet_file.metadata.num_row_groups)
+
+        def read_values(first_rows: np.ndarray) -> tuple[pa.Table, np.ndarray]:
+            # Read grain sizes and coordinates only from the row groups holding those rows
+            sizes = np.array([parquet_file.metadata.row_group(i).num_rows for i in row_groups],
+                             dtype=np.int64)
+            offsets = np.concatenate(([0], np.cumsum(sizes)))
+            group_of_row = np.searchsorted(offsets, first_rows, side="right") - 1
+            needed = np.unique(group_of_row)
+            needed_offsets = np.concatenate(([0], np.cumsum(sizes[needed])))
+            positions = (first_rows - offsets[group_of_row]
+                         + needed_offsets[np.searchsorted(needed, group_of_row)])
+            values = parquet_file.read_row_groups([row_groups[i] for i in needed.tolist()],
+                                                  columns=value_names)
+            return values, positions
+
+        self._fill_wide(keys, wanted, read_values)
+
+    def _load_ipc(self, wanted: set[int] | None) -> None:
+        # Memory-mapped: columns are views of the file and only the pages
+        # actually read (keys, each sample's first row) are paged in
+        table = read_ipc_table(self.path)
+        key_names, value_names = self._wide_columns(table.column_names)
+        logger.info("Loading %s: %d rows, memory-mapped", self.path, table.num_rows)
+        values = table.select(value_names)
+        self._fill_wide(table.select(key_names), wanted, lambda first_rows: (values, first_rows))
+
+    def _fill_wide(self, keys: pa.Table, wanted: set[int] | None,
+                   read_values: Callable[[np.ndarray], tuple[pa.Table, np.ndarray]]) -> None:
+        """Fill the arrays from wide layout columns.
+
+        Args:
+            keys: K, Group, Sample and the metric columns.
+            wanted: K values to keep (all if None).
+            read_values: Given rows of ``keys``, returns a table of the grain
+                size, latitude and longitude columns and the positions of
+                those rows in it.
+
+        Samples are identified by position, not by name: every K lists each
+        input row once, so the rows of the first K define the samples. Rows
+        of a name that several input rows share are matched to those samples
+        by their grain size values.
+        """
+        k_column = _to_int32(keys.column(0))
+        rows = np.arange(len(k_column))
+        if wanted is not None:
+            rows = np.flatnonzero(np.isin(k_column, list(wanted)))
+        k_column = k_column[rows]
+        group_column = _to_int32(keys.column(1))[rows]
+
+        # Dictionary-encode the sample names; the CLI already writes them encoded
+        samples = keys.column(2)
+        if not pa.types.is_dictionary(samples.type):
+            samples = samples.dictionary_encode()
+        samples = samples.combine_chunks()
+        codes = samples.indices.to_numpy(zero_copy_only=False)[rows]
+
+        # One sample per row of the first K, numbered in file order; a name
+        # missing there starts a sample at its first row
+        sample_of_row = np.full(len(rows), -1, dtype=np.int32)
+        first_block = np.flatnonzero(k_column == k_column[0]) if len(rows) else rows[:0]
+        sample_of_row[first_block] = np.arange(len(first_block), dtype=np.int32)
+        per_code = np.bincount(codes[first_block], minlength=len(samples.dictionary))
+        code_sample = np.full(len(per_code), -1, dtype=np.int32)
+        unique_in_block = first_block[per_code[codes[first_block]] == 1]
+        code_sample[codes[unique_in_block]] = sample_of_row[unique_in_block]
+        missing = np.flatnonzero((sample_of_row < 0) & (per_code[codes] == 0))
+        _, new_first = np.unique(codes[missing], return_index=True)
+        new_rows = missing[np.sort(new_first)]
+        code_sample[codes[new_rows]] = np.arange(len(first_block), len(first_block) + len(new_rows),
+                                                 dtype=np.int32)
+        sample_rows = np.concatenate((first_block, new_rows))
+        shared = np.flatnonzero((sample_of_row < 0) & (per_code[codes] > 1))
+        rest = np.flatnonzero(sample_of_row < 0)
+        sample_of_row[rest] = code_sample[codes[rest]]
+        dictionary = samples.dictionary.to_pylist()
+        self._sample_names = [dictionary[code] for code in codes[sample_rows].tolist()]
+
+        # Gather only the needed rows; converting whole columns would decode every K
+        values, positions = read_values(rows[np.concatenate((sample_rows, shared))])
+        positions = pa.array(positions, type=pa.int64())
+        n_grain = len(self.grain_columns)
+        gathered = np.empty((len(positions), n_grain), dtype=np.float64)
+        for j in range(n_grain):
+            gathered[:, j] = _to_float64(values.column(j).take(positions))
+        n_samples = len(sample_rows)
+        self._values = gathered[:n_samples]
+        self._latitude = _to_float64(values.column(n_grain).take(positions))[:n_samples]
+        self._longitude = _to_float64(values.column(n_grain + 1).take(positions))[:n_samples]
+        self._match_shared_names(sample_of_row, shared, gathered[n_samples:], codes, k_column,
+                                 codes[sample_rows])
+        self._sample_index = sample_of_row
+
+        # Metrics repeat on every row of a K; keep the first
+        k_values, k_first = np.unique(k_column, return_index=True)
+        take = pa.array(rows[k_first])
+        metric_values = {
+            name: keys.column(m).take(take).to_pylist()
+            for m, name in enumerate(keys.column_names[3:], start=3)
+        }
+        for n, k_value in enumerate(k_values.tolist()):
+            self._metrics[k_value] = {name: values[n] for name, values in metric_values.items()}
+
+        self._set_rows(k_column, group_column)
+
+    def _match_shared_names(self, sample_of_row: np.ndarray, shared: np.ndarray,
+                            shared_values: np.ndarray, codes: np.ndarray,
+                            k_column: np.ndarray, sample_codes: np.ndarray) -> None:
+        """Assign rows whose name several samples share to one of those samples.
+
+        Within each K every sample appears once; a row goes to the first
+        sample of its name not yet taken at that K whose grain sizes match,
+        or to the first one left if none does.
+        """
+        taken: dict[tuple[int, int], list[int]] = {}
+        for row, row_values in zip(shared.tolist(), shared_values):
+            key = (int(k_column[row]), int(codes[row]))
+            left = taken.get(key)
+            if left is None:
+                left = taken[key] = np.flatnonzero(sample_codes == key[1]).tolist()
+            if not left:
+                continue
+            match = next((s for s in left
+                          if np.array_equal(self._values[s], row_values, equal_nan=True)), left[0])
+            left.remove(match)
+            sample_of_row[row] = match
+
+    def _load_normalized(self, wanted: set[int] | None) -> None:
+        samples = read_normalized_part(self.path, "samples")
+        metrics = read_normalized_part(self.path, "metrics")
+        columns = None if wanted is None else [f"K{k}" for k in sorted(wanted)]
+        try:
+            membership = read_normalized_part(self.path, "membership", columns=columns)
+        except (KeyError, pa.ArrowInvalid):
+            # Some requested K is not in the file; read all and filter below
+            membership = read_normalized_part(self.path, "membership")
+        logger.info("Loading normalized results from %s: %d samples, %d K columns",
+                    self.path, samples.num_rows, membership.num_columns)
+        if membership.num_rows != samples.num_rows:
+            raise ValueError("membership and samples tables have different row counts")
+
+        self._sample_names = samples.column("Sample").to_pylist()
+        self._latitude = _to_float64(samples.column("latitude"))
+        self._longitude = _to_float64(samples.column("longitude"))
+        self.grain_columns = [
+            name for name in samples.column_names if name not in ("Sample", "latitude", "longitude")
+        ]
+        self._values = np.empty((samples.num_rows, len(self.grain_columns)), dtype=np.float64)
+        for j, name in enumerate(self.grain_columns):
+            self._values[:, j] = _to_float64(samples.column(name))
+
+        for record in metrics.to_pylist():
+            k_value = int(record.pop("K"))
+            if wanted is None or k_value in wanted:
+                self._metrics[k_value] = record
+
+        # Keep the wide layout's order (by group within each K)
+        k_parts, group_parts, sample_parts = [], [], []
+        for name in membership.column_names:
+            if wanted is not None and int(name.lstrip("K")) not in wanted:
+                continue
+            groups = _to_int32(membership.column(name))
+            order = np.argsort(groups, kind="stable").astype(np.int32)
+            k_parts.append(np.full(len(groups), int(name.lstrip("K")), dtype=np.int32))
+            group_parts.append(groups[order])
+            sample_parts.append(order)
+        if k_parts:
+            self._sample_index = np.concatenate(sample_parts)
+            self._set_rows(np.concatenate(k_parts), np.concatenate(group_parts))
+
+    def _set_rows(self, k_column: np.ndarray, group_column: np.ndarray) -> None:
+        """Store the per-row K and group arrays and index rows by K and (K, group)."""
+        self._k = k_column
+        self._group = group_column
+        self._values.flags.writeable = False  # shared by every SampleView
+        order = np.argsort(k_column, kind="stable")
+        k_values, starts = np.unique(k_column[order], return_index=True)
+        for k_value, rows in zip(k_values.tolist(), np.split(order, starts[1:])):
+            self._rows_by_k[k_value] = rows
+
+        order = np.lexsort((group_column, k_column))
+        if not len(order):
+            return
+        sorted_k = k_column[order]
+        sorted_group = group_column[order]
+        bounds = np.flatnonzero((np.diff(sorted_k) != 0) | (np.diff(sorted_group) != 0)) + 1
+        starts = np.concatenate(([0], bounds)).tolist()
+        ends = np.concatenate((bounds, [len(order)])).tolist()
+        self._group_order = order
+        for start, end in zip(starts, ends):
+            k_value = int(sorted_k[start])
+            self._group_slices.setdefault(k_value, {})[int(sorted_group[start])] = slice(start, end)
+
+    def _group_rows(self, k_value: int, group_id: int) -> np.ndarray:
+        """Result rows of one group at one K, in file order (empty if unknown)."""
+        index = self._group_slices.get(k_value, {}).get(group_id)
+        if index is None:
+            return self._group_order[:0]
+        return self._group_order[index]
+
+    # -- series over K --------------------------------------------------------
+
+    @property
+    def k_values(self) -> list[int]:
+        """Available K values, ascending."""
+        return sorted(self._rows_by_k)
+
+    def metric_series(self, column: str) -> list[float]:
+        """One metric column as a list aligned with :attr:`k_values`."""
+        return [float(self._metrics[k][column]) for k in self.k_values]
+
+    @property
+    def ch_values(self) -> list[float]:
+        """Calinski-Harabasz pseudo-F per K, aligned with :attr:`k_values`."""
+        return self.metric_series(CH_COLUMN)
+
+    @property
+    def rs_values(self) -> list[float]:
+        """RS (% explained) per K, aligned with :attr:`k_values`."""
+        return self.metric_series(RS_COLUMN)
+
+    @property
+    def optimal_k(self) -> int | None:
+        """K with the largest CH statistic (first on ties), or None without results."""
+        ch_values = self.ch_values
+        if not ch_values:
+            return None
+        return self.k_values[int(np.argmax(ch_values))]
+
+    @property
+    def sample_names(self) -> list[str]:
+        """Sample IDs in sample order (the rows of :meth:`membership_matrix`)."""
+        return list(self._sample_names)
+
+    def sample_coordinates(self) -> tuple[np.ndarray, np.ndarray]:
+        """Latitude and longitude per sample, in :attr:`sample_names` order."""
+        return self._latitude, self._longitude
+
+    def membership_matrix(self) -> np.ndarray:
+        """Group of every sample at every K.
+
+        Returns:
+            int32 array of shape (samples, len(k_values)): rows follow
+            :attr:`sample_names`, columns :attr:`k_values`; 0 where a sample
+            has no row at that K.
+        """
+        k_values = np.array(self.k_values, dtype=np.int32)
+        matrix = np.zeros((len(self._sample_names), len(k_values)), dtype=np.int32)
+        matrix[self._sample_index, np.searchsorted(k_values, self._k)] = self._group
+        return matrix
+
+    @property
+    def gps_data(self) -> Mapping[int, dict[str, GpsView]]:
+        """K -> :meth:`get_gps_data_for_k`, computed when a K is looked up."""
+        return _PerK(self.k_values, self.get_gps_data_for_k)
+
+    @property
+    def groupings(self) -> Mapping[int, dict[int, list[str]]]:
+        """K -> :meth:`get_groupings_for_k`, computed when a K is looked up."""
+        return _PerK(self.k_values, self.get_groupings_for_k)
+
+    # -- per K ----------------------------------------------------------------
+
+    def get_all_k_values(self) -> list[int]:
+        """Sorted list of K values."""
+        return self.k_values
+
+    def get_metrics(self, k_value: int) -> dict[str, float]:
+        """Metric column name -> value for one K (empty if K is unknown)."""
+        return self._metrics.get(k_value, {})
+
+    def get_data_for_k(self, k_value: int) -> list[SampleView]:
+        """All samples at one K, in file order."""
+        rows = self._rows_by_k.get(k_value)
+        if rows is None:
+            return []
+        return [SampleView(self, row) for row in rows.tolist()]
+
+    def get_gps_data_for_k(self, k_value: int) -> dict[str, GpsView]:
+        """Sample ID -> GpsView (``lat``, ``lon``, ``group``) for one K."""
+        rows = self._rows_by_k.get(k_value)
+        if rows is None:
+            return {}
+        names = self._sample_names
+        return {
+            names[sample]: GpsView(self, row)
+            for sample, row in zip(self._sample_index[rows].tolist(), rows.tolist())
+        }
+
+    def get_groupings_for_k(self, k_value: int) -> dict[int, list[str]]:
+        """Group ID -> sample IDs for one K, groups ascending."""
+        return {
+            group_id: self.get_group_sample_ids(k_value, group_id)
+            for group_id in self.get_group_ids_for_k(k_value)
+        }
+
+    def get_group_ids_for_k(self, k_value: int) -> list[int]:
+        """Sorted group IDs present at one K."""
+        return sorted(self._group_slices.get(k_value, {}))
+
+    def get_statistics(self, k_value: int) -> dict:
+        """Group count, sample count and samples per group for one K."""
+        groups = self._group_slices.get(k_value)
+        if not groups:
+            return {"num_groups": 0, "num_samples": 0, "samples_per_group": {}}
+        samples_per_group = {
+            group_id: index.stop - index.start for group_id, index in sorted(groups.items())
+        }
+        return {
+            "num_groups": len(samples_per_group),
+            "num_samples": sum(samples_per_group.values()),
+            "samples_per_group": samples_per_group,
+        }
+
+    # -- per group ------------------------------------------------------------
+
+    def get_samples_by_group(self, k_value: int, group_id: int) -> list[SampleView]:
+        """Samples of one group at one K, in file order."""
+        return [SampleView(self, row) for row in self._group_rows(k_value, group_id).tolist()]
+
+    def get_group_sample_ids(self, k_value: int, group_id: int) -> list[str]:
+        """Sample IDs of one group at one K, in the order of :meth:`get_samples_by_group`."""
+        names = self._sample_names
+        return [names[i] for i in self._sample_index[self._group_rows(k_value, group_id)].tolist()]
+
+    def get_group_values(self, k_value: int, group_id: int) -> np.ndarray:
+        """Grain size matrix of one group at one K.
+
+        Returns:
+            Array of shape (samples in group, len(grain_columns)), rows in the
+            order of :meth:`get_samples_by_group`.
+        """
+        return self._values[self._sample_index[self._group_rows(k_value, group_id)]]
+
+    def get_group_details(self, k_value: int) -> dict[int, dict]:
+        """Per-group samples and grain size values for one K.
+
+        Returns:
+            Group ID -> ``{'samples': [{'name', 'values'}], 'x_labels', 'count'}``,
+            the structure the group detail popups and PSD widget consume;
+            empty if K is unknown.
+        """
+        x_labels = list(self.grain_columns)
+        details: dict[int, dict] = {}
+        for group_id in self.get_group_ids_for_k(k_value):
+            names = self.get_group_sample_ids(k_value, group_id)
+            values = self.get_group_values(k_value, group_id).tolist()
+            details[group_id] = {
+                "samples": [{"name": name, "values": row} for name, row in zip(names, values)],
+                "x_labels": x_labels,
+                "count": len(names),
+            }
+        return details
+
+    def validate_data(self) -> bool:
+        """Check that something was loaded and the arrays agree.
+
+        Raises:
+            ValueError: If the result is empty or inconsistent.
+        """
+        if not self._rows_by_k:
+            raise ValueError(f"No data loaded from {self.path}")
+        for k_value, rows in self._rows_by_k.items():
+            if not len(rows):
+                raise ValueError(f"K value {k_value} has no data")
+        if len(self._sample_index) and (self._sample_index.min() < 0
+                                        or self._sample_index.max() >= len(self._sample_names)):
+            raise ValueError("Result rows reference unknown samples")
+        if self._values.shape != (len(self._sample_names), len(self.grain_columns)):
+            raise ValueError("Grain size data does not match the sample list")
+        return True
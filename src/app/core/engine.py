@@ -0,0 +1,162 @@
+"""Facade over the compiled backend bindings.
+
+Uses the Cython extension (``app.bindings.cython_backend.wrapper_cy``) when it
+has been built and falls back to the cffi bindings otherwise. Both release the
+GIL while the C sweep runs, so :func:`run_many` can process several datasets
+or K ranges on a thread pool inside one process.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from types import ModuleType
+
+from app.bindings._types import (
+    METRIC_DTYPE,
+    BackendError,
+    ProgressEvent,
+    SweepCancelled,
+    SweepResult,
+)
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "METRIC_DTYPE",
+    "BackendError",
+    "ProgressEvent",
+    "SweepCancelled",
+    "SweepParams",
+    "SweepResult",
+    "load_backend",
+    "run_many",
+    "run_sweep",
+]
+
+
+@dataclass(frozen=True)
+class SweepParams:
+    """Options for one sweep; defaults match the ``run_entropymax`` CLI."""
+
+    k_min: int = 2
+    k_max: int = 20
+    row_proportions: bool = False
+    gdtl_percent: bool = True
+    perms_n: int = 0
+    seed: int = 42
+    threads: int = 1
+    warm_start: str = "none"  # "split" (K from K-1) or "merge" (K from K+1)
+    starts: int = 1  # optimisation starts per K, best RS kept
+    start_budget: float = 0.0  # seconds before extra starts stop (0: no limit)
+    move_strategy: str = "first"  # "first" (VB6), "best" or parallel "rounds"
+    polish: bool = False  # finish "rounds" with first-improvement passes
+    max_passes: int = 0  # passes per start (0: until converged)
+    max_seconds: float = 0.0  # wall time per K (0: no limit)
+    min_rs_gain: float = 0.0  # stop after a pass gaining less RS, in % points (0: off)
+    stop_when_stale: bool = False  # stop at the first pass without moves
+
+
+def load_backend(name: str = "auto") -> ModuleType:
+    """Return the binding module to use.
+
+    Args:
+        name: ``"cython"``, ``"cffi"`` or ``"auto"`` (Cython if built, else cffi).
+
+    Raises:
+        ImportError: If the requested binding is not available.
+        OSError: If the cffi binding cannot find or open the shared library.
+    """
+    if name not in ("auto", "cython", "cffi"):
+        raise ValueError(f"unknown backend {name!r}")
+    if name in ("auto", "cython"):
+        try:
+            from app.bindings.cython_backend import wrapper_cy
+        except ImportError:
+            if name == "cython":
+                raise
+            logger.debug("Cython backend not built, using cffi")
+        else:
+            return wrapper_cy
+
+    from app.bindings import cffi_backend
+
+    cffi_backend.load()
+    return cffi_backend
+
+
+def run_sweep(
+    data,
+    params: SweepParams | None = None,
+    backend: str = "auto",
+    progress: Callable[[ProgressEvent], bool | None] | None = None,
+) -> SweepResult:
+    """Run the full pipeline (preprocess + K sweep) on a raw data matrix.
+
+    Args:
+        data: Raw sample data (rows x cols), anything convertible to float64.
+        params: Sweep options (``SweepParams()`` if omitted).
+        backend: Binding selection, see :func:`load_backend`.
+        progress: Optional callback for sweep progress events; returning True
+            cancels the run.
+
+    Returns:
+        SweepResult with metrics per K, the membership matrix and group means.
+
+    Raises:
+        SweepCancelled: If ``progress`` cancelled the run.
+    """
+    params = params or SweepParams()
+    impl = load_backend(backend)
+    return impl.run(
+        data,
+        k_min=params.k_min,
+        k_max=params.k_max,
+        row_proportions=params.row_proportions,
+        gdtl_percent=params.gdtl_percent,
+        perms_n=params.perms_n,
+        seed=params.seed,
+        threads=params.threads,
+        progress=progress,
+        warm_start=params.warm_start,
+        starts=params.starts,
+        start_budget=params.start_budget,
+        move_strategy=params.move_strategy,
+        polish=params.polish,
+        max_passes=params.max_passes,
+        max_seconds=params.max_seconds,
+        min_rs_gain=params.min_rs_gain,
+        stop_when_stale=params.stop_when_stale,
+    )
+
+
+def run_many(
+    datasets: Sequence,
+    params: SweepParams | Sequence[SweepParams] | None = None,
+    max_workers: int | None = None,
+    backend: str = "auto",
+) -> list[SweepResult]:
+    """Run several sweeps concurrently on a thread pool.
+
+    Args:
+        datasets: Raw data matrices, one per sweep.
+        params: One SweepParams for all sweeps, or one per dataset.
+        max_workers: Thread pool size (``None``: executor default).
+        backend: Binding selection, see :func:`load_backend`.
+
+    Returns:
+        Results in the same order as ``datasets``.
+    """
+    if params is None or isinstance(params, SweepParams):
+        per_run = [params or SweepParams()] * len(datasets)
+    else:
+        per_run = list(params)
+        if len(per_run) != len(datasets):
+            raise ValueError("params must match the number of datasets")
+
+    load_backend(backend)  # fail fast before spawning workers
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(run_sweep, d, p, backend) for d, p in zip(datasets, per_run)]
+        return [f.result() for f in futures]
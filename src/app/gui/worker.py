@@ -0,0 +1,164 @@
+"""Background workers for the GUI.
+
+Pipeline steps -- the CLI run, CSV to Parquet conversion, result extraction,
+group details and KML export -- run as :class:`Worker` runnables on a
+``QThreadPool`` so the event loop never waits for them. A worker calls its
+function with a :class:`WorkerContext` as the first argument; the function
+reports progress and checks for cancellation through it, and must not touch
+widgets. Outcomes come back to the GUI thread through the queued
+:class:`WorkerSignals`: exactly one of ``result``, ``error`` or ``cancelled``,
+then ``finished``.
+
+Example::
+
+    worker = Worker(extract_group_details, result, k_value)
+    worker.signals.result.connect(show_details)
+    worker.signals.error.connect(show_error)
+    start_worker(worker)
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool
+from PyQt6.QtCore import pyqtSignal as Signal
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "Progress",
+    "Worker",
+    "WorkerCancelled",
+    "WorkerContext",
+    "WorkerSignals",
+    "start_worker",
+]
+
+
+class WorkerCancelled(Exception):
+    """Raised inside a worker function to stop after a cancel request."""
+
+
+@dataclass(frozen=True)
+class Progress:
+    """A progress report from a worker.
+
+    Attributes:
+        step: Current step, 0-based.
+        total: Number of steps (0 if unknown).
+        message: Text for a progress label.
+    """
+
+    step: int
+    total: int
+    message: str
+
+
+class WorkerSignals(QObject):
+    """Signals of one :class:`Worker`, delivered in the GUI thread."""
+
+    progress = Signal(Progress)
+    result = Signal(object)
+    error = Signal(Exception)
+    cancelled = Signal()
+    finished = Signal()
+
+
+class WorkerContext:
+    """Handle passed to a worker function for progress and cancellation."""
+
+    def __init__(self, signals: WorkerSignals):
+        self._signals = signals
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        """True once :meth:`Worker.cancel` was called."""
+        return self._cancel.is_set()
+
+    def check_cancelled(self) -> None:
+        """Raise :class:`WorkerCancelled` if cancellation was requested.
+
+        Call between steps; long steps poll :attr:`cancelled` instead and
+        stop their own work (e.g. the CLI process) first.
+        """
+        if self._cancel.is_set():
+            raise WorkerCancelled()
+
+    def progress(self, step: int, total: int, message: str) -> None:
+        """Emit a :class:`Progress` report."""
+        self._signals.progress.emit(Progress(step, total, message))
+
+
+class Worker(QRunnable):
+    """Run ``fn(context, *args, **kwargs)`` on a thread pool.
+
+    Args:
+        fn: The work; receives a :class:`WorkerContext` first.
+        *args: Further positional arguments for ``fn``.
+        **kwargs: Keyword arguments for ``fn``.
+
+    Attributes:
+        signals: The worker's :class:`WorkerSignals`. Connect to them before
+            starting the worker.
+    """
+
+    def __init__(self, fn: Callable[..., object], *args, **kwargs):
+        super().__init__()
+        # Owned by Python (see start_worker), not deleted by the pool
+        self.setAutoDelete(False)
+        self.signals = WorkerSignals()
+        self.context = WorkerContext(self.signals)
+        self._fn = fn
+        self._args = args
+        self._kwargs = kwargs
+
+    def cancel(self) -> None:
+        """Ask the worker to stop; it emits ``cancelled`` once it has."""
+        self.context._cancel.set()
+
+    def run(self) -> None:
+        signals = self.signals
+        try:
+            result = self._fn(self.context, *self._args, **self._kwargs)
+        except WorkerCancelled:
+            signals.cancelled.emit()
+        except Exception as e:
+            if self.context.cancelled:
+                # Failures while stopping (e.g. a killed CLI) are the cancel
+                signals.cancelled.emit()
+            else:
+                name = getattr(self._fn, "__name__", self._fn)
+                logger.exception("Background task %s failed", name)
+                signals.error.emit(e)
+        else:
+            if self.context.cancelled:
+                signals.cancelled.emit()
+            else:
+                signals.result.emit(result)
+        finally:
+            signals.finished.emit()
+
+
+# Workers between start_worker and their finished signal
+_running: set[Worker] = set()
+
+
+def start_worker(worker: Worker, pool: QThreadPool | None = None, priority: int = 0) -> Worker:
+    """Start ``worker`` on ``pool`` (the global pool by default).
+
+    Keeps a reference until the worker's ``finished`` signal has been
+    delivered, so callers need not hold on to it. Queued workers with a
+    higher ``priority`` start first; use a negative one for speculative work.
+
+    Returns:
+        The worker, e.g. to :meth:`Worker.cancel` it later.
+    """
+    _running.add(worker)
+    worker.signals.finished.connect(lambda: _running.discard(worker))
+    (pool or QThreadPool.globalInstance()).start(worker, priority)
+    return worker
@@ -0,0 +1,73 @@
+"""Shared fixtures: import paths and one small result in both CLI layouts."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+for _path in (ROOT / "src", ROOT / "frontend"):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from app.core.datastore import CH_COLUMN, RS_COLUMN, write_results_parquet  # noqa: E402
+
+FIXTURE = ROOT / "data" / "raw" / "inputs" / "sample_group_1_input.csv"
+FIXTURE_GPS = ROOT / "data" / "raw" / "gps" / "sample_group_1_coordinates.csv"
+K_VALUES = range(2, 7)
+
+
+def read_fixture() -> tuple[list[str], list[str], np.ndarray]:
+    """Sample names, bin names and the value matrix of the bundled input."""
+    convert = pacsv.ConvertOptions(column_types={"Sample Name": pa.string()})
+    table = pacsv.read_csv(FIXTURE, convert_options=convert)
+    bins = table.column_names[1:]
+    values = np.column_stack([table.column(b).to_numpy().astype(np.float64) for b in bins])
+    return table.column(0).to_pylist(), bins, values
+
+
+@pytest.fixture
+def result_layouts(tmp_path: Path) -> tuple[Path, Path]:
+    """One synthetic result in the CLI's wide (Parquet) and normalized layouts."""
+    names, bins, values = read_fixture()
+    rows = len(names)
+    lat = np.linspace(-30.0, -20.0, rows)
+    lon = np.linspace(130.0, 140.0, rows)
+    membership = {k: (np.arange(rows) * 7 % k + 1).astype(np.int32) for k in K_VALUES}
+
+    wide: dict[str, list] = {"K": [], "Group": [], "Sample": []}
+    wide.update({b: [] for b in bins})
+    wide.update({RS_COLUMN: [], CH_COLUMN: [], "latitude": [], "longitude": []})
+    for k, groups in membership.items():
+        for g in range(1, k + 1):
+            for i in np.flatnonzero(groups == g).tolist():
+                wide["K"].append(k)
+                wide["Group"].append(g)
+                wide["Sample"].append(names[i])
+                for j, b in enumerate(bins):
+                    wide[b].append(values[i, j])
+                wide[RS_COLUMN].append(10.0 * k)
+                wide[CH_COLUMN].append(100.0 / k)
+                wide["latitude"].append(lat[i])
+                wide["longitude"].append(lon[i])
+    wide_path = tmp_path / "output.parquet"
+    write_results_parquet(pa.table(wide), wide_path)
+
+    normalized = tmp_path / "normalized"
+    normalized.mkdir()
+    samples = {"Sample": names, "latitude": lat, "longitude": lon}
+    samples.update({b: values[:, j] for j, b in enumerate(bins)})
+    pq.write_table(pa.table(samples), normalized / "samples.parquet")
+    pq.write_table(pa.table({"K": list(K_VALUES),
+                             RS_COLUMN: [10.0 * k for k in K_VALUES],
+                             CH_COLUMN: [100.0 / k for k in K_VALUES]}),
+                   normalized / "metrics.parquet")
+    pq.write_table(pa.table({f"K{k}": groups for k, groups in membership.items()}),
+                   normalized / "membership.parquet")
+    return wide_path, normalized
@@ -0,0 +1,72 @@
+"""cffi_backend.run must reproduce the run_entropymax CLI on the same input."""
+
+from __future__ import annotations
+
+import platform
+import subprocess
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.bindings import _lib
+
+try:
+    LIBRARY = _lib.find_library()
+except FileNotFoundError:
+    LIBRARY = None
+
+pytestmark = pytest.mark.skipif(LIBRARY is None, reason="backend shared library not built")
+
+ROWS, COLS, K_MAX = 40, 6, 6
+
+
+def _cli_path():
+    name = "run_entropymax.exe" if platform.system() == "Windows" else "run_entropymax"
+    return LIBRARY.parent / name
+
+
+def _fixture() -> tuple[list[str], np.ndarray]:
+    rng = np.random.default_rng(7)
+    data = rng.random((ROWS, COLS)) * 10.0
+    data[np.arange(ROWS), np.arange(ROWS) % 3] += 20.0  # three loose clusters
+    return [f"S{i:02d}" for i in range(ROWS)], data
+
+
+def _run_cli(tmp_path, names, data) -> pd.DataFrame:
+    cli = _cli_path()
+    if not cli.is_file():
+        pytest.skip(f"{cli.name} not built next to {LIBRARY.name}")
+    bins = [f"{0.1 * (j + 1):.1f}" for j in range(COLS)]
+    frame = pd.DataFrame(data, columns=bins)
+    frame.insert(0, "Sample Name", names)
+    frame.to_csv(tmp_path / "input.csv", index=False, float_format="%.17g")
+    gps = pd.DataFrame({"Sample": names, "Latitude": np.linspace(-30, -20, ROWS),
+                        "Longitude": np.linspace(130, 140, ROWS)})
+    gps.to_csv(tmp_path / "gps.csv", index=False)
+    subprocess.run([str(cli), "input.csv", "gps.csv", "--EM_K_MAX", str(K_MAX)],
+                   cwd=tmp_path, check=True, capture_output=True, timeout=120)
+    return pd.read_csv(tmp_path / "output.csv", dtype={"Sample": str})
+
+
+def test_run_matches_cli(tmp_path):
+    cffi_backend = pytest.importorskip("app.bindings.cffi_backend")
+
+    names, data = _fixture()
+    expected = _run_cli(tmp_path, names, data)
+    result = cffi_backend.run(data, k_min=2, k_max=K_MAX)
+
+    assert list(result.k_values) == list(range(2, K_MAX + 1))
+    first_rows = expected.groupby("K", sort=True).first()
+    np.testing.assert_allclose(result.metrics["fRs"], first_rows["% explained"], atol=1e-6)
+    np.testing.assert_allclose(result.metrics["fCHDum"],
+                               first_rows["Calinski-Harabasz pseudo-F statistic"],
+                               rtol=1e-6, atol=1e-6)
+    assert result.optimal_k == int(first_rows["Calinski-Harabasz pseudo-F statistic"].idxmax())
+
+    position = {name: i for i, name in enumerate(names)}
+    for n, k in enumerate(result.k_values.tolist()):
+        rows = expected[expected["K"] == k]
+        cli_groups = np.zeros(ROWS, dtype=np.int32)
+        cli_groups[[position[s] for s in rows["Sample"]]] = rows["Group"].to_numpy()
+        np.testing.assert_array_equal(result.membership[n] + 1, cli_groups, err_msg=f"K={k}")
@@ -0,0 +1,95 @@
+"""AnalysisRun against a stub CLI: progress events, cancel and deadline."""
+
+from __future__ import annotations
+
+import sys
+import textwrap
+import time
+
+import pytest
+from utils.cli_integration import CANCELLED_EXIT_CODE, AnalysisRun
+
+STUB = textwrap.dedent(f"""
+    import json, signal, sys, time
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit({CANCELLED_EXIT_CODE}))
+    mode = sys.argv[1]
+    print("loading input", flush=True)
+    for k in (2, 3):
+        print(json.dumps({{"event": "k_done", "k": k, "k_max": 3}}), flush=True)
+    print(json.dumps({{"no_event": 1}}), flush=True)
+    if mode == "hang":
+        time.sleep(30)
+    elif mode == "interrupted":
+        sys.exit({CANCELLED_EXIT_CODE})
+    elif mode == "fail":
+        print("bad input", file=sys.stderr)
+        sys.exit(2)
+""")
+
+
+@pytest.fixture
+def start(tmp_path):
+    script = tmp_path / "stub_cli.py"
+    script.write_text(STUB)
+
+    runs = []
+
+    def start(mode, deadline_s=None, finalize=lambda: (True, "done")):
+        run = AnalysisRun([sys.executable, str(script), mode], str(tmp_path),
+                          deadline_s, finalize)
+        runs.append(run)
+        return run
+
+    yield start
+    for run in runs:
+        if not run.done():
+            run.process.kill()
+            run.process.wait()
+
+
+def _wait_for_events(run, count, timeout_s=10.0):
+    events = []
+    deadline = time.monotonic() + timeout_s
+    while len(events) < count:
+        assert time.monotonic() < deadline, f"only got {events}"
+        events.extend(run.poll())
+        time.sleep(0.01)
+    return events
+
+
+def test_poll_returns_progress_events(start):
+    run = start("exit")
+    events = _wait_for_events(run, 2)
+    assert events == [{"event": "k_done", "k": 2, "k_max": 3},
+                      {"event": "k_done", "k": 3, "k_max": 3}]
+    assert run.finish() == (True, "done")
+    assert run.poll() == []
+
+
+def test_cancel(start):
+    run = start("hang")
+    _wait_for_events(run, 2)
+    run.cancel()
+    assert run.done()
+    assert run.cancelled
+    assert run.finish() == (False, "Analysis cancelled")
+
+
+def test_deadline(start):
+    run = start("hang", deadline_s=0.2)
+    began = time.monotonic()
+    assert run.finish() == (False, "Analysis timeout (>0.2 s)")
+    assert time.monotonic() - began < 10.0
+    assert not run.cancelled
+
+
+def test_interrupted_exit_code_is_cancelled(start):
+    run = start("interrupted", finalize=pytest.fail)
+    assert run.finish() == (False, "Analysis cancelled")
+
+
+def test_cli_error(start):
+    ok, message = start("fail").finish()
+    assert not ok
+    assert message.startswith("CLI error (code 2)") and "bad input" in message
@@ -0,0 +1,62 @@
+"""DataPipeline result frames and CSV export for both result layouts."""
+
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+from conftest import K_VALUES, read_fixture
+from utils.data_pipeline import DataPipeline
+
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    # Wide Parquet stores Sample dictionary-encoded (categorical in pandas)
+    df = df.reset_index(drop=True)
+    if "Sample" in df.columns:
+        df["Sample"] = df["Sample"].astype(str)
+    return df
+
+
+@pytest.mark.parametrize("layout", ["wide", "normalized"])
+def test_load_results_frame(result_layouts, layout):
+    wide_path, normalized = result_layouts
+    path = wide_path if layout == "wide" else normalized
+    names, bins, _ = read_fixture()
+
+    df = DataPipeline.load_results_frame(str(path))
+    assert list(df.columns[:3]) == ["K", "Group", "Sample"]
+    assert list(df.columns[3:3 + len(bins)]) == bins
+    assert list(df.columns[-2:]) == ["latitude", "longitude"]
+    assert len(df) == len(names) * len(K_VALUES)
+    assert sorted(df["K"].unique().tolist()) == list(K_VALUES)
+    keys = list(zip(df["K"], df["Group"]))
+    assert keys == sorted(keys)
+
+    one_k = DataPipeline.load_results_frame(str(path), 4, columns=["K", "Group", "Sample"])
+    assert list(one_k.columns) == ["K", "Group", "Sample"]
+    assert set(one_k["K"]) == {4} and len(one_k) == len(names)
+    assert sorted(one_k["Sample"].astype(str)) == sorted(names)
+
+
+def test_layouts_give_the_same_frame(result_layouts):
+    wide_path, normalized = result_layouts
+    wide = _normalize(DataPipeline.load_results_frame(str(wide_path)))
+    expanded = _normalize(DataPipeline.load_results_frame(str(normalized)))
+    pd.testing.assert_frame_equal(wide, expanded, check_dtype=False)
+
+
+@pytest.mark.parametrize("layout", ["wide", "normalized"])
+def test_parquet_to_csv(result_layouts, tmp_path, layout):
+    wide_path, normalized = result_layouts
+    path = wide_path if layout == "wide" else normalized
+    csv_path = tmp_path / "export.csv"
+
+    assert DataPipeline.parquet_to_csv(str(path), str(csv_path))
+    exported = pd.read_csv(csv_path, dtype={"Sample": str})
+    expected = _normalize(DataPipeline.load_results_frame(str(path)))
+    assert list(exported.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(exported, expected, check_dtype=False)
+
+
+def test_parquet_to_csv_reports_failure(tmp_path):
+    assert not DataPipeline.parquet_to_csv(str(tmp_path / "missing.parquet"),
+                                           str(tmp_path / "export.csv"))
@@ -0,0 +1,30 @@
+"""Wide and normalized loads of one result must describe the same samples."""
+
+from __future__ import annotations
+
+import numpy as np
+from conftest import K_VALUES, read_fixture
+
+from app.core.datastore import AnalysisResult, write_ipc_cache
+
+
+def test_fixture_repeats_a_sample_name():
+    names, _, values = read_fixture()
+    rows = [i for i, name in enumerate(names) if name == "Parakeelya_white beach"]
+    assert len(rows) == 2
+    assert not np.array_equal(values[rows[0]], values[rows[1]])
+
+
+def test_wide_and_normalized_group_details_match(result_layouts):
+    wide_path, normalized = result_layouts
+    normalized_result = AnalysisResult(normalized)
+    for path in (wide_path, write_ipc_cache(wide_path)):
+        wide_result = AnalysisResult(path)
+        assert wide_result.validate_data()
+        assert sorted(wide_result.sample_names) == sorted(normalized_result.sample_names)
+        for k in K_VALUES:
+            assert wide_result.get_group_details(k) == normalized_result.get_group_details(k)
+
+    subset = AnalysisResult(wide_path, k_values=[3, 5])
+    for k in (3, 5):
+        assert subset.get_group_details(k) == normalized_result.get_group_details(k)
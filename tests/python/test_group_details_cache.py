@@ -0,0 +1,91 @@
+"""GroupDetailsCache byte budget, LRU order and speculative entries."""
+
+from __future__ import annotations
+
+import pytest
+from utils.group_details_cache import GroupDetailsCache, estimate_details_bytes
+
+
+def _details(k: int, values: int = 100) -> dict:
+    """Group details for K with one sample of ``values`` values per group."""
+    return {g: {'samples': [{'name': f"S{g}", 'values': [0.0] * values}]}
+            for g in range(1, k + 1)}
+
+
+ENTRY_BYTES = estimate_details_bytes(_details(1))
+
+
+def _cache(entries: int) -> GroupDetailsCache:
+    # K=1 details so every entry has the same size
+    return GroupDetailsCache(max_bytes=entries * ENTRY_BYTES)
+
+
+def test_estimate_grows_with_samples_and_values():
+    assert ENTRY_BYTES > 0
+    assert estimate_details_bytes(_details(3)) == 3 * ENTRY_BYTES
+    assert estimate_details_bytes(_details(1, 200)) > ENTRY_BYTES
+    assert estimate_details_bytes({}) == 0
+
+
+def test_evicts_least_recently_used_over_budget():
+    cache = _cache(2)
+    for k in (2, 3, 4):
+        cache.put(k, _details(1))
+    assert list(cache) == [3, 4]
+    assert cache.total_bytes == 2 * ENTRY_BYTES
+
+    cache.put(3, _details(1))  # replacing an entry does not double count it
+    assert list(cache) == [4, 3]
+    assert cache.total_bytes == 2 * ENTRY_BYTES
+
+
+def test_prefetched_entries_are_evicted_before_opened_ones():
+    cache = _cache(3)
+    cache.put(2, _details(1))
+    cache.put(3, _details(1))
+    cache.put(4, _details(1), speculative=True)
+    assert list(cache) == [4, 2, 3]
+
+    # A prefetch that does not fit drops itself, not what the user opened
+    cache.put(5, _details(1), speculative=True)
+    assert 5 not in cache
+    assert list(cache) == [4, 2, 3]
+
+    cache.put(6, _details(1))
+    assert list(cache) == [2, 3, 6]
+
+
+def test_get_promotes_an_entry():
+    cache = _cache(3)
+    cache.put(2, _details(1))
+    cache.put(3, _details(1))
+    cache.put(4, _details(1), speculative=True)
+
+    assert cache.get(4) is not None
+    assert list(cache) == [2, 3, 4]
+    cache.put(5, _details(1))
+    assert list(cache) == [3, 4, 5]
+
+    assert cache[3] is cache.get(3)
+    assert list(cache) == [4, 5, 3]
+    assert cache.get(2, "missing") == "missing"
+    with pytest.raises(KeyError):
+        cache[2]
+
+
+def test_keeps_the_latest_entry_over_budget():
+    cache = _cache(1)
+    cache.put(2, _details(1))
+    cache.put(3, _details(4))
+    assert list(cache) == [3]
+    assert cache.total_bytes == 4 * ENTRY_BYTES
+
+    cache.discard(3)
+    assert len(cache) == 0 and cache.total_bytes == 0
+
+
+def test_budget_from_environment(monkeypatch):
+    monkeypatch.setenv("EM_GROUP_DETAILS_CACHE_MB", "1.5")
+    assert GroupDetailsCache().max_bytes == int(1.5 * 1024 * 1024)
+    monkeypatch.setenv("EM_GROUP_DETAILS_CACHE_MB", "lots")
+    assert GroupDetailsCache().max_bytes == 256 * 1024 * 1024
@@ -0,0 +1,114 @@
+"""Worker emits exactly one of result, error or cancelled, then finished."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+QtCore = pytest.importorskip("PyQt6.QtCore")
+
+from app.gui import worker as worker_module  # noqa: E402
+from app.gui.worker import Progress, Worker, WorkerCancelled, start_worker  # noqa: E402
+
+SIGNALS = ("progress", "result", "error", "cancelled", "finished")
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+
+@pytest.fixture
+def pool():
+    pool = QtCore.QThreadPool()
+    yield pool
+    pool.waitForDone()
+
+
+def _record(worker: Worker) -> list[tuple[str, object]]:
+    events: list[tuple[str, object]] = []
+    for name in SIGNALS:
+        getattr(worker.signals, name).connect(
+            lambda *args, name=name: events.append((name, args[0] if args else None)))
+    return events
+
+
+def _wait_finished(app, events, timeout_s: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout_s
+    while not any(name == "finished" for name, _ in events):
+        assert time.monotonic() < deadline, f"worker did not finish: {events}"
+        app.processEvents(QtCore.QEventLoop.ProcessEventsFlag.AllEvents, 50)
+    app.processEvents()  # anything queued after finished would show up now
+
+
+def _names(events) -> list[str]:
+    return [name for name, _ in events if name != "progress"]
+
+
+def test_result(app, pool):
+    def work(context, a, b=0):
+        context.progress(0, 1, "adding")
+        return a + b
+
+    worker = Worker(work, 2, b=3)
+    events = _record(worker)
+    start_worker(worker, pool)
+    _wait_finished(app, events)
+
+    assert _names(events) == ["result", "finished"]
+    assert ("result", 5) in events
+    assert ("progress", Progress(0, 1, "adding")) in events
+    assert worker not in worker_module._running
+
+
+def test_error(app, pool):
+    failure = ValueError("bad input")
+
+    def work(context):
+        raise failure
+
+    worker = Worker(work)
+    events = _record(worker)
+    start_worker(worker, pool)
+    _wait_finished(app, events)
+
+    assert _names(events) == ["error", "finished"]
+    assert ("error", failure) in events
+
+
+def test_raised_worker_cancelled(app, pool):
+    def work(context):
+        raise WorkerCancelled()
+
+    worker = Worker(work)
+    events = _record(worker)
+    start_worker(worker, pool)
+    _wait_finished(app, events)
+
+    assert _names(events) == ["cancelled", "finished"]
+
+
+@pytest.mark.parametrize("outcome", ["check", "exception", "return"])
+def test_cancel_request(app, pool, outcome):
+    started = threading.Event()
+
+    def work(context):
+        started.set()
+        while not context.cancelled:
+            time.sleep(0.01)
+        if outcome == "check":
+            context.check_cancelled()
+        elif outcome == "exception":
+            raise RuntimeError("process killed")
+        return "late result"
+
+    worker = Worker(work)
+    events = _record(worker)
+    start_worker(worker, pool)
+    assert started.wait(5.0)
+    worker.cancel()
+    _wait_finished(app, events)
+
+    assert _names(events) == ["cancelled", "finished"]